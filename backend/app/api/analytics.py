@@ -31,6 +31,27 @@ async def get_global_analytics(
     return {"stats": stats}
 
 
+@router.get("/retrieval-ab")
+async def get_retrieval_ab(
+    bot_id: str | None = Query(default=None, description="Filtrar por bot_id"),
+    days: int = Query(default=30, ge=1, le=365, description="Días a analizar")
+):
+    """
+    A/B del top-k adaptativo (bots con adaptive_k): fuentes, caracteres de contexto y
+    tiempo de respuesta de la variante adaptive frente al grupo de control.
+    Incluye los contadores del proceso actual (chunks cortados por codo o presupuesto).
+    """
+    from app.core.registry import registry
+
+    service = AnalyticsService()
+    stats = service.get_retrieval_ab_stats(bot_id=bot_id, days=days)
+
+    return {
+        "stats": stats,
+        "live": registry.stats()["adaptive_k"]
+    }
+
+
 @router.get("/popular-questions")
 async def get_popular_questions(
     bot_id: str | None = Query(default=None, description="Filtrar por bot_id"),
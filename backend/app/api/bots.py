@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
-from app.services.bot_service import BotService
+from app.core.registry import registry
+from app.services.bot_service import BotService, BotHasDocumentsError
+from app.services.document_service import DocumentService
 from app.models.bot import BotCreate, BotUpdate
 
 router = APIRouter()
@@ -14,6 +16,8 @@ async def create_bot(bot_data: BotCreate):
 
     try:
         bot = service.create_bot(bot_data)
+        # crea la colección del bot (o de su organización) si la distribución lo requiere
+        registry.vector_service_for_bot(bot.bot_id)
         return {
             "message": "Bot creado correctamente",
             "bot": bot
@@ -70,6 +74,10 @@ async def update_bot(bot_id: str, bot_data: BotUpdate):
             "message": "Bot actualizado correctamente",
             "bot": bot
         }
+    except HTTPException:
+        raise
+    except BotHasDocumentsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al actualizar bot: {str(e)}")
 
@@ -77,12 +85,15 @@ async def update_bot(bot_id: str, bot_data: BotUpdate):
 @router.delete("/{bot_id}")
 async def delete_bot(bot_id: str):
     """
-    Elimina un bot y toda su configuración.
+    Elimina un bot, toda su configuración y sus documentos indexados.
     NOTA: No se puede eliminar el bot 'default'.
     """
     service = BotService()
 
     try:
+        if bot_id != "default" and service.get_bot(bot_id):
+            DocumentService().delete_bot_documents(bot_id)
+
         success = service.delete_bot(bot_id)
         if not success:
             raise HTTPException(status_code=404, detail=f"Bot no encontrado: {bot_id}")
@@ -1,32 +1,43 @@
-from fastapi import APIRouter, Query
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Query, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError
 
-from app.services.chat_service import get_chat_service
-from app.services.retriever_service import RetrieverService
+from app.models.document import DocumentFilter
+from app.services.chat_service import ChatService, get_chat_service
+from app.services.retriever_service import RetrieverService, get_retriever_service
+from app.core.registry import registry
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
     question: str
     bot_id: str = "default"
+    filters: Optional[DocumentFilter] = Field(None, description="Restringe la búsqueda a estos documentos")
+
+class RetrieveBatchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=100)
+    bot_id: str = "default"
+    k: Optional[int] = Field(None, ge=1, le=20, description="Por defecto retrieval_k del bot")
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0, description="Por defecto retrieval_threshold del bot")
+    filters: Optional[DocumentFilter] = Field(None, description="Restringe la búsqueda a estos documentos")
 
 @router.post("/")
-def chat_endpoint(payload: ChatRequest):
-    chat_service = get_chat_service()
-    result = chat_service.answer(payload.question, payload.bot_id)
+def chat_endpoint(payload: ChatRequest, chat_service: ChatService = Depends(get_chat_service)):
+    result = chat_service.answer(payload.question, payload.bot_id, filters=payload.filters)
     return result
 
 @router.post("/stream")
-def chat_stream_endpoint(payload: ChatRequest):
+def chat_stream_endpoint(payload: ChatRequest, chat_service: ChatService = Depends(get_chat_service)):
     """
     Endpoint de streaming que devuelve la respuesta del chatbot en tiempo real.
     Usa Server-Sent Events (SSE) para enviar chunks progresivamente.
     """
-    chat_service = get_chat_service()
 
     return StreamingResponse(
-        chat_service.answer_stream(payload.question, payload.bot_id),
+        chat_service.answer_stream(payload.question, payload.bot_id, filters=payload.filters),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -35,17 +46,69 @@ def chat_stream_endpoint(payload: ChatRequest):
         }
     )
 
+@router.post("/retrieve-batch")
+def retrieve_batch(payload: RetrieveBatchRequest, retriever: RetrieverService = Depends(get_retriever_service)):
+    """
+    Retrieval de varias preguntas en un solo request (evaluación, debug, clientes multi-pregunta).
+    Un pase del encoder y una consulta al vector store para todas; threshold y max_sources por pregunta.
+    """
+    from app.services.bot_service import BotService
+
+    bot_config = BotService().get_bot(payload.bot_id)
+    if bot_config is None:
+        raise HTTPException(status_code=404, detail=f"Bot {payload.bot_id} no encontrado")
+
+    k = payload.k or bot_config.retrieval_k
+    threshold = payload.threshold if payload.threshold is not None else bot_config.retrieval_threshold
+    batch = retriever.search_many(
+        payload.queries, payload.bot_id, k=k, threshold=threshold, bot_config=bot_config, filters=payload.filters
+    )
+
+    return {
+        "bot_id": payload.bot_id,
+        "k": k,
+        "threshold": threshold,
+        "results": [
+            {
+                "query": query,
+                "total_chunks": len(chunks),
+                "chunks": [
+                    {
+                        "text": chunk["text"],
+                        "metadata": chunk.get("metadata", {}),
+                        "similarity": chunk.get("similarity"),
+                        "rerank_score": chunk.get("rerank_score")
+                    }
+                    for chunk in chunks
+                ]
+            }
+            for query, chunks in zip(payload.queries, batch)
+        ]
+    }
+
 @router.get("/debug-retrieval")
 def debug_retrieval(
     query: str = Query(..., description="Pregunta a buscar"),
-    bot_id: str = Query(default="default", description="ID del bot")
+    bot_id: str = Query(default="default", description="ID del bot"),
+    filename: Optional[List[str]] = Query(default=None, description="Solo estos archivos"),
+    file_type: Optional[List[str]] = Query(default=None, description="Solo estos tipos MIME"),
+    uploaded_from: Optional[datetime] = Query(default=None, description="Subidos desde (inclusive)"),
+    uploaded_to: Optional[datetime] = Query(default=None, description="Subidos antes de (exclusivo)"),
+    retriever: RetrieverService = Depends(get_retriever_service)
 ):
     """
     Endpoint temporal para debuggear el retrieval.
-    Muestra qué chunks se recuperan para una pregunta.
+    Muestra qué chunks se recuperan para una pregunta (opcionalmente dentro de un alcance de documentos).
     """
-    retriever = RetrieverService()
-    results = retriever.search(query, bot_id=bot_id)
+    try:
+        filters = DocumentFilter(
+            filenames=filename, file_types=file_type, uploaded_from=uploaded_from, uploaded_to=uploaded_to
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False)
+        )
+    results = retriever.search(query, bot_id=bot_id, filters=filters)
 
     return {
         "query": query,
@@ -56,8 +119,12 @@ def debug_retrieval(
                 "text_preview": chunk["text"][:300] + "...",
                 "full_text": chunk["text"],
                 "metadata": chunk.get("metadata", {}),
-                "distance_score": chunk.get("score")
+                "similarity": chunk.get("similarity"),
+                "distance": chunk.get("distance")
             }
             for chunk in results
-        ]
+        ],
+        "query_embedding_cache": registry.stats()["query_embedding_cache"],
+        "mmr": registry.stats()["mmr"],
+        "adaptive_k": registry.stats()["adaptive_k"]
     }
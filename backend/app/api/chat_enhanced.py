@@ -2,13 +2,15 @@
 API de chat con RAG preciso y streaming de respuestas.
 Endpoints para chatear con bots usando Server-Sent Events (SSE).
 """
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Depends
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
-from app.services.chat_service_enhanced import get_chat_service_enhanced
-from app.services.retriever_service import RetrieverService
+from app.models.document import DocumentFilter
+from app.services.chat_service_enhanced import ChatServiceEnhanced, get_chat_service_enhanced
+from app.services.retriever_service import RetrieverService, get_retriever_service
+from app.core.registry import registry
 
 router = APIRouter()
 
@@ -17,6 +19,7 @@ class ChatRequest(BaseModel):
     """Request para chat"""
     question: str
     bot_id: str = "default"
+    filters: Optional[DocumentFilter] = Field(None, description="Restringe la búsqueda a estos documentos")
 
 
 class ChatResponse(BaseModel):
@@ -28,7 +31,7 @@ class ChatResponse(BaseModel):
 
 
 @router.post("/", response_model=ChatResponse)
-def chat_endpoint(payload: ChatRequest):
+def chat_endpoint(payload: ChatRequest, chat_service: ChatServiceEnhanced = Depends(get_chat_service_enhanced)):
     """
     Endpoint de chat sin streaming (respuesta completa de una vez).
 
@@ -41,10 +44,9 @@ def chat_endpoint(payload: ChatRequest):
     Returns:
         ChatResponse con answer, sources y bot_config
     """
-    chat_service = get_chat_service_enhanced()
 
     try:
-        result = chat_service.answer(payload.question, payload.bot_id)
+        result = chat_service.answer(payload.question, payload.bot_id, filters=payload.filters)
         return result
 
     except ValueError as e:
@@ -54,7 +56,7 @@ def chat_endpoint(payload: ChatRequest):
 
 
 @router.post("/stream")
-def chat_stream_endpoint(payload: ChatRequest):
+def chat_stream_endpoint(payload: ChatRequest, chat_service: ChatServiceEnhanced = Depends(get_chat_service_enhanced)):
     """
     Endpoint de streaming que devuelve la respuesta del chatbot en tiempo real.
 
@@ -100,11 +102,10 @@ def chat_stream_endpoint(payload: ChatRequest):
     **Integración frontend:**
     Ver STREAMING_GUIDE.md para ejemplos completos.
     """
-    chat_service = get_chat_service_enhanced()
 
     try:
         return StreamingResponse(
-            chat_service.answer_stream(payload.question, payload.bot_id),
+            chat_service.answer_stream(payload.question, payload.bot_id, filters=payload.filters),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
@@ -131,7 +132,8 @@ def debug_retrieval(
     query: str = Query(..., description="Pregunta a buscar"),
     bot_id: str = Query(default="default", description="ID del bot"),
     threshold: Optional[float] = Query(None, ge=0.0, le=1.0, description="Threshold de similitud"),
-    k: int = Query(default=5, ge=1, le=20, description="Número de resultados")
+    k: int = Query(default=5, ge=1, le=20, description="Número de resultados"),
+    retriever: RetrieverService = Depends(get_retriever_service)
 ):
     """
     Endpoint de debug para el sistema de retrieval.
@@ -147,7 +149,6 @@ def debug_retrieval(
     - Ver qué documentos se están usando
     - Debuggear por qué no encuentra info relevante
     """
-    retriever = RetrieverService()
 
     # Buscar con o sin threshold
     results = retriever.search(
@@ -179,14 +180,18 @@ def debug_retrieval(
             "min_similarity": min(c.get("similarity", 0) for c in results) if results else 0,
             "max_similarity": max(c.get("similarity", 0) for c in results) if results else 0,
             "suggested_threshold": 0.3 if not results or sum(c.get("similarity", 0) for c in results) / len(results) < 0.4 else 0.5
-        }
+        },
+        "query_embedding_cache": registry.stats()["query_embedding_cache"],
+        "mmr": registry.stats()["mmr"],
+        "adaptive_k": registry.stats()["adaptive_k"]
     }
 
 
 @router.post("/test-strict-mode")
 def test_strict_mode(
     question: str = Query(..., description="Pregunta de prueba"),
-    bot_id: str = Query(default="default", description="ID del bot")
+    bot_id: str = Query(default="default", description="ID del bot"),
+    chat_service: ChatServiceEnhanced = Depends(get_chat_service_enhanced)
 ):
     """
     Endpoint de testing para verificar strict_mode.
@@ -197,7 +202,6 @@ def test_strict_mode(
 
     Útil para verificar configuración antes de producción.
     """
-    chat_service = get_chat_service_enhanced()
 
     try:
         result = chat_service.answer(question, bot_id)
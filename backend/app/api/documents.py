@@ -1,8 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from app.services.document_service import DocumentService
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
+from pydantic import BaseModel, Field
+from app.services.document_service import DocumentService, get_document_service
+from app.core.registry import registry
 
 router = APIRouter()
 
+class BulkMoveRequest(BaseModel):
+    new_bot_id: str
+    doc_ids: Optional[List[str]] = Field(None, min_length=1, description="Documentos a mover")
+    from_bot_id: Optional[str] = Field(None, description="Mover todos los documentos de este bot")
+
 ALLOWED_CONTENT_TYPES = [
     "application/pdf",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
@@ -12,7 +22,8 @@ ALLOWED_CONTENT_TYPES = [
 @router.post("/upload")
 async def upload_document(
     file: UploadFile = File(..., description="Archivo a subir (max 50MB)"),
-    bot_id: str = Query(default="default", description="ID del bot al que pertenece el documento")
+    bot_id: str = Query(default="default", description="ID del bot al que pertenece el documento"),
+    service: DocumentService = Depends(get_document_service)
 ):
     """
     Sube y procesa un documento (PDF, DOCX, TXT) para un bot específico.
@@ -43,7 +54,6 @@ async def upload_document(
         )
 
     try:
-        service = DocumentService()
         doc_info = await service.process_upload(file, bot_id=bot_id)
 
         return {
@@ -58,31 +68,54 @@ async def upload_document(
 
 @router.get("/list")
 async def list_documents(
-    bot_id: str | None = Query(default=None, description="Filtrar documentos por bot_id")
+    bot_id: str | None = Query(default=None, description="Filtrar documentos por bot_id"),
+    file_type: str | None = Query(default=None, description="Filtrar por tipo MIME (p. ej. application/pdf)"),
+    uploaded_from: date | None = Query(default=None, description="Subidos desde esta fecha (inclusive)"),
+    uploaded_to: date | None = Query(default=None, description="Subidos hasta esta fecha (inclusive)"),
+    limit: int = Query(default=100, ge=1, le=1000, description="Documentos por página"),
+    offset: int = Query(default=0, ge=0, description="Documentos a saltar"),
+    service: DocumentService = Depends(get_document_service)
 ):
     """
-    Lista todos los documentos indexados.
+    Lista los documentos indexados, del más reciente al más antiguo, con su cantidad de chunks.
     Si se proporciona bot_id, filtra solo los documentos de ese bot.
+    total es la cantidad de documentos que cumplen los filtros (no solo los de esta página).
     """
-    service = DocumentService()
-    documents = service.list_documents(bot_id=bot_id)
+    page = service.list_documents(
+        bot_id=bot_id,
+        file_type=file_type,
+        uploaded_from=uploaded_from.isoformat() if uploaded_from else None,
+        # uploaded_at es un datetime ISO: el día final se incluye completo
+        uploaded_to=(uploaded_to + timedelta(days=1)).isoformat() if uploaded_to else None,
+        limit=limit,
+        offset=offset
+    )
 
     return {
-        "documents": documents,
-        "total": len(documents)
+        "documents": page["documents"],
+        "total": page["total"],
+        "limit": limit,
+        "offset": offset
     }
 
+@router.get("/dedup-stats")
+async def dedup_stats(service: DocumentService = Depends(get_document_service)):
+    """
+    Estadísticas de la deduplicación en la ingesta: chunks casi duplicados que no se
+    indexaron (y sus caracteres) e índices MinHash cargados por bot.
+    """
+    return service.dedup_stats()
+
 @router.patch("/{doc_id}/move")
 async def move_document_to_bot(
     doc_id: str,
-    new_bot_id: str = Query(..., description="Nuevo bot_id al que mover el documento")
+    new_bot_id: str = Query(..., description="Nuevo bot_id al que mover el documento"),
+    service: DocumentService = Depends(get_document_service)
 ):
     """
     Cambia el bot_id de un documento existente.
     Útil cuando se sube un documento al bot equivocado.
     """
-    service = DocumentService()
-
     try:
         service.move_document_to_bot(doc_id, new_bot_id)
         return {
@@ -93,13 +126,56 @@ async def move_document_to_bot(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al mover documento: {str(e)}")
 
+@router.post("/bulk-move", status_code=202)
+async def bulk_move_documents(payload: BulkMoveRequest, service: DocumentService = Depends(get_document_service)):
+    """
+    Mueve muchos documentos (doc_ids, o todos los de from_bot_id) a new_bot_id en segundo plano.
+    Responde de inmediato con el trabajo; el progreso se consulta en /documents/jobs/{job_id}.
+    Los trabajos viven en memoria del proceso que los recibió: con varios workers de uvicorn
+    (o varios nodos) la consulta debe llegar al mismo proceso, si no responde 404.
+    """
+    if (payload.doc_ids is None) == (payload.from_bot_id is None):
+        raise HTTPException(status_code=400, detail="Indica doc_ids o from_bot_id (solo uno)")
+
+    job = registry.jobs.submit(
+        "bulk_move",
+        lambda job: service.bulk_move_documents(
+            payload.new_bot_id, doc_ids=payload.doc_ids, from_bot_id=payload.from_bot_id, job=job
+        ),
+        new_bot_id=payload.new_bot_id,
+        from_bot_id=payload.from_bot_id,
+        doc_ids=len(payload.doc_ids) if payload.doc_ids is not None else None
+    )
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Estado y progreso de un trabajo en segundo plano (p. ej. un movimiento masivo).
+    404 si el trabajo no es de este proceso (se creó en otro worker, o el proceso se reinició).
+    """
+    job = registry.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo {job_id} no encontrado")
+    return job.to_dict()
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancela un trabajo: se detiene al terminar la página en curso.
+    Como la consulta, solo lo encuentra el proceso que lo creó (404 en los demás).
+    """
+    job = registry.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo {job_id} no encontrado")
+    registry.jobs.cancel(job_id)
+    return job.to_dict()
+
 @router.delete("/{doc_id}")
-async def delete_document(doc_id: str):
+async def delete_document(doc_id: str, service: DocumentService = Depends(get_document_service)):
     """
     Elimina un documento específico de la base vectorial.
     """
-    service = DocumentService()
-
     try:
         service.delete_document(doc_id)
         return {
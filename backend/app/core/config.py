@@ -23,6 +23,112 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
 
+    # RAG: modelo de embeddings y almacenamiento vectorial
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    CHROMA_PATH: str = "chroma_db"
+    CHROMA_COLLECTION: str = "chatbot_docs"
+    # Distribución de colecciones: "shared" (una por modelo, filtro por bot_id),
+    # "bot" (una por bot) u "organization" (una por organización).
+    # Al cambiarla, migrar con: python migrate_chroma_collections.py --layout <layout>
+    CHROMA_COLLECTION_LAYOUT: str = "shared"
+    # Espacio de distancia del índice HNSW de las colecciones nuevas: "cosine", "ip" o "l2".
+    # Las colecciones existentes conservan el suyo hasta reconstruirlas con rebuild_chroma_index.py
+    CHROMA_DISTANCE: str = "cosine"
+    # Cada cuánto las consultas revisan si otro proceso escribió en la colección (varios
+    # workers sobre el mismo CHROMA_PATH) para descartar los índices en memoria. 0 = siempre
+    CHROMA_SYNC_INTERVAL_S: float = 1.0
+
+    # Backend de embeddings: "torch" (sentence-transformers) u "onnx" (ONNX Runtime CPU)
+    EMBEDDING_BACKEND: str = "torch"
+    ONNX_MODEL_DIR: str = "onnx_models"
+    ONNX_QUANTIZED: bool = True
+    # Hilos de inferencia por proceso (0 = valor por defecto de la librería)
+    EMBEDDING_THREADS: int = 0
+
+    # Micro-batching de embeddings de consultas
+    EMBEDDING_BATCHING: bool = True
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+
+    # Cache LRU de embeddings de consultas (0 = desactivado)
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+
+    # Cache de resultados de retrieval por bot (0 = desactivado): entradas, memoria
+    # aproximada y expiración. Se invalida por bot al subir, borrar o mover documentos
+    RETRIEVAL_CACHE_SIZE: int = 4096
+    RETRIEVAL_CACHE_MAX_MB: float = 64.0
+    RETRIEVAL_CACHE_TTL_S: float = 300.0
+
+    # Cache persistente de embeddings de chunks (SQLite, clave modelo + SHA-256)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "embedding_cache.sqlite3"
+
+    # Pool de procesos para embeber subidas grandes (0 workers = desactivado)
+    EMBEDDING_WORKERS: int = 0
+    EMBEDDING_WORKER_THREADS: int = 1
+    EMBEDDING_SHARD_SIZE: int = 256
+    EMBEDDING_PARALLEL_MIN_CHUNKS: int = 512
+
+    # Backend vectorial: "chroma" (directorio local, un solo nodo) o "pgvector"
+    # (tablas en Postgres compartidas por varios nodos de la API; migrar con migrate_chroma_to_pgvector.py)
+    VECTOR_STORE_BACKEND: str = "chroma"
+    # pgvector: conexión (vacío = DATABASE_URL), pool por proceso, índice ANN de las tablas
+    # nuevas ("hnsw" o "ivfflat") con sus parámetros, y cada cuánto cada nodo revisa si
+    # otro modificó una colección (para descartar sus índices en memoria)
+    PGVECTOR_URL: str = ""
+    PGVECTOR_POOL_MIN: int = 1
+    PGVECTOR_POOL_MAX: int = 10
+    PGVECTOR_INDEX: str = "hnsw"
+    PGVECTOR_HNSW_M: int = 16
+    PGVECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    PGVECTOR_HNSW_EF_SEARCH: int = 40
+    PGVECTOR_IVFFLAT_LISTS: int = 100
+    PGVECTOR_IVFFLAT_PROBES: int = 10
+    # pgvector >= 0.8: "relaxed_order" o "strict_order" para no perder resultados al filtrar por bot_id
+    PGVECTOR_ITERATIVE_SCAN: str = ""
+    PGVECTOR_SYNC_INTERVAL_S: float = 1.0
+
+    # Registro de documentos del backend chroma (SQLite); en pgvector es la tabla vector_documents
+    DOCUMENT_REGISTRY_PATH: str = "document_registry.sqlite3"
+
+    # Trabajos en segundo plano (movimientos masivos de documentos): hilos por proceso
+    # y chunks por página (cada página es una actualización de metadata en el vector store)
+    JOB_WORKERS: int = 1
+    BULK_MOVE_PAGE_SIZE: int = 1000
+
+    # Índice exacto en proceso (matriz float32 memory-mapped) para bots con hasta
+    # EXACT_INDEX_MAX_CHUNKS chunks; los más grandes usan el ANN de Chroma (0 = desactivado)
+    EXACT_INDEX_MAX_CHUNKS: int = 2000
+    EXACT_INDEX_DIR: str = "exact_index"
+
+    # Búsqueda híbrida (BotConfig.retrieval_mode = "hybrid"): candidatos mínimos por etapa
+    # (vectorial y BM25) antes de fusionar, y constante k de Reciprocal Rank Fusion
+    HYBRID_CANDIDATES: int = 20
+    HYBRID_RRF_K: int = 60
+
+    # Rerank con cross-encoder (BotConfig.rerank): candidatos a puntuar, tamaño de batch
+    # y presupuesto de tiempo por request (0 = sin límite)
+    RERANK_MODEL: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANK_CANDIDATES: int = 20
+    RERANK_BATCH_SIZE: int = 32
+    RERANK_BUDGET_MS: float = 150.0
+
+    # Diversificación MMR (BotConfig.mmr): candidatos a recuperar antes de elegir los
+    # max_sources más diversos, y similitud a partir de la cual un chunk es un casi duplicado
+    MMR_CANDIDATES: int = 20
+    MMR_DUPLICATE_SIMILARITY: float = 0.95
+
+    # Deduplicación de chunks en la ingesta (MinHash + LSH por bot): "link" los escribe
+    # con metadata duplicate_of y la búsqueda los descarta cuando su original (u otro
+    # duplicado del mismo original) ya está entre los candidatos, "skip" no escribe los
+    # casi duplicados (se restauran si su original se borra o se mueve; ahorra espacio, pero
+    # una búsqueda filtrada a ese documento no los encuentra), "off" la desactiva.
+    # DEDUP_THRESHOLD es la similitud de Jaccard estimada a partir de la cual un chunk es duplicado
+    DEDUP_MODE: str = "link"
+    DEDUP_THRESHOLD: float = 0.85
+    DEDUP_NUM_PERM: int = 128
+    DEDUP_BANDS: int = 32
+
     # PostgreSQL
     DATABASE_URL: str = ""
     USE_DATABASE: bool = False
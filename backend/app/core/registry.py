@@ -0,0 +1,613 @@
+"""
+Registro de recursos pesados compartidos por todo el proceso.
+
+Los modelos de embeddings, el vector store (ChromaDB o pool de pgvector) y el cliente LLM se crean
+una sola vez (al arrancar FastAPI) y se reutilizan en cada request.
+"""
+import hashlib
+import re
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+
+# Componentes reportados por /ready
+COMPONENTS = ("embedding_model", "vector_store", "llm_backend")
+
+
+def _slug(value: str) -> str:
+    # Chroma admite 3-63 caracteres [a-zA-Z0-9._-], empezando y terminando en alfanumérico
+    return re.sub(r"[^a-zA-Z0-9_-]+", "-", value).strip("-_")
+
+
+def collection_name_for_model(model_name: str, partition: Optional[str] = None) -> str:
+    """
+    Colección de Chroma donde viven los vectores de un modelo (y de una partición,
+    "bot:<bot_id>" u "org:<organization_id>", según CHROMA_COLLECTION_LAYOUT).
+    El modelo por defecto sin partición conserva la colección histórica (CHROMA_COLLECTION).
+    """
+    name = settings.CHROMA_COLLECTION
+    if model_name != settings.EMBEDDING_MODEL:
+        name = f"{name}__{_slug(model_name)}"
+
+    exact = True
+    if partition:
+        slug = _slug(partition)
+        exact = slug == partition.replace(":", "-")
+        name = f"{name}__{slug}"
+
+    # sufijo con hash si el nombre se truncaría o si el slug pudo colisionar con otro bot
+    if len(name) > 63 or not exact:
+        key = f"{model_name}|{partition or ''}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+        name = f"{name[:54]}-{digest}"
+    return name
+
+
+class ServiceRegistry:
+    """
+    Dueño del ciclo de vida de los recursos costosos:
+    - modelos de embeddings (SentenceTransformer u ONNX Runtime), uno por modelo en uso
+    - cliente persistente de ChromaDB o pool de conexiones de pgvector (VECTOR_STORE_BACKEND)
+    - cliente del proveedor LLM
+    - scheduler de micro-batching y cache LRU para embeddings de consultas
+    - cache persistente de embeddings de chunks y pool de procesos (ingesta)
+
+    Cada bot puede usar su propio modelo (BotConfig.embedding_model); sus vectores
+    viven en una colección por modelo, así que la dimensión siempre coincide.
+    Con CHROMA_COLLECTION_LAYOUT = "bot" u "organization" cada modelo se parte además
+    en una colección por bot u organización (ver partition_for_bot).
+    Solo se cargan los modelos que se usan.
+
+    startup() los precarga (en segundo plano con start_background_warmup) y
+    shutdown() los libera. Si se accede a un recurso antes de que termine la
+    precarga (scripts, requests tempranos) se crea perezosamente.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._chroma_client = None
+        self._pg_pool = None
+        self._llm_client = None
+        self._embedding_cache = None
+        self._embedding_services = {}
+        self._query_embedders = {}
+        self._embedding_schedulers = {}
+        self._query_embedding_caches = {}
+        self._document_embedders = {}
+        self._parallel_embedders = {}
+        self._vector_services = {}
+        self._lexical_indexes = None
+        self._dedup_indexes = None
+        self._retrieval_cache = None
+        self._document_registry = None
+        self._jobs = None
+        self._reranker = None
+        self._mmr_stats = None
+        self._adaptive_k_stats = None
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._status = self._initial_status()
+
+    @staticmethod
+    def _initial_status() -> dict:
+        return {
+            name: {"state": "pending", "error": None, "load_ms": None}
+            for name in COMPONENTS
+        }
+
+    def _get_or_create(self, cache: dict, key, factory):
+        """Crea una sola vez por clave (doble chequeo con el lock del registro)"""
+        value = cache.get(key)
+        if value is None:
+            with self._lock:
+                value = cache.get(key)
+                if value is None:
+                    value = factory()
+                    cache[key] = value
+        return value
+
+    # --- Embeddings -------------------------------------------------------
+
+    def get_embedding_service(self, model_name: Optional[str] = None):
+        """Backend de embeddings de un modelo (se carga una sola vez por proceso)"""
+        model_name = model_name or settings.EMBEDDING_MODEL
+
+        def factory():
+            from app.services.embedding_service import get_embedding_service
+            return get_embedding_service(model_name)
+
+        return self._get_or_create(self._embedding_services, model_name, factory)
+
+    def get_query_embedder(self, model_name: Optional[str] = None):
+        """
+        Embebe consultas. Se compone de:
+        cache LRU (si QUERY_EMBEDDING_CACHE_SIZE > 0) → EmbeddingScheduler (si el batching está activo) → modelo
+        """
+        model_name = model_name or settings.EMBEDDING_MODEL
+
+        def factory():
+            embedder = self.get_embedding_service(model_name)
+            if settings.EMBEDDING_BATCHING:
+                from app.services.embedding_scheduler import EmbeddingScheduler
+                scheduler = EmbeddingScheduler(
+                    embedder,
+                    max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                    max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+                )
+                scheduler.start()
+                self._embedding_schedulers[model_name] = scheduler
+                embedder = scheduler
+            if settings.QUERY_EMBEDDING_CACHE_SIZE > 0:
+                from app.services.query_embedding_cache import QueryEmbeddingCache
+                cache = QueryEmbeddingCache(embedder, max_size=settings.QUERY_EMBEDDING_CACHE_SIZE)
+                self._query_embedding_caches[model_name] = cache
+                embedder = cache
+            return embedder
+
+        return self._get_or_create(self._query_embedders, model_name, factory)
+
+    def get_document_embedder(self, model_name: Optional[str] = None):
+        """
+        Embebe chunks en la ingesta. Se compone de:
+        cache persistente (si está activo) → pool de procesos (si EMBEDDING_WORKERS > 0) → modelo
+        """
+        model_name = model_name or settings.EMBEDDING_MODEL
+
+        def factory():
+            embedder = self.get_embedding_service(model_name)
+            if settings.EMBEDDING_WORKERS > 0:
+                from app.services.embedding_pool import ParallelEmbedder
+                parallel = ParallelEmbedder(
+                    embedder,
+                    workers=settings.EMBEDDING_WORKERS,
+                    threads_per_worker=settings.EMBEDDING_WORKER_THREADS,
+                    shard_size=settings.EMBEDDING_SHARD_SIZE,
+                    min_chunks=settings.EMBEDDING_PARALLEL_MIN_CHUNKS
+                )
+                self._parallel_embedders[model_name] = parallel
+                embedder = parallel
+            if settings.EMBEDDING_CACHE_ENABLED:
+                from app.services.embedding_cache import EmbeddingCache, CachedDocumentEmbedder
+                if self._embedding_cache is None:
+                    self._embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH)
+                embedder = CachedDocumentEmbedder(embedder, self._embedding_cache)
+            return embedder
+
+        return self._get_or_create(self._document_embedders, model_name, factory)
+
+    @property
+    def embedding_service(self):
+        """EmbeddingService del modelo por defecto"""
+        return self.get_embedding_service()
+
+    @property
+    def query_embedder(self):
+        return self.get_query_embedder()
+
+    @property
+    def document_embedder(self):
+        return self.get_document_embedder()
+
+    @property
+    def query_embedding_cache(self):
+        """Cache LRU de consultas del modelo por defecto (None si está desactivado)"""
+        self.get_query_embedder()
+        return self._query_embedding_caches.get(settings.EMBEDDING_MODEL)
+
+    # --- Vector store -----------------------------------------------------
+
+    @property
+    def chroma_client(self):
+        """Cliente persistente de ChromaDB compartido"""
+        if self._chroma_client is None:
+            with self._lock:
+                if self._chroma_client is None:
+                    import chromadb
+                    from chromadb.config import Settings as ChromaSettings
+                    self._chroma_client = chromadb.PersistentClient(
+                        path=settings.CHROMA_PATH,
+                        settings=ChromaSettings()
+                    )
+        return self._chroma_client
+
+    @property
+    def pg_pool(self):
+        """Pool de conexiones a Postgres de las tablas pgvector (PGVECTOR_URL o DATABASE_URL)"""
+        if self._pg_pool is None:
+            with self._lock:
+                if self._pg_pool is None:
+                    from app.services.pgvector_store import PgVectorPool
+                    dsn = settings.PGVECTOR_URL or settings.DATABASE_URL
+                    if not dsn:
+                        from app.database.connection import DATABASE_URL as dsn
+                    self._pg_pool = PgVectorPool(
+                        dsn,
+                        min_size=settings.PGVECTOR_POOL_MIN,
+                        max_size=settings.PGVECTOR_POOL_MAX
+                    )
+        return self._pg_pool
+
+    def partition_for_bot(self, bot_id: str, bot=None) -> Optional[str]:
+        """
+        Partición de colección de un bot según CHROMA_COLLECTION_LAYOUT:
+        - "shared": ninguna (todos los bots en la colección del modelo, filtrados por bot_id)
+        - "bot": "bot:<bot_id>", una colección por bot
+        - "organization": "org:<organization_id>"; los bots sin organización usan la suya propia
+        """
+        layout = settings.CHROMA_COLLECTION_LAYOUT
+        if layout == "shared":
+            return None
+        if layout == "organization":
+            if bot is None:
+                from app.services.bot_service import BotService
+                bot = BotService().get_bot(bot_id)
+            if bot is not None and bot.organization_id:
+                return f"org:{bot.organization_id}"
+        return f"bot:{bot_id}"
+
+    def get_vector_service(self, model_name: Optional[str] = None, partition: Optional[str] = None):
+        """
+        Vector store de la colección de un modelo (y partición), en el backend configurado.
+        Abrir la colección no carga el modelo: se carga al primer embed.
+        """
+        model_name = model_name or settings.EMBEDDING_MODEL
+
+        def factory():
+            if settings.VECTOR_STORE_BACKEND == "pgvector":
+                from app.services.pgvector_store import PgVectorStore
+                return PgVectorStore(
+                    collection_name=collection_name_for_model(model_name, partition),
+                    pool=self.pg_pool,
+                    model_name=model_name,
+                    partition=partition
+                )
+            from app.services.vector_service import VectorService
+            return VectorService(
+                collection_name=collection_name_for_model(model_name, partition),
+                client=self.chroma_client,
+                model_name=model_name,
+                partition=partition
+            )
+
+        return self._get_or_create(self._vector_services, (model_name, partition), factory)
+
+    @property
+    def vector_service(self):
+        """VectorService del modelo por defecto"""
+        return self.get_vector_service()
+
+    def vector_service_for_bot(self, bot_id: str):
+        from app.services.bot_service import BotService
+        bot = BotService().get_bot(bot_id)
+        model_name = (bot.embedding_model if bot else None) or settings.EMBEDDING_MODEL
+        return self.get_vector_service(model_name, self.partition_for_bot(bot_id, bot))
+
+    def document_vector_services(self) -> list:
+        """
+        VectorServices de todas las colecciones de documentos existentes
+        (para listar, borrar o mover documentos sin saber en qué modelo o partición están).
+        """
+        keys = {(settings.EMBEDDING_MODEL, None)}
+        if settings.VECTOR_STORE_BACKEND == "pgvector":
+            collections = [
+                (c["name"], c["embedding_model"], c["partition"]) for c in self.pg_pool.list_collections()
+            ]
+        else:
+            collections = [
+                (c.name, (c.metadata or {}).get("embedding_model"), (c.metadata or {}).get("partition"))
+                for c in self.chroma_client.list_collections()
+            ]
+        for name, model_name, partition in collections:
+            partition = partition or None
+            if model_name and name == collection_name_for_model(model_name, partition):
+                keys.add((model_name, partition))
+        return [
+            self.get_vector_service(model_name, partition)
+            for model_name, partition in sorted(keys, key=lambda k: (k[0], k[1] or ""))
+        ]
+
+    @property
+    def document_registry(self):
+        """Registro de documentos (listado paginado): SQLite con chroma, tabla vector_documents con pgvector"""
+        if self._document_registry is None:
+            with self._lock:
+                if self._document_registry is None:
+                    if settings.VECTOR_STORE_BACKEND == "pgvector":
+                        from app.services.pgvector_store import PgDocumentRegistry
+                        self._document_registry = PgDocumentRegistry(self.pg_pool)
+                    else:
+                        from app.services.document_registry import DocumentRegistry
+                        self._document_registry = DocumentRegistry(settings.DOCUMENT_REGISTRY_PATH)
+        return self._document_registry
+
+    @property
+    def jobs(self):
+        """Trabajos en segundo plano del proceso (movimientos masivos de documentos)"""
+        if self._jobs is None:
+            with self._lock:
+                if self._jobs is None:
+                    from app.services.job_service import JobManager
+                    self._jobs = JobManager(workers=settings.JOB_WORKERS)
+        return self._jobs
+
+    def drop_vector_service(self, vector_service):
+        """Elimina la colección completa de una partición (p. ej. al borrar un bot)"""
+        with self._lock:
+            self._vector_services.pop((vector_service.model_name, vector_service.partition), None)
+            vector_service.drop()
+        print(f"🗑️ Colección eliminada: {vector_service.name}")
+
+    def active_models(self) -> set[str]:
+        """Modelos que usan los bots activos (los únicos que se precargan)"""
+        from app.services.bot_service import BotService
+        models = {bot.embedding_model or settings.EMBEDDING_MODEL for bot in BotService().list_bots(active_only=True)}
+        return models or {settings.EMBEDDING_MODEL}
+
+    @property
+    def lexical_indexes(self):
+        """Índices BM25 por bot para la búsqueda híbrida (se construyen al primer uso de cada bot)"""
+        if self._lexical_indexes is None:
+            with self._lock:
+                if self._lexical_indexes is None:
+                    from app.services.lexical_index import LexicalIndexManager
+                    self._lexical_indexes = LexicalIndexManager(
+                        lambda bot_id: self.vector_service_for_bot(bot_id).iter_bot_documents(bot_id)
+                    )
+        return self._lexical_indexes
+
+    @property
+    def dedup_indexes(self):
+        """Índices MinHash/LSH por bot para detectar chunks casi duplicados en la ingesta"""
+        if self._dedup_indexes is None:
+            with self._lock:
+                if self._dedup_indexes is None:
+                    from app.services.dedup_index import DedupIndexManager
+                    self._dedup_indexes = DedupIndexManager(
+                        lambda bot_id: self.vector_service_for_bot(bot_id).iter_bot_documents(bot_id),
+                        num_perm=settings.DEDUP_NUM_PERM,
+                        bands=settings.DEDUP_BANDS,
+                        threshold=settings.DEDUP_THRESHOLD
+                    )
+        return self._dedup_indexes
+
+    @property
+    def retrieval_cache(self):
+        """Cache de resultados de RetrieverService.search (None si RETRIEVAL_CACHE_SIZE = 0)"""
+        if self._retrieval_cache is None and settings.RETRIEVAL_CACHE_SIZE > 0:
+            with self._lock:
+                if self._retrieval_cache is None:
+                    from app.services.retrieval_cache import RetrievalCache
+                    self._retrieval_cache = RetrievalCache(
+                        max_entries=settings.RETRIEVAL_CACHE_SIZE,
+                        max_bytes=int(settings.RETRIEVAL_CACHE_MAX_MB * 1024 * 1024),
+                        ttl_s=settings.RETRIEVAL_CACHE_TTL_S
+                    )
+        return self._retrieval_cache
+
+    def bump_bot_version(self, *bot_ids: str):
+        """Marca cambios en los documentos de estos bots: sus resultados cacheados dejan de servirse"""
+        if self._retrieval_cache is not None:
+            self._retrieval_cache.bump(*bot_ids)
+
+    def bump_all_bot_versions(self):
+        """Como bump_bot_version, para todos los bots (cambios de otro nodo en una colección compartida)"""
+        if self._retrieval_cache is not None:
+            self._retrieval_cache.bump_all()
+
+    @property
+    def reranker(self):
+        """Cross-encoder compartido para el rerank (se carga al primer uso)"""
+        if self._reranker is None:
+            with self._lock:
+                if self._reranker is None:
+                    from app.services.rerank_service import CrossEncoderReranker
+                    self._reranker = CrossEncoderReranker(
+                        settings.RERANK_MODEL,
+                        batch_size=settings.RERANK_BATCH_SIZE,
+                        threads=settings.EMBEDDING_THREADS
+                    )
+        return self._reranker
+
+    @property
+    def mmr_stats(self):
+        """Contadores de la diversificación MMR (caracteres de prompt ahorrados)"""
+        if self._mmr_stats is None:
+            with self._lock:
+                if self._mmr_stats is None:
+                    from app.services.mmr import MMRStats
+                    self._mmr_stats = MMRStats()
+        return self._mmr_stats
+
+    @property
+    def adaptive_k_stats(self):
+        """Contadores del top-k adaptativo por variante del A/B (chunks y caracteres de prompt)"""
+        if self._adaptive_k_stats is None:
+            with self._lock:
+                if self._adaptive_k_stats is None:
+                    from app.services.adaptive_k import AdaptiveKStats
+                    self._adaptive_k_stats = AdaptiveKStats()
+        return self._adaptive_k_stats
+
+    # --- LLM --------------------------------------------------------------
+
+    @property
+    def llm_client(self):
+        """Cliente LLM compartido (Ollama u OpenAI según settings)"""
+        if self._llm_client is None:
+            with self._lock:
+                if self._llm_client is None:
+                    from app.llm_providers.factory import get_llm_client
+                    self._llm_client = get_llm_client()
+        return self._llm_client
+
+    # --- Ciclo de vida ----------------------------------------------------
+
+    def stats(self) -> dict:
+        """Contadores de los componentes ya creados (no fuerza la carga de ninguno)"""
+        return {
+            "models_loaded": sorted(self._embedding_services),
+            "query_embedding_cache": {m: c.stats() for m, c in self._query_embedding_caches.items()},
+            "embedding_scheduler": {m: s.stats() for m, s in self._embedding_schedulers.items()},
+            "document_embedding_cache": {
+                m: e.stats() for m, e in self._document_embedders.items() if hasattr(e, "stats")
+            },
+            "lexical_indexes": self._lexical_indexes.stats() if self._lexical_indexes is not None else {},
+            "dedup_indexes": self._dedup_indexes.stats() if self._dedup_indexes is not None else {},
+            "retrieval_cache": self._retrieval_cache.stats() if self._retrieval_cache is not None else None,
+            "jobs": self._jobs.stats() if self._jobs is not None else {},
+            "exact_indexes": {
+                vs.name: vs.exact_indexes.stats()
+                for vs in list(self._vector_services.values()) if vs.exact_indexes is not None
+            },
+            "reranker": self._reranker.stats() if self._reranker is not None else None,
+            "mmr": self._mmr_stats.stats() if self._mmr_stats is not None else None,
+            "adaptive_k": self._adaptive_k_stats.stats() if self._adaptive_k_stats is not None else None,
+            "pgvector_pool": self._pg_pool.stats() if self._pg_pool is not None else None
+        }
+
+    def _load_component(self, name: str, loader):
+        """Ejecuta el loader de un componente y registra su estado de readiness"""
+        status = self._status[name]
+        status.update(state="loading", error=None)
+        start = time.perf_counter()
+        try:
+            loader()
+        except Exception as e:
+            status.update(state="error", error=str(e))
+            print(f"❌ Error al cargar {name}: {e}")
+            return
+        status.update(state="ready", load_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def _warm_embedding_model(self):
+        for model_name in sorted(self.active_models()):
+            self.get_embedding_service(model_name).embed(["warmup"])
+            self.get_query_embedder(model_name)
+            self.get_document_embedder(model_name)
+            parallel = self._parallel_embedders.get(model_name)
+            if parallel is not None:
+                parallel.start()
+
+        from app.services.bot_service import BotService
+        if any(bot.rerank for bot in BotService().list_bots(active_only=True)):
+            self.reranker.score("warmup", ["warmup"])
+
+    def _warm_vector_store(self):
+        from app.services.bot_service import BotService
+        bot_ids = [bot.bot_id for bot in BotService().list_bots(active_only=True)]
+        for bot_id in bot_ids or ["default"]:
+            vector_service = self.vector_service_for_bot(bot_id)
+            # la primera consulta carga el índice HNSW (o el exacto de los bots pequeños) en memoria
+            if vector_service.count() > 0:
+                vector_service.query("warmup", n_results=1, bot_id=bot_id)
+
+    def _warm_llm_backend(self):
+        client = self.llm_client
+        if hasattr(client, "ping"):
+            client.ping()
+
+    def startup(self):
+        """Precarga los modelos de los bots activos, sus índices y el cliente LLM"""
+        self._load_component("embedding_model", self._warm_embedding_model)
+        self._load_component("vector_store", self._warm_vector_store)
+        self._load_component("llm_backend", self._warm_llm_backend)
+        if self.readiness(recheck=False)["ready"]:
+            print(f"✅ Recursos RAG cargados (modelos: {', '.join(sorted(self._embedding_services))}, "
+                  f"backend: {settings.EMBEDDING_BACKEND})")
+        else:
+            print("⚠️ Recursos RAG cargados con errores (ver /ready)")
+
+    def start_background_warmup(self) -> threading.Thread:
+        """
+        Lanza startup() en un hilo para que la app responda /health de inmediato.
+        Los requests que lleguen antes esperan al componente que necesiten (lock del registro).
+        """
+        self._warmup_thread = threading.Thread(target=self.startup, name="rag-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def readiness(self, recheck: bool = True) -> dict:
+        """
+        Estado de cada componente: pending, loading, ready o error.
+        Con recheck, vuelve a probar el LLM si falló (p. ej. Ollama arrancó después que la API).
+        """
+        if recheck and self._status["llm_backend"]["state"] == "error":
+            self._load_component("llm_backend", self._warm_llm_backend)
+
+        components = {name: dict(status) for name, status in self._status.items()}
+        return {
+            "ready": all(c["state"] == "ready" for c in components.values()),
+            "components": components
+        }
+
+    def shutdown(self):
+        """Libera los recursos y deja el registro listo para volver a arrancar"""
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            self._warmup_thread.join()
+        self._warmup_thread = None
+
+        # los trabajos en curso terminan su página antes de liberar el vector store
+        if self._jobs is not None:
+            self._jobs.shutdown()
+
+        with self._lock:
+            for scheduler in self._embedding_schedulers.values():
+                scheduler.stop()
+
+            for parallel in self._parallel_embedders.values():
+                parallel.stop()
+
+            if self._embedding_cache is not None:
+                self._embedding_cache.close()
+
+            if self._llm_client is not None and hasattr(self._llm_client, "close"):
+                try:
+                    self._llm_client.close()
+                except Exception as e:
+                    print(f"Error al cerrar cliente LLM: {e}")
+
+            if self._chroma_client is not None and hasattr(self._chroma_client, "clear_system_cache"):
+                try:
+                    self._chroma_client.clear_system_cache()
+                except Exception as e:
+                    print(f"Error al cerrar ChromaDB: {e}")
+
+            if self._document_registry is not None and hasattr(self._document_registry, "close"):
+                self._document_registry.close()
+
+            if self._pg_pool is not None:
+                try:
+                    self._pg_pool.close()
+                except Exception as e:
+                    print(f"Error al cerrar el pool de pgvector: {e}")
+
+            self._vector_services = {}
+            self._lexical_indexes = None
+            self._dedup_indexes = None
+            self._retrieval_cache = None
+            self._document_registry = None
+            self._jobs = None
+            self._reranker = None
+            self._mmr_stats = None
+            self._adaptive_k_stats = None
+            self._query_embedders = {}
+            self._embedding_schedulers = {}
+            self._query_embedding_caches = {}
+            self._document_embedders = {}
+            self._parallel_embedders = {}
+            self._embedding_services = {}
+            self._embedding_cache = None
+            self._chroma_client = None
+            self._pg_pool = None
+            self._llm_client = None
+            self._status = self._initial_status()
+
+        print("🛑 Recursos RAG liberados")
+
+
+registry = ServiceRegistry()
+
+
+def get_registry() -> ServiceRegistry:
+    """Dependency de FastAPI que entrega el registro del proceso"""
+    return registry
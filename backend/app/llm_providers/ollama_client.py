@@ -59,3 +59,12 @@ class OllamaClient:
             msg = obj.get("message", {}).get("content")
             if msg:
                 yield msg
+
+    def ping(self, timeout: float = 3.0):
+        """Verifica que el servidor de Ollama responda (usado por /ready)"""
+        resp = self.session.get(f"{self.base_url}/api/tags", timeout=timeout)
+        resp.raise_for_status()
+
+    def close(self):
+        """Cierra la sesión HTTP (se llama al apagar la app)"""
+        self.session.close()
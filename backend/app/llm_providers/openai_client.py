@@ -24,3 +24,7 @@ class OpenAIClient:
         for chunk in stream:
             if chunk.choices[0].delta.content is not None:
                 yield chunk.choices[0].delta.content
+
+    def close(self):
+        """Cierra el cliente HTTP subyacente (se llama al apagar la app)"""
+        self.client.close()
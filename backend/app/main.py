@@ -1,14 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.core.registry import registry
 from app.api import chat, documents, bots, analytics
 from app.api import auth_db as auth  # Usar PostgreSQL
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Carga el modelo de embeddings, ChromaDB y el cliente LLM una sola vez por proceso.
+    La precarga corre en segundo plano: /health responde de inmediato y /ready indica cuándo terminó.
+    """
+    registry.start_background_warmup()
+    app.state.registry = registry
+    yield
+    registry.shutdown()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version="1.0.0",
-    description="API del chatbot RAG multi-tenant con gestión de bots y analytics"
+    description="API del chatbot RAG multi-tenant con gestión de bots y analytics",
+    lifespan=lifespan
 )
 
 # Configurar límite de tamaño de archivo (50MB)
@@ -56,5 +74,16 @@ def health():
     return {
         "status": "healthy",
         "llm_provider": settings.LLM_PROVIDER,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "rag": registry.stats()
     }
+
+
+@app.get("/ready", tags=["Health"])
+def ready():
+    """
+    Readiness: estado de carga de cada componente (modelo de embeddings, vector store, LLM).
+    Devuelve 503 mientras alguno no esté listo.
+    """
+    status = registry.readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
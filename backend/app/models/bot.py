@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 
@@ -40,6 +40,69 @@ class BotConfig(BaseModel):
         le=20,
         description="Número máximo de fuentes a incluir en el contexto"
     )
+    retrieval_mode: Literal["vector", "hybrid"] = Field(
+        default="vector",
+        description="vector: solo embeddings. hybrid: embeddings + BM25 sobre un índice léxico del bot"
+    )
+    fusion_method: Literal["rrf", "weighted"] = Field(
+        default="rrf",
+        description="Fusión en modo hybrid: rrf (Reciprocal Rank Fusion) o weighted (scores ponderados)"
+    )
+    hybrid_vector_weight: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="Peso de la similitud vectorial en fusion_method=weighted (el resto es BM25)"
+    )
+    rerank: bool = Field(
+        default=False,
+        description="Reordenar los candidatos con un cross-encoder y quedarse con los max_sources mejores"
+    )
+    mmr: bool = Field(
+        default=False,
+        description="Elegir los max_sources chunks con MMR (descarta vecinos casi idénticos por el overlap)"
+    )
+    mmr_lambda: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        description="Balance de MMR: 1.0 = solo relevancia, 0.0 = solo diversidad"
+    )
+    adaptive_k: bool = Field(
+        default=False,
+        description="Cortar las fuentes en el codo de los scores o al llenar adaptive_char_budget"
+    )
+    adaptive_gap: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Caída mínima de score (0-1) entre dos chunks consecutivos para cortar ahí"
+    )
+    adaptive_char_budget: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Caracteres máximos de contexto en modo adaptativo (~4 por token). None = sin límite"
+    )
+    adaptive_min_sources: int = Field(
+        default=1,
+        ge=1,
+        le=20,
+        description="Fuentes que se conservan siempre en modo adaptativo"
+    )
+    adaptive_traffic: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="Fracción de preguntas con corte adaptativo (el resto es el grupo de control del A/B)"
+    )
+    embedding_model: Optional[str] = Field(
+        default=None,
+        description="Modelo de embeddings del bot (sentence-transformers). None = EMBEDDING_MODEL de settings"
+    )
+    organization_id: Optional[str] = Field(
+        default=None,
+        description="Organización dueña del bot (agrupa colecciones con CHROMA_COLLECTION_LAYOUT=organization)"
+    )
 
     active: bool = Field(default=True, description="Si el bot está activo o no")
     created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
@@ -60,6 +123,19 @@ class BotCreate(BaseModel):
     strict_mode: Optional[bool] = True
     fallback_response: Optional[str] = None
     max_sources: Optional[int] = 5
+    retrieval_mode: Optional[Literal["vector", "hybrid"]] = "vector"
+    fusion_method: Optional[Literal["rrf", "weighted"]] = "rrf"
+    hybrid_vector_weight: Optional[float] = 0.5
+    rerank: Optional[bool] = False
+    mmr: Optional[bool] = False
+    mmr_lambda: Optional[float] = 0.7
+    adaptive_k: Optional[bool] = False
+    adaptive_gap: Optional[float] = 0.1
+    adaptive_char_budget: Optional[int] = None
+    adaptive_min_sources: Optional[int] = 1
+    adaptive_traffic: Optional[float] = 1.0
+    embedding_model: Optional[str] = None
+    organization_id: Optional[str] = None
     metadata: Optional[dict] = None
 
 
@@ -75,6 +151,19 @@ class BotUpdate(BaseModel):
     strict_mode: Optional[bool] = None
     fallback_response: Optional[str] = None
     max_sources: Optional[int] = None
+    retrieval_mode: Optional[Literal["vector", "hybrid"]] = None
+    fusion_method: Optional[Literal["rrf", "weighted"]] = None
+    hybrid_vector_weight: Optional[float] = None
+    rerank: Optional[bool] = None
+    mmr: Optional[bool] = None
+    mmr_lambda: Optional[float] = None
+    adaptive_k: Optional[bool] = None
+    adaptive_gap: Optional[float] = None
+    adaptive_char_budget: Optional[int] = None
+    adaptive_min_sources: Optional[int] = None
+    adaptive_traffic: Optional[float] = None
+    embedding_model: Optional[str] = None
+    organization_id: Optional[str] = None
     active: Optional[bool] = None
     metadata: Optional[dict] = None
 
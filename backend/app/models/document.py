@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+
+
+class DocumentFilter(BaseModel):
+    """
+    Alcance de una búsqueda: solo los chunks de los documentos que cumplen todos los criterios.
+    Se traduce a un filtro `where` del vector store (ver app.services.vector_store), así
+    el índice descarta el resto antes del top-k en lugar de filtrar el resultado.
+    """
+    doc_ids: Optional[List[str]] = Field(default=None, min_length=1, description="Documentos por id")
+    filenames: Optional[List[str]] = Field(default=None, min_length=1, description="Nombres de archivo exactos")
+    file_types: Optional[List[str]] = Field(default=None, min_length=1, description="Tipos MIME (application/pdf, ...)")
+    uploaded_from: Optional[datetime] = Field(default=None, description="Subidos desde esta fecha (inclusive)")
+    uploaded_to: Optional[datetime] = Field(default=None, description="Subidos antes de esta fecha (exclusivo)")
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.uploaded_from and self.uploaded_to and self.uploaded_from >= self.uploaded_to:
+            raise ValueError("uploaded_from debe ser anterior a uploaded_to")
+        return self
+
+    def to_where(self) -> Optional[dict]:
+        """Filtro where equivalente (None si no restringe nada); las fechas van sobre uploaded_at_ts"""
+        where = {}
+        if self.doc_ids:
+            where["doc_id"] = {"$in": self.doc_ids}
+        if self.filenames:
+            where["filename"] = {"$in": self.filenames}
+        if self.file_types:
+            where["file_type"] = {"$in": self.file_types}
+        uploaded = {}
+        if self.uploaded_from:
+            uploaded["$gte"] = self.uploaded_from.timestamp()
+        if self.uploaded_to:
+            uploaded["$lt"] = self.uploaded_to.timestamp()
+        if uploaded:
+            where["uploaded_at_ts"] = uploaded
+        return where or None
@@ -0,0 +1,99 @@
+"""
+Top-k adaptativo: cuántos de los chunks recuperados van al prompt.
+
+retrieval_k y max_sources son fijos por bot, así que una pregunta sencilla, con uno o dos
+chunks claramente relevantes, paga igual el prompt completo. El corte se hace en el codo
+de los scores (la mayor caída entre dos chunks consecutivos, si supera el gap del bot) o
+cuando el texto acumulado llega al presupuesto de caracteres, lo que ocurra primero.
+Una fracción de las preguntas (adaptive_traffic) usa el corte y el resto es el grupo de
+control, así analytics compara fuentes, prompt y latencia de ambas variantes.
+"""
+import math
+import threading
+import zlib
+from typing import Optional
+
+ADAPTIVE = "adaptive"
+CONTROL = "control"
+
+
+def chunk_score(chunk: dict) -> Optional[float]:
+    """Score 0-1 de un chunk: rerank_score (logit del cross-encoder) con sigmoide, o la similitud"""
+    if "rerank_score" in chunk:
+        score = chunk["rerank_score"]
+        return None if score is None else 1.0 / (1.0 + math.exp(-score))
+    return chunk.get("similarity")
+
+
+def adaptive_cut(
+    scores: list[Optional[float]],
+    lengths: list[int],
+    gap: float,
+    char_budget: Optional[int] = None,
+    min_keep: int = 1
+) -> tuple[int, Optional[str]]:
+    """
+    Cuántos chunks conservar (en el orden dado) y el motivo del corte: "gap", "budget" o None.
+    Los chunks sin score (fuera del presupuesto del rerank) no cuentan para el codo.
+    """
+    n = len(scores)
+    keep, reason = n, None
+
+    scored = [s for s in scores if s is not None]
+    drops = [scored[i - 1] - scored[i] for i in range(max(1, min_keep), len(scored))]
+    if drops:
+        elbow = max(range(len(drops)), key=drops.__getitem__)
+        if drops[elbow] >= gap:
+            keep, reason = elbow + max(1, min_keep), "gap"
+
+    if char_budget:
+        total = 0
+        for i, length in enumerate(lengths[:keep]):
+            total += length
+            if total > char_budget and i >= min_keep:
+                keep, reason = i, "budget"
+                break
+    return max(min(keep, n), min(min_keep, n)), reason
+
+
+def variant_for(bot_id: str, query: str, traffic: float) -> str:
+    """Variante A/B de una pregunta: estable para la misma (bot, pregunta), adaptive en `traffic` de ellas"""
+    bucket = zlib.crc32(f"{bot_id}\x00{query}".encode("utf-8")) % 10000
+    return ADAPTIVE if bucket < traffic * 10000 else CONTROL
+
+
+class AdaptiveKStats:
+    """Contadores del corte adaptativo por variante: chunks y caracteres de prompt"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._variants: dict[str, dict] = {}
+
+    def record(self, variant: str, candidates: int, kept: int, chars_candidates: int, chars_kept: int,
+               reason: Optional[str] = None):
+        with self._lock:
+            counters = self._variants.setdefault(variant, {
+                "searches": 0, "candidates": 0, "kept": 0, "chars_candidates": 0, "chars_kept": 0,
+                "cut_gap": 0, "cut_budget": 0
+            })
+            counters["searches"] += 1
+            counters["candidates"] += candidates
+            counters["kept"] += kept
+            counters["chars_candidates"] += chars_candidates
+            counters["chars_kept"] += chars_kept
+            if reason:
+                counters[f"cut_{reason}"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                variant: {
+                    **counters,
+                    "avg_kept": round(counters["kept"] / counters["searches"], 2),
+                    "avg_chars_kept": round(counters["chars_kept"] / counters["searches"]),
+                    "chars_saved_pct": round(
+                        100 * (1 - counters["chars_kept"] / counters["chars_candidates"]), 1
+                    ) if counters["chars_candidates"] else 0
+                }
+                for variant, counters in self._variants.items()
+            }
@@ -63,10 +63,14 @@ class AnalyticsService:
         sources_count: int,
         response_time_ms: float,
         success: bool = True,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        retrieval_variant: Optional[str] = None,
+        context_chars: Optional[int] = None
     ):
         """
         Registra una interacción de chat.
+        retrieval_variant: grupo del A/B del top-k adaptativo ("adaptive" / "control"), si el bot lo usa.
+        context_chars: caracteres de contexto enviados al LLM.
         """
         data = self._load_data()
 
@@ -80,7 +84,9 @@ class AnalyticsService:
             "success": success,
             "error": error,
             "question_length": len(question),
-            "answer_length": len(answer)
+            "answer_length": len(answer),
+            "retrieval_variant": retrieval_variant,
+            "context_chars": context_chars
         }
 
         data["interactions"].append(interaction)
@@ -188,6 +194,46 @@ class AnalyticsService:
             "daily_breakdown": self._get_daily_breakdown(recent_interactions)
         }
 
+    def get_retrieval_ab_stats(self, bot_id: Optional[str] = None, days: int = 30) -> Dict:
+        """
+        Compara las variantes del A/B del top-k adaptativo: fuentes y caracteres de
+        contexto por respuesta, tiempo de respuesta y tasa de éxito.
+        """
+        data = self._load_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+
+        variants = defaultdict(list)
+        for interaction in data["interactions"]:
+            if not interaction.get("retrieval_variant"):
+                continue
+            if bot_id and interaction["bot_id"] != bot_id:
+                continue
+            if datetime.fromisoformat(interaction["timestamp"]) <= cutoff_date:
+                continue
+            variants[interaction["retrieval_variant"]].append(interaction)
+
+        def summary(interactions: List[dict]) -> Dict:
+            total = len(interactions)
+            times = sorted(i["response_time_ms"] for i in interactions)
+            return {
+                "interactions": total,
+                "success_rate": sum(1 for i in interactions if i["success"]) / total * 100,
+                "avg_sources_count": sum(i["sources_count"] for i in interactions) / total,
+                "avg_context_chars": sum(i.get("context_chars") or 0 for i in interactions) / total,
+                "avg_response_time_ms": sum(times) / total,
+                "p95_response_time_ms": times[min(total - 1, int(total * 0.95))]
+            }
+
+        result = {variant: summary(interactions) for variant, interactions in variants.items()}
+        adaptive, control = result.get("adaptive"), result.get("control")
+        if adaptive and control:
+            result["difference_pct"] = {
+                key: round((adaptive[key] - control[key]) / control[key] * 100, 1) if control[key] else None
+                for key in ("avg_sources_count", "avg_context_chars", "avg_response_time_ms")
+            }
+
+        return {"bot_id": bot_id, "period_days": days, "variants": result}
+
     def get_popular_questions(self, bot_id: Optional[str] = None, limit: int = 10) -> List[Dict]:
         """
         Obtiene las preguntas más frecuentes (agrupadas por similitud aproximada).
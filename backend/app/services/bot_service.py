@@ -7,6 +7,10 @@ from datetime import datetime
 BOTS_DB_FILE = "bots_config.json"
 
 
+class BotHasDocumentsError(ValueError):
+    """El cambio dejaría los documentos del bot en una colección que ya no consulta"""
+
+
 class BotService:
     """
     Servicio para gestionar configuraciones de bots.
@@ -58,6 +62,19 @@ class BotService:
             system_prompt=bot_data.system_prompt or PRESET_PROMPTS["rag_strict"],
             temperature=bot_data.temperature or 0.7,
             retrieval_k=bot_data.retrieval_k or 4,
+            retrieval_mode=bot_data.retrieval_mode or "vector",
+            fusion_method=bot_data.fusion_method or "rrf",
+            hybrid_vector_weight=0.5 if bot_data.hybrid_vector_weight is None else bot_data.hybrid_vector_weight,
+            rerank=bool(bot_data.rerank),
+            mmr=bool(bot_data.mmr),
+            mmr_lambda=0.7 if bot_data.mmr_lambda is None else bot_data.mmr_lambda,
+            adaptive_k=bool(bot_data.adaptive_k),
+            adaptive_gap=0.1 if bot_data.adaptive_gap is None else bot_data.adaptive_gap,
+            adaptive_char_budget=bot_data.adaptive_char_budget,
+            adaptive_min_sources=bot_data.adaptive_min_sources or 1,
+            adaptive_traffic=1.0 if bot_data.adaptive_traffic is None else bot_data.adaptive_traffic,
+            embedding_model=bot_data.embedding_model,
+            organization_id=bot_data.organization_id,
             metadata=bot_data.metadata or {}
         )
 
@@ -96,6 +113,7 @@ class BotService:
         # Actualizar solo los campos proporcionados
         current_bot = bots[bot_index]
         update_data = bot_data.model_dump(exclude_unset=True)
+        self._check_collection_change(bot_id, current_bot, update_data)
 
         for key, value in update_data.items():
             current_bot[key] = value
@@ -105,9 +123,38 @@ class BotService:
         bots[bot_index] = current_bot
         self._save_bots(bots)
 
+        # la configuración de retrieval (modo, rerank, max_sources...) cambia los resultados cacheados
+        from app.core.registry import registry
+        registry.bump_bot_version(bot_id)
+
         print(f"✅ Bot actualizado: {bot_id}")
         return BotConfig(**current_bot)
 
+    @staticmethod
+    def _check_collection_change(bot_id: str, current_bot: dict, update_data: dict):
+        """
+        Los chunks viven en la colección del modelo de embeddings del bot (y de su partición:
+        con CHROMA_COLLECTION_LAYOUT=organization, la de su organización). Si el cambio la
+        cambia y el bot ya tiene documentos, estos quedarían huérfanos. Hay que moverlos antes
+        a otro bot (POST /documents/bulk-move), cambiar la configuración y volver a moverlos:
+        el movimiento copia los vectores entre particiones o los re-embebe con el nuevo modelo.
+        """
+        from app.core.config import settings
+        from app.core.registry import registry, collection_name_for_model
+
+        old_model = current_bot.get('embedding_model') or settings.EMBEDDING_MODEL
+        updated = BotConfig(**{**current_bot, **update_data})
+        new_model = updated.embedding_model or settings.EMBEDDING_MODEL
+        current = registry.vector_service_for_bot(bot_id)
+        if collection_name_for_model(new_model, registry.partition_for_bot(bot_id, updated)) == current.name:
+            return
+        if current.get(where={"bot_id": bot_id}, limit=1, include=[])['ids']:
+            change = "el modelo de embeddings" if new_model != old_model else "la organización"
+            raise BotHasDocumentsError(
+                f"El bot {bot_id} tiene documentos indexados en la colección {current.name}: "
+                f"muévelos a otro bot antes de cambiar {change}"
+            )
+
     def delete_bot(self, bot_id: str) -> bool:
         """Elimina un bot (no se puede eliminar el bot 'default')"""
         if bot_id == "default":
@@ -119,6 +166,8 @@ class BotService:
 
         if len(bots) < original_len:
             self._save_bots(bots)
+            from app.core.registry import registry
+            registry.bump_bot_version(bot_id)
             print(f"🗑️ Bot eliminado: {bot_id}")
             return True
 
@@ -1,8 +1,10 @@
 import time
+from typing import Optional
+from app.models.document import DocumentFilter
 from app.services.retriever_service import RetrieverService
 from app.services.bot_service import BotService
 from app.services.analytics_service import AnalyticsService
-from app.llm_providers.factory import get_llm_client
+from app.core.registry import registry
 
 class ChatService:
     def __init__(self, llm_client, retriever: RetrieverService, bot_service: BotService, analytics_service: AnalyticsService):
@@ -11,9 +13,10 @@ class ChatService:
         self.bot_service = bot_service
         self.analytics = analytics_service
 
-    def answer(self, user_question: str, bot_id: str):
+    def answer(self, user_question: str, bot_id: str, filters: Optional[DocumentFilter] = None):
         start_time = time.time()
         success = True
+        retrieval_variant = None
         error_msg = None
         answer = ""
         context_chunks = []
@@ -32,7 +35,8 @@ class ChatService:
 
             # 2. Buscar contexto relevante usando retrieval_k del bot
             k = bot_config.retrieval_k if hasattr(bot_config, 'retrieval_k') else 5
-            context_chunks = self.retriever.search(user_question, bot_id, k=k)
+            context_chunks = self.retriever.search(user_question, bot_id, k=k, bot_config=bot_config, filters=filters)
+            retrieval_variant = self.retriever.variant(user_question, bot_id, bot_config)
             context_text = "\n".join(c["text"] for c in context_chunks)
 
             # 3. Construir mensajes usando el prompt del bot
@@ -76,18 +80,22 @@ class ChatService:
                 sources_count=len(context_chunks),
                 response_time_ms=response_time_ms,
                 success=success,
-                error=error_msg
+                error=error_msg,
+                retrieval_variant=retrieval_variant,
+                context_chars=sum(len(c["text"]) for c in context_chunks)
             )
 
-    def answer_stream(self, user_question: str, bot_id: str):
+    def answer_stream(self, user_question: str, bot_id: str, filters: Optional[DocumentFilter] = None):
         """
         Generador que yields chunks de respuesta en tiempo real.
         Primero yields las fuentes, luego los chunks de texto del LLM.
         """
         start_time = time.time()
         success = True
+        retrieval_variant = None
         error_msg = None
         full_answer = []
+        context_chunks = []
 
         try:
             # 1. Obtener configuración del bot
@@ -102,7 +110,8 @@ class ChatService:
 
             # 2. Buscar contexto relevante usando retrieval_k del bot
             k = bot_config.retrieval_k if hasattr(bot_config, 'retrieval_k') else 5
-            context_chunks = self.retriever.search(user_question, bot_id, k=k)
+            context_chunks = self.retriever.search(user_question, bot_id, k=k, bot_config=bot_config, filters=filters)
+            retrieval_variant = self.retriever.variant(user_question, bot_id, bot_config)
             context_text = "\n".join(c["text"] for c in context_chunks)
 
             # 3. Enviar metadata inicial (fuentes y configuración del bot)
@@ -160,15 +169,17 @@ class ChatService:
                 bot_id=bot_id,
                 question=user_question,
                 answer=answer,
-                sources_count=len(context_chunks) if 'context_chunks' in locals() else 0,
+                sources_count=len(context_chunks),
                 response_time_ms=response_time_ms,
                 success=success,
-                error=error_msg
+                error=error_msg,
+                retrieval_variant=retrieval_variant,
+                context_chars=sum(len(c["text"]) for c in context_chunks)
             )
 
 # factory
 def get_chat_service():
-    llm_client = get_llm_client()
+    llm_client = registry.llm_client
     retriever = RetrieverService()
     bot_service = BotService()
     analytics_service = AnalyticsService()
@@ -3,11 +3,12 @@ Servicio de chat mejorado con RAG preciso y configuración avanzada.
 Incluye strict_mode, threshold filtering y fallback responses.
 """
 import time
-from typing import Dict, Any, Generator
+from typing import Dict, Any, Generator, Optional
+from app.models.document import DocumentFilter
 from app.services.retriever_service import RetrieverService
 from app.services.bot_service import BotService
 from app.services.analytics_service import AnalyticsService
-from app.llm_providers.factory import get_llm_client
+from app.core.registry import registry
 
 
 class ChatServiceEnhanced:
@@ -27,7 +28,7 @@ class ChatServiceEnhanced:
         self.bot_service = bot_service
         self.analytics = analytics_service
 
-    def answer(self, user_question: str, bot_id: str) -> Dict[str, Any]:
+    def answer(self, user_question: str, bot_id: str, filters: Optional[DocumentFilter] = None) -> Dict[str, Any]:
         """
         Responde una pregunta usando RAG preciso.
 
@@ -36,6 +37,7 @@ class ChatServiceEnhanced:
         """
         start_time = time.time()
         success = True
+        retrieval_variant = None
         error_msg = None
         answer = ""
         context_chunks = []
@@ -56,8 +58,11 @@ class ChatServiceEnhanced:
                 query=user_question,
                 bot_id=bot_id,
                 k=retrieval_k,
-                threshold=threshold
+                threshold=threshold,
+                bot_config=bot_config,
+                filters=filters
             )
+            retrieval_variant = self.retriever.variant(user_question, bot_id, bot_config)
 
             # Limitar número de fuentes
             context_chunks = context_chunks[:max_sources]
@@ -153,10 +158,14 @@ Responde usando principalmente la documentación, pero puedes complementar con c
                 sources_count=len(context_chunks),
                 response_time_ms=response_time_ms,
                 success=success,
-                error=error_msg
+                error=error_msg,
+                retrieval_variant=retrieval_variant,
+                context_chars=sum(len(c["text"]) for c in context_chunks)
             )
 
-    def answer_stream(self, user_question: str, bot_id: str) -> Generator[str, None, None]:
+    def answer_stream(
+        self, user_question: str, bot_id: str, filters: Optional[DocumentFilter] = None
+    ) -> Generator[str, None, None]:
         """
         Generador que yields chunks de respuesta en tiempo real con RAG preciso.
 
@@ -165,6 +174,7 @@ Responde usando principalmente la documentación, pero puedes complementar con c
         """
         start_time = time.time()
         success = True
+        retrieval_variant = None
         error_msg = None
         full_answer = []
         context_chunks = []
@@ -187,8 +197,11 @@ Responde usando principalmente la documentación, pero puedes complementar con c
                 query=user_question,
                 bot_id=bot_id,
                 k=retrieval_k,
-                threshold=threshold
+                threshold=threshold,
+                bot_config=bot_config,
+                filters=filters
             )
+            retrieval_variant = self.retriever.variant(user_question, bot_id, bot_config)
 
             # Limitar número de fuentes
             context_chunks = context_chunks[:max_sources]
@@ -299,14 +312,16 @@ Responde usando principalmente la documentación, pero puedes complementar con c
                 sources_count=len(context_chunks),
                 response_time_ms=response_time_ms,
                 success=success,
-                error=error_msg
+                error=error_msg,
+                retrieval_variant=retrieval_variant,
+                context_chars=sum(len(c["text"]) for c in context_chunks)
             )
 
 
 # Factory
 def get_chat_service_enhanced():
     """Crea instancia del servicio de chat mejorado"""
-    llm_client = get_llm_client()
+    llm_client = registry.llm_client
     retriever = RetrieverService()
     bot_service = BotService()
     analytics_service = AnalyticsService()
@@ -0,0 +1,228 @@
+"""
+Detección de chunks casi duplicados en la ingesta (MinHash + LSH), un índice por bot.
+
+Los tenants suben varias versiones del mismo manual: sin este paso cada versión agrega
+miles de chunks casi idénticos que inflan el índice y ocupan el top-k. Cada chunk se
+resume en una firma MinHash de sus shingles de palabras (la fracción de posiciones
+iguales entre dos firmas estima la similitud de Jaccard) y las firmas se reparten en
+bandas: dos chunks solo se comparan si coinciden en al menos una banda completa.
+"""
+import threading
+import zlib
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from app.services.lexical_index import tokenize
+
+# primo de Mersenne 2^61 - 1: a * h + b cabe en uint64 con h y a de 32/31 bits
+_PRIME = np.uint64((1 << 61) - 1)
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+class MinHasher:
+    """Firmas MinHash de num_perm valores (uint32) sobre shingles de shingle_size palabras"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Hashes (crc32) de los n-gramas de palabras normalizadas del texto"""
+        tokens = tokenize(text)
+        n = self.shingle_size
+        grams = [" ".join(tokens[i:i + n]) for i in range(max(1, len(tokens) - n + 1))] if tokens else []
+        return np.fromiter({zlib.crc32(gram.encode("utf-8")) for gram in grams}, dtype=np.uint64)
+
+    def signatures(self, texts: list[str]) -> np.ndarray:
+        """
+        Firmas de varios textos (n x num_perm). Todos los shingles se permutan en un solo
+        producto y el mínimo por texto sale de un reduceat; un texto sin palabras queda en 0.
+        """
+        shingles = [self.shingles(text) for text in texts]
+        signatures = np.zeros((len(texts), self.num_perm), dtype=np.uint32)
+        present = [i for i, values in enumerate(shingles) if len(values)]
+        if not present:
+            return signatures
+
+        values = np.concatenate([shingles[i] for i in present])
+        hashed = (values[:, None] * self._a + self._b) % _PRIME & _MASK
+        starts = np.cumsum([0] + [len(shingles[i]) for i in present[:-1]])
+        signatures[present] = np.minimum.reduceat(hashed, starts, axis=0).astype(np.uint32)
+        return signatures
+
+
+class NearDuplicateIndex:
+    """
+    Índice LSH de las firmas de los chunks de un bot: bands bandas de num_perm / bands filas.
+    Con 128 permutaciones y 32 bandas, un par con Jaccard 0.8 comparte alguna banda
+    con probabilidad ~1, y uno con 0.3 casi nunca.
+    """
+
+    def __init__(self, hasher: MinHasher, bands: int = 32, threshold: float = 0.85):
+        if hasher.num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.hasher = hasher
+        self.bands = bands
+        self.rows = hasher.num_perm // bands
+        self.threshold = threshold
+        self._buckets: list[dict[bytes, set[str]]] = [{} for _ in range(bands)]
+        self._signatures: dict[str, np.ndarray] = {}
+        self._doc_chunks: dict[str, list[str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _add(self, doc_id: str, chunk_id: str, signature: np.ndarray):
+        if chunk_id in self._signatures:
+            return
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, set()).add(chunk_id)
+        self._signatures[chunk_id] = signature
+        self._doc_chunks.setdefault(doc_id, []).append(chunk_id)
+
+    def _find(self, signature: np.ndarray) -> Optional[tuple[str, float]]:
+        """Chunk más parecido con similitud estimada >= threshold, o None"""
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates |= self._buckets[band].get(key, set())
+        if not candidates:
+            return None
+        candidates = list(candidates)
+        similarities = (np.stack([self._signatures[c] for c in candidates]) == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return candidates[best], float(similarities[best])
+
+    def add_document(self, doc_id: str, chunk_ids: list[str], texts: list[str]):
+        signatures = self.hasher.signatures(texts)
+        with self._lock:
+            for chunk_id, signature in zip(chunk_ids, signatures):
+                if signature.any():
+                    self._add(doc_id, chunk_id, signature)
+
+    def check_document(
+        self, doc_id: str, chunk_ids: list[str], texts: list[str]
+    ) -> list[Optional[tuple[str, float]]]:
+        """
+        Por chunk: (chunk_id del original, similitud) si es casi duplicado de un chunk
+        ya indexado o de uno anterior del mismo documento; None si es nuevo.
+        Los nuevos quedan indexados de inmediato (dos subidas simultáneas del mismo
+        manual se detectan entre sí); si la escritura falla, llamar a remove_document.
+        """
+        signatures = self.hasher.signatures(texts)
+        duplicates: list[Optional[tuple[str, float]]] = []
+        with self._lock:
+            for chunk_id, signature in zip(chunk_ids, signatures):
+                match = self._find(signature) if signature.any() else None
+                if match is None and signature.any():
+                    self._add(doc_id, chunk_id, signature)
+                duplicates.append(match)
+        return duplicates
+
+    def _discard(self, chunk_id: str):
+        signature = self._signatures.pop(chunk_id, None)
+        if signature is None:
+            return
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(chunk_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def remove_document(self, doc_id: str) -> bool:
+        with self._lock:
+            chunk_ids = self._doc_chunks.pop(doc_id, None)
+            if not chunk_ids:
+                return False
+            for chunk_id in chunk_ids:
+                self._discard(chunk_id)
+            return True
+
+    def remove_chunks(self, chunk_ids: Iterable[str]):
+        """Quita chunks sueltos (p. ej. duplicados que se vuelven a comparar al perder su original)"""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._discard(chunk_id)
+                doc_id = chunk_id.rsplit("_", 1)[0]
+                remaining = [c for c in self._doc_chunks.get(doc_id, []) if c != chunk_id]
+                if remaining:
+                    self._doc_chunks[doc_id] = remaining
+                else:
+                    self._doc_chunks.pop(doc_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._doc_chunks),
+            "chunks": len(self._signatures),
+            "buckets": sum(len(buckets) for buckets in self._buckets),
+            "signature_bytes": len(self._signatures) * self.hasher.num_perm * 4
+        }
+
+
+class DedupIndexManager:
+    """
+    Un NearDuplicateIndex por bot, construido perezosamente con `loader(bot_id)`
+    ((doc_id, chunk_ids, textos) desde el vector store) en la primera subida del bot,
+    y mantenido al día en subidas, borrados y movimientos (como LexicalIndexManager).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Iterable[tuple[str, list[str], list[str]]]],
+        num_perm: int = 128,
+        bands: int = 32,
+        threshold: float = 0.85
+    ):
+        self.loader = loader
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.threshold = threshold
+        self._indexes: dict[str, NearDuplicateIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, bot_id: str) -> NearDuplicateIndex:
+        index = self._indexes.get(bot_id)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(bot_id)
+                if index is None:
+                    index = NearDuplicateIndex(self.hasher, bands=self.bands, threshold=self.threshold)
+                    for doc_id, chunk_ids, texts in self.loader(bot_id):
+                        index.add_document(doc_id, chunk_ids, texts)
+                    self._indexes[bot_id] = index
+                    print(f"🧬 Índice de duplicados del bot {bot_id}: {len(index)} chunks")
+        return index
+
+    def loaded(self, bot_id: str) -> Optional[NearDuplicateIndex]:
+        return self._indexes.get(bot_id)
+
+    def add_document(self, bot_id: str, doc_id: str, chunk_ids: list[str], texts: list[str]):
+        """Solo actualiza índices ya construidos: los demás leerán el documento al construirse"""
+        index = self._indexes.get(bot_id)
+        if index is not None:
+            index.add_document(doc_id, chunk_ids, texts)
+
+    def remove_document(self, doc_id: str):
+        for index in list(self._indexes.values()):
+            index.remove_document(doc_id)
+
+    def drop(self, bot_id: str):
+        with self._lock:
+            self._indexes.pop(bot_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes = {}
+
+    def stats(self) -> dict:
+        return {bot_id: index.stats() for bot_id, index in self._indexes.items()}
@@ -0,0 +1,257 @@
+"""
+Registro de documentos: una fila por documento (doc_id, bot_id, filename, file_type,
+uploaded_at, cantidad de chunks) por colección.
+
+Listar documentos es una consulta indexada y paginada sobre este registro, en lugar de
+leer la metadata de todos los chunks del vector store. Cada escritura de chunks lo
+actualiza (en pgvector, dentro de la misma transacción; ver app.services.pgvector_store).
+Las colecciones anteriores al registro se indexan una vez, en el primer listado.
+
+También guarda los chunks casi duplicados que la ingesta no escribió en el vector store
+(DEDUP_MODE=skip, ver app.services.dedup_index): su texto, su metadata y el chunk original
+que los cubre, para restaurarlos si el original se borra o se mueve.
+"""
+import json
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+DOCUMENT_COLUMNS = ("doc_id", "bot_id", "filename", "file_type", "uploaded_at", "chunks")
+LINK_COLUMNS = ("chunk_id", "doc_id", "bot_id", "duplicate_of", "duplicate_doc_id", "similarity", "text", "metadata")
+
+# SQLite limita la cantidad de parámetros por consulta
+_PAGE = 500
+
+
+def summarize_documents(metadatas: Iterable[dict], documents: Optional[dict] = None) -> dict[str, dict]:
+    """Agrega la metadata de chunks en una fila por doc_id (acumula sobre `documents` si se pasa)"""
+    documents = {} if documents is None else documents
+    for metadata in metadatas or []:
+        doc_id = (metadata or {}).get("doc_id")
+        if not doc_id:
+            continue
+        document = documents.get(doc_id)
+        if document is None:
+            documents[doc_id] = {
+                "doc_id": doc_id,
+                "bot_id": metadata.get("bot_id"),
+                "filename": metadata.get("filename"),
+                "file_type": metadata.get("file_type"),
+                "uploaded_at": metadata.get("uploaded_at"),
+                "chunks": 1
+            }
+        else:
+            document["chunks"] += 1
+    return documents
+
+
+class DocumentRegistry:
+    """
+    Registro en SQLite para el backend ChromaDB (local, como el índice).
+    Índices por bot + fecha, tipo de archivo y fecha para los filtros del listado.
+    """
+
+    def __init__(self, path: str = "document_registry.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                bot_id TEXT,
+                filename TEXT,
+                file_type TEXT,
+                uploaded_at TEXT,
+                chunks INTEGER NOT NULL,
+                PRIMARY KEY (collection, doc_id)
+            );
+            CREATE INDEX IF NOT EXISTS documents_bot ON documents (bot_id, uploaded_at);
+            CREATE INDEX IF NOT EXISTS documents_type ON documents (file_type, uploaded_at);
+            CREATE INDEX IF NOT EXISTS documents_uploaded ON documents (uploaded_at);
+            CREATE TABLE IF NOT EXISTS synced_collections (name TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS chunk_links (
+                collection TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                bot_id TEXT,
+                duplicate_of TEXT NOT NULL,
+                duplicate_doc_id TEXT NOT NULL,
+                similarity REAL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                PRIMARY KEY (collection, chunk_id)
+            );
+            CREATE INDEX IF NOT EXISTS chunk_links_doc ON chunk_links (collection, doc_id);
+            CREATE INDEX IF NOT EXISTS chunk_links_original ON chunk_links (collection, duplicate_doc_id);
+            """
+        )
+        self._conn.commit()
+
+    def _insert(self, collection: str, documents: Iterable[dict]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO documents (collection, doc_id, bot_id, filename, file_type, uploaded_at, chunks) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(collection, *(document.get(column) for column in DOCUMENT_COLUMNS)) for document in documents]
+        )
+
+    def replace(self, collection: str, doc_ids: Iterable[str], documents: dict[str, dict]):
+        """Reemplaza las filas de doc_ids por `documents` (los que ya no tienen chunks desaparecen)"""
+        doc_ids = list(doc_ids)
+        with self._lock:
+            for start in range(0, len(doc_ids), _PAGE):
+                page = doc_ids[start:start + _PAGE]
+                self._conn.execute(
+                    f"DELETE FROM documents WHERE collection = ? AND doc_id IN ({','.join('?' * len(page))})",
+                    [collection, *page]
+                )
+            self._insert(collection, documents.values())
+            self._conn.commit()
+
+    def delete(self, collection: str, bot_id: Optional[str] = None):
+        """Borra las filas de una colección completa o de un bot dentro de ella"""
+        with self._lock:
+            if bot_id is None:
+                self._conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+                self._conn.execute("DELETE FROM synced_collections WHERE name = ?", (collection,))
+                self._conn.execute("DELETE FROM chunk_links WHERE collection = ?", (collection,))
+            else:
+                self._conn.execute("DELETE FROM documents WHERE collection = ? AND bot_id = ?", (collection, bot_id))
+            self._conn.commit()
+
+    def is_synced(self, collection: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM synced_collections WHERE name = ?", (collection,)).fetchone()
+        return row is not None
+
+    def rebuild(self, collection: str, documents: dict[str, dict]):
+        """Reemplaza todas las filas de una colección y la marca como indexada"""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+            self._insert(collection, documents.values())
+            self._conn.execute("INSERT OR IGNORE INTO synced_collections (name) VALUES (?)", (collection,))
+            self._conn.commit()
+
+    def list_documents(
+        self,
+        collections: list[str],
+        bot_id: Optional[str] = None,
+        file_type: Optional[str] = None,
+        uploaded_from: Optional[str] = None,
+        uploaded_to: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> dict:
+        """
+        Documentos de las colecciones indicadas, del más reciente al más antiguo.
+        uploaded_from (inclusive) y uploaded_to (exclusivo) son fechas ISO.
+        Devuelve {"total": coincidencias, "documents": página}.
+        """
+        if not collections:
+            return {"total": 0, "documents": []}
+        clauses = [f"collection IN ({','.join('?' * len(collections))})"]
+        params: list = list(collections)
+        for clause, value in (
+            ("bot_id = ?", bot_id),
+            ("file_type = ?", file_type),
+            ("uploaded_at >= ?", uploaded_from),
+            ("uploaded_at < ?", uploaded_to),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = " AND ".join(clauses)
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM documents WHERE {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {', '.join(DOCUMENT_COLUMNS)} FROM documents WHERE {where} "
+                "ORDER BY uploaded_at DESC, doc_id LIMIT ? OFFSET ?",
+                [*params, -1 if limit is None else limit, offset]
+            ).fetchall()
+        return {"total": total, "documents": [dict(zip(DOCUMENT_COLUMNS, row)) for row in rows]}
+
+    def locate(self, collections: list[str], doc_ids: Optional[list[str]] = None,
+               bot_id: Optional[str] = None) -> list[dict]:
+        """Filas (con su colección) de estos doc_ids o de todos los documentos de un bot"""
+        if not collections:
+            return []
+        columns = f"collection, {', '.join(DOCUMENT_COLUMNS)}"
+        base = f"SELECT {columns} FROM documents WHERE collection IN ({','.join('?' * len(collections))})"
+        rows = []
+        with self._lock:
+            if doc_ids is None:
+                rows = self._conn.execute(f"{base} AND bot_id = ? ORDER BY doc_id", [*collections, bot_id]).fetchall()
+            else:
+                for start in range(0, len(doc_ids), _PAGE):
+                    page = doc_ids[start:start + _PAGE]
+                    rows.extend(self._conn.execute(
+                        f"{base} AND doc_id IN ({','.join('?' * len(page))})", [*collections, *page]
+                    ).fetchall())
+        return [dict(zip(("collection", *DOCUMENT_COLUMNS), row)) for row in rows]
+
+    # --- Chunks duplicados no escritos ----------------------------------------
+
+    def add_links(self, collection: str, links: list[dict]):
+        """Guarda chunks omitidos por duplicados (dicts con LINK_COLUMNS; metadata como dict)"""
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO chunk_links (collection, {', '.join(LINK_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(LINK_COLUMNS) + 1))})",
+                [
+                    (collection, *(json.dumps(link[c]) if c == "metadata" else link[c] for c in LINK_COLUMNS))
+                    for link in links
+                ]
+            )
+            self._conn.commit()
+
+    def links_for(self, collection: str, doc_ids: list[str]) -> list[dict]:
+        """Chunks omitidos que pertenecen a estos documentos o que apuntan a uno de sus chunks"""
+        rows = []
+        with self._lock:
+            for start in range(0, len(doc_ids), _PAGE):
+                page = doc_ids[start:start + _PAGE]
+                marks = ",".join("?" * len(page))
+                rows.extend(self._conn.execute(
+                    f"SELECT {', '.join(LINK_COLUMNS)} FROM chunk_links WHERE collection = ? "
+                    f"AND (doc_id IN ({marks}) OR duplicate_doc_id IN ({marks}))",
+                    [collection, *page, *page]
+                ).fetchall())
+        links = {}
+        for row in rows:
+            link = dict(zip(LINK_COLUMNS, row))
+            link["metadata"] = json.loads(link["metadata"])
+            links[link["chunk_id"]] = link
+        return list(links.values())
+
+    def delete_links(self, collection: str, chunk_ids: Optional[list[str]] = None, bot_id: Optional[str] = None):
+        """Borra chunks omitidos por id, o todos los de un bot"""
+        with self._lock:
+            if chunk_ids is None:
+                self._conn.execute("DELETE FROM chunk_links WHERE collection = ? AND bot_id = ?", (collection, bot_id))
+            for start in range(0, len(chunk_ids or []), _PAGE):
+                page = chunk_ids[start:start + _PAGE]
+                self._conn.execute(
+                    f"DELETE FROM chunk_links WHERE collection = ? AND chunk_id IN ({','.join('?' * len(page))})",
+                    [collection, *page]
+                )
+            self._conn.commit()
+
+    def link_stats(self, collections: list[str]) -> dict:
+        """Chunks omitidos por duplicados y caracteres que no se indexaron"""
+        if not collections:
+            return {"chunks": 0, "chars": 0}
+        with self._lock:
+            chunks, chars = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM chunk_links "
+                f"WHERE collection IN ({','.join('?' * len(collections))})",
+                list(collections)
+            ).fetchone()
+        return {"chunks": chunks, "chars": chars}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
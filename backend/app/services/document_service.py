@@ -4,11 +4,9 @@ from typing import List
 from datetime import datetime
 
 from fastapi import UploadFile
-from pypdf import PdfReader
-from docx import Document
+from fastapi.concurrency import run_in_threadpool
 
-from app.services.embedding_service import EmbeddingService
-from app.services.vector_service import VectorService
+from app.services.vector_store import VectorStore
 from app.services.analytics_service import AnalyticsService
 
 UPLOAD_DIR = "uploads"
@@ -20,16 +18,29 @@ class DocumentService:
     1. guardar el archivo
     2. extraer texto (PDF, DOCX, TXT)
     3. trocear con overlap inteligente
-    4. vectorizar
-    5. guardar en Chroma con aislamiento por bot_id
+    4. descartar chunks casi duplicados de lo ya indexado en el bot (DEDUP_MODE)
+    5. vectorizar
+    6. guardar en el vector store con aislamiento por bot_id
     """
 
-    def __init__(self):
+    def __init__(self, vector_service: VectorStore | None = None):
         os.makedirs(UPLOAD_DIR, exist_ok=True)
-        self.embedding_service = EmbeddingService()
-        self.vector_service = VectorService()
+        # Sin vector_service fijo, cada bot usa la colección de su modelo de embeddings
+        self._vector_service = vector_service
         self.analytics = AnalyticsService()
 
+    def vector_service_for(self, bot_id: str) -> VectorStore:
+        if self._vector_service is not None:
+            return self._vector_service
+        from app.core.registry import registry
+        return registry.vector_service_for_bot(bot_id)
+
+    def _all_vector_services(self) -> List[VectorStore]:
+        if self._vector_service is not None:
+            return [self._vector_service]
+        from app.core.registry import registry
+        return registry.document_vector_services()
+
     async def process_upload(self, file: UploadFile, bot_id: str = "default"):
         # 1. guardar archivo físico
         saved_path = await self._save_file(file)
@@ -48,21 +59,33 @@ class DocumentService:
         # Chunks más pequeños (500) para mejor precisión semántica
         chunks = self._chunk_text(text, chunk_size=500, overlap=100)
 
-        # 4. generar embeddings y guardar en vector db
+        # 4-5. deduplicar, generar embeddings y guardar en vector db
         doc_id = str(uuid.uuid4())
+        uploaded_at = datetime.now()
 
-        self.vector_service.add_document_chunks(
-            doc_id=doc_id,
-            chunks=chunks,
-            metadata={
+        # fuera del event loop: con EMBEDDING_WORKERS > 0 se reparte en el pool de procesos
+        dedup = await run_in_threadpool(
+            self._store_chunks,
+            self.vector_service_for(bot_id),
+            bot_id,
+            doc_id,
+            chunks,
+            {
                 "filename": file.filename,
                 "bot_id": bot_id,
-                "uploaded_at": datetime.now().isoformat(),
+                "uploaded_at": uploaded_at.isoformat(),
+                # epoch numérico: los filtros de rango (DocumentFilter) no comparan texto
+                "uploaded_at_ts": uploaded_at.timestamp(),
                 "file_type": file.content_type
             }
         )
 
-        print(f"✅ Documento indexado: {file.filename} ({len(chunks)} fragmentos)")
+        from app.core.registry import registry
+        registry.bump_bot_version(bot_id)
+
+        print(f"✅ Documento indexado: {file.filename} ({dedup['stored']} fragmentos)")
+        if dedup["duplicates"]:
+            print(f"🧬 {dedup['duplicates']}/{dedup['chunks']} fragmentos casi duplicados ({dedup['mode']})")
 
         # Registrar en analytics
         self.analytics.log_document_upload(
@@ -75,9 +98,223 @@ class DocumentService:
             "id": doc_id,
             "filename": file.filename,
             "path": saved_path,
-            "chunks": len(chunks)
+            "chunks": len(chunks),
+            "dedup": dedup
         }
 
+    def _store_chunks(
+        self,
+        vector_service: VectorStore,
+        bot_id: str,
+        doc_id: str,
+        chunks: List[str],
+        metadata: dict
+    ) -> dict:
+        """
+        Compara los chunks de un documento nuevo con el índice de duplicados del bot
+        (y entre sí) y los escribe según DEDUP_MODE. Devuelve las estadísticas de la subida.
+        """
+        from app.core.config import settings
+        from app.core.registry import registry
+
+        mode = settings.DEDUP_MODE
+        # el índice de duplicados en memoria no conoce lo que escribieron otros procesos
+        vector_service.sync()
+        chunk_ids = [f"{doc_id}_{i}" for i in range(len(chunks))]
+        matches = [None] * len(chunks)
+        index = None
+        if mode in ("skip", "link") and chunks:
+            index = registry.dedup_indexes.get(bot_id)
+            matches = index.check_document(doc_id, chunk_ids, chunks)
+            if mode == "skip" and all(matches):
+                # el documento conserva al menos un chunk: así sigue listado y se puede mover o borrar
+                matches[0] = None
+                index.add_document(doc_id, chunk_ids[:1], chunks[:1])
+
+        duplicates = [i for i, match in enumerate(matches) if match is not None]
+        positions = [i for i, match in enumerate(matches) if match is None] if mode == "skip" else list(range(len(chunks)))
+        chunk_metadatas = None
+        if mode == "link" and duplicates:
+            chunk_metadatas = [{"duplicate_of": match[0]} if match else {} for match in matches]
+
+        try:
+            vector_service.add_document_chunks(
+                doc_id=doc_id,
+                chunks=[chunks[i] for i in positions],
+                metadata=metadata,
+                positions=positions,
+                chunk_metadatas=chunk_metadatas
+            )
+        except Exception:
+            if index is not None:
+                index.remove_document(doc_id)
+            raise
+
+        if mode == "skip" and duplicates:
+            vector_service.documents.add_links(vector_service.name, [
+                {
+                    "chunk_id": chunk_ids[i],
+                    "doc_id": doc_id,
+                    "bot_id": bot_id,
+                    "duplicate_of": matches[i][0],
+                    "duplicate_doc_id": matches[i][0].rsplit("_", 1)[0],
+                    "similarity": round(matches[i][1], 3),
+                    "text": chunks[i],
+                    "metadata": {"doc_id": doc_id, **metadata}
+                }
+                for i in duplicates
+            ])
+
+        # índice léxico del bot (búsqueda híbrida), si ya está construido
+        registry.lexical_indexes.add_document(
+            bot_id, doc_id, [chunk_ids[i] for i in positions], [chunks[i] for i in positions]
+        )
+
+        originals = {matches[i][0].rsplit("_", 1)[0] for i in duplicates}
+        return {
+            "mode": mode,
+            "chunks": len(chunks),
+            "stored": len(positions),
+            "duplicates": len(duplicates),
+            "duplicates_within_document": sum(1 for i in duplicates if matches[i][0].rsplit("_", 1)[0] == doc_id),
+            "duplicate_chars": sum(len(chunks[i]) for i in duplicates),
+            "duplicate_of_documents": sorted(originals - {doc_id})[:20]
+        }
+
+    def _restore_linked_chunks(self, vector_service: VectorStore, doc_ids: List[str], owned: bool = True) -> int:
+        """
+        Resuelve los chunks que la deduplicación omitió y que dependen de estos documentos
+        (que se van a borrar o a mover de bot). Se llama antes de borrar (owned=False: los
+        propios se van con el documento) o de mover.
+        - los de otros documentos que apuntaban a ellos se enlazan a otra copia que siga en
+          el bot si la hay; si no, se vuelven a escribir (re-embebiendo)
+        - con owned, los propios se vuelven a escribir para que viajen con el documento
+        Devuelve cuántos chunks se escribieron.
+        """
+        from app.core.registry import registry
+
+        links = vector_service.documents.links_for(vector_service.name, list(doc_ids))
+        if not links:
+            return 0
+        leaving = set(doc_ids)
+        restore = [link for link in links if owned and link["doc_id"] in leaving]
+        relinked = []
+        for bot_id in {link["bot_id"] for link in links if link["doc_id"] not in leaving}:
+            index = registry.dedup_indexes.get(bot_id)
+            for doc_id in leaving:
+                index.remove_document(doc_id)
+            for link in links:
+                if link["bot_id"] != bot_id or link["doc_id"] in leaving:
+                    continue
+                # sin otra copia, check_document lo indexa: los siguientes duplicados apuntan a él
+                match = index.check_document(link["doc_id"], [link["chunk_id"]], [link["text"]])[0]
+                if match is None:
+                    restore.append(link)
+                else:
+                    relinked.append({
+                        **link,
+                        "duplicate_of": match[0],
+                        "duplicate_doc_id": match[0].rsplit("_", 1)[0],
+                        "similarity": round(match[1], 3)
+                    })
+
+        if restore:
+            texts = [link["text"] for link in restore]
+            vector_service.add_embeddings(
+                [link["chunk_id"] for link in restore],
+                texts,
+                vector_service.document_embedder.embed(texts),
+                [link["metadata"] for link in restore]
+            )
+            # el índice léxico de esos bots se reconstruye al próximo uso
+            for bot_id in {link["bot_id"] for link in restore}:
+                registry.lexical_indexes.drop(bot_id)
+            print(f"🧬 {len(restore)} fragmentos duplicados restaurados, {len(relinked)} re-enlazados")
+        if relinked:
+            vector_service.documents.add_links(vector_service.name, relinked)
+        relinked_ids = {link["chunk_id"] for link in relinked}
+        vector_service.documents.delete_links(
+            vector_service.name, [link["chunk_id"] for link in links if link["chunk_id"] not in relinked_ids]
+        )
+        return len(restore)
+
+    def _relink_duplicates(self, vector_service: VectorStore, doc_ids: List[str]) -> set:
+        """
+        Chunks escritos con duplicate_of (DEDUP_MODE=link) cuyo original está en estos
+        documentos, que se van a borrar o a mover de bot: se comparan de nuevo con el resto
+        de su bot y apuntan a otra copia que siga en él, o dejan de ser duplicados
+        (duplicate_of = ""; el primero de ellos pasa a ser el original de los demás).
+        Devuelve los bots cuyos chunks cambiaron.
+        """
+        from app.core.registry import registry
+
+        leaving = set(doc_ids)
+        leaving_ids = vector_service.get(where={"doc_id": {"$in": list(leaving)}}, include=[])["ids"]
+        if not leaving_ids:
+            return set()
+        dependents = vector_service.get(
+            where={"duplicate_of": {"$in": leaving_ids}}, include=["documents", "metadatas"]
+        )
+        rows = sorted(
+            (
+                (chunk_id, text, metadata)
+                for chunk_id, text, metadata in zip(dependents["ids"], dependents["documents"], dependents["metadatas"])
+                if metadata.get("doc_id") not in leaving
+            ),
+            key=lambda row: (row[2].get("doc_id"), int(row[0].rsplit("_", 1)[1]))
+        )
+        if not rows:
+            return set()
+
+        bot_ids = {metadata.get("bot_id") for _, _, metadata in rows}
+        ids, metadatas = [], []
+        for bot_id in bot_ids:
+            index = registry.dedup_indexes.get(bot_id)
+            for doc_id in leaving:
+                index.remove_document(doc_id)
+            bot_rows = [row for row in rows if row[2].get("bot_id") == bot_id]
+            # fuera del índice mientras se comparan: si no, se encontrarían entre sí
+            index.remove_chunks([chunk_id for chunk_id, _, _ in bot_rows])
+            for chunk_id, text, metadata in bot_rows:
+                match = index.check_document(metadata.get("doc_id"), [chunk_id], [text])[0]
+                ids.append(chunk_id)
+                metadatas.append({**metadata, "duplicate_of": match[0] if match else ""})
+        vector_service.update_chunk_metadatas(ids, metadatas)
+        print(f"🧬 {len(ids)} fragmentos duplicados re-enlazados")
+        return bot_ids
+
+    def _dedup_moved(self, vector_service: VectorStore, bot_id: str, doc_ids: List[str]):
+        """
+        Compara los chunks de documentos recién movidos a bot_id con el índice de duplicados
+        de ese bot: el duplicate_of que traían apuntaba a chunks del bot de origen.
+        Con DEDUP_MODE=off solo se limpia.
+        """
+        from app.core.config import settings
+        from app.core.registry import registry
+
+        results = vector_service.get(where={"doc_id": {"$in": list(doc_ids)}}, include=["documents", "metadatas"])
+        documents: dict[str, list] = {}
+        for chunk_id, text, metadata in zip(results["ids"], results["documents"], results["metadatas"]):
+            documents.setdefault(metadata.get("doc_id"), []).append((int(chunk_id.rsplit("_", 1)[1]), chunk_id, text, metadata))
+        if not documents:
+            return
+
+        index = registry.dedup_indexes.get(bot_id) if settings.DEDUP_MODE != "off" else None
+        ids, metadatas = [], []
+        for doc_id, chunks in documents.items():
+            chunks.sort(key=lambda chunk: chunk[0])
+            if index is not None:
+                index.remove_document(doc_id)
+                matches = index.check_document(doc_id, [c[1] for c in chunks], [c[2] for c in chunks])
+            else:
+                matches = [None] * len(chunks)
+            for (_, chunk_id, _, metadata), match in zip(chunks, matches):
+                duplicate_of = match[0] if match else ""
+                if metadata.get("duplicate_of", "") != duplicate_of:
+                    ids.append(chunk_id)
+                    metadatas.append({**metadata, "duplicate_of": duplicate_of})
+        vector_service.update_chunk_metadatas(ids, metadatas)
+
     async def _save_file(self, file: UploadFile) -> str:
         file_id = str(uuid.uuid4())
         filename = f"{file_id}_{file.filename}"
@@ -91,6 +328,8 @@ class DocumentService:
 
     def _extract_text_from_pdf(self, path: str) -> str:
         """Extrae texto completo de un PDF"""
+        from pypdf import PdfReader
+
         reader = PdfReader(path)
         all_text = []
         for page in reader.pages:
@@ -100,6 +339,8 @@ class DocumentService:
 
     def _extract_text_from_docx(self, path: str) -> str:
         """Extrae texto completo de un DOCX"""
+        from docx import Document
+
         doc = Document(path)
         all_text = []
         for paragraph in doc.paragraphs:
@@ -112,7 +353,8 @@ class DocumentService:
         with open(path, 'r', encoding='utf-8') as f:
             return f.read()
 
-    def _chunk_text(self, text: str, chunk_size: int = 800, overlap: int = 100) -> List[str]:
+    @staticmethod
+    def _chunk_text(text: str, chunk_size: int = 800, overlap: int = 100) -> List[str]:
         """
         Divide el texto en fragmentos manejables con overlap.
         Intenta respetar límites de párrafos cuando es posible.
@@ -157,16 +399,223 @@ class DocumentService:
     def move_document_to_bot(self, doc_id: str, new_bot_id: str):
         """
         Mueve un documento de un bot a otro.
-        Actualiza el metadata bot_id de todos los chunks del documento.
+        - misma colección: solo actualiza el bot_id de los chunks
+        - otra colección del mismo modelo (p. ej. una por bot): copia chunks y vectores sin re-embeber
+        - otro modelo: re-embebe los chunks con el modelo del bot destino
         """
-        self.vector_service.update_document_bot_id(doc_id, new_bot_id)
+        source = next((vs for vs in self._all_vector_services() if vs.has_document(doc_id)), None)
+        if source is None:
+            raise ValueError(f"Documento {doc_id} no encontrado")
+
+        source_bot_ids = self._document_bot_ids(source, doc_id)
+        # los duplicados omitidos dejan de tener su original en el mismo bot
+        self._restore_linked_chunks(source, [doc_id])
+        source_bot_ids |= self._relink_duplicates(source, [doc_id])
+        target = self.vector_service_for(new_bot_id)
+        if target.name == source.name:
+            source.update_document_bot_id(doc_id, new_bot_id)
+        else:
+            # cada chunk conserva su id y su metadata (duplicate_of se recalcula abajo)
+            exported = source.export_document(doc_id)
+            metadatas = [{**metadata, "bot_id": new_bot_id} for metadata in exported["metadatas"]]
+            embeddings = exported["embeddings"]
+            if target.model_name != source.model_name:
+                # otro modelo: se re-embeben los textos con el del bot destino
+                embeddings = target.document_embedder.embed(exported["documents"])
+            target.add_embeddings(exported["ids"], exported["documents"], embeddings, metadatas)
+            source.delete_by_doc_id(doc_id)
+
+        from app.core.registry import registry
+        registry.lexical_indexes.remove_document(doc_id)
+        registry.dedup_indexes.remove_document(doc_id)
+        self._dedup_moved(target, new_bot_id, [doc_id])
+        if registry.lexical_indexes.loaded(new_bot_id) is not None:
+            chunks, _ = target.get_document_chunks(doc_id)
+            chunk_ids = [f"{doc_id}_{i}" for i in range(len(chunks))]
+            registry.lexical_indexes.add_document(new_bot_id, doc_id, chunk_ids, chunks)
+        registry.bump_bot_version(new_bot_id, *source_bot_ids)
         print(f"📦 Documento {doc_id} movido al bot {new_bot_id}")
 
+    def bulk_move_documents(
+        self,
+        new_bot_id: str,
+        doc_ids: List[str] | None = None,
+        from_bot_id: str | None = None,
+        job=None
+    ) -> dict:
+        """
+        Mueve muchos documentos (doc_ids, o todos los de from_bot_id) al bot new_bot_id.
+        Los documentos salen del registro de documentos y se procesan por páginas de
+        ~BULK_MOVE_PAGE_SIZE chunks: en la misma colección solo se leen los ids y se cambia
+        el campo bot_id, sin cargar textos ni vectores. Entre colecciones (otra partición
+        u otro modelo) cada documento se copia como en move_document_to_bot.
+        `job` (opcional, ver app.services.job_service) recibe el progreso y permite cancelar
+        entre páginas.
+        """
+        from app.core.config import settings
+        from app.core.registry import registry
+
+        if (doc_ids is None) == (from_bot_id is None):
+            raise ValueError("Indica doc_ids o from_bot_id")
+
+        vector_services = self._all_vector_services()
+        for vector_service in vector_services:
+            vector_service.ensure_documents_indexed()
+        by_name = {vector_service.name: vector_service for vector_service in vector_services}
+        if from_bot_id == new_bot_id:
+            documents = []
+        else:
+            documents = vector_services[0].documents.locate(
+                list(by_name), doc_ids=list(dict.fromkeys(doc_ids)) if doc_ids is not None else None,
+                bot_id=from_bot_id
+            )
+            documents = [document for document in documents if document["bot_id"] != new_bot_id]
+        found = {document["doc_id"] for document in documents}
+        missing = [doc_id for doc_id in doc_ids or [] if doc_id not in found]
+
+        target = self.vector_service_for(new_bot_id)
+        progress = {
+            "documents_total": len(documents),
+            "chunks_total": sum(document["chunks"] or 0 for document in documents),
+            "documents_moved": 0,
+            "chunks_moved": 0,
+            "documents_copied": 0
+        }
+        if job is not None:
+            job.update(**progress)
+
+        def pages():
+            """Grupos de documentos enteros de una misma colección, de ~page_size chunks"""
+            page, page_chunks = [], 0
+            for document in sorted(documents, key=lambda d: (d["collection"], d["doc_id"])):
+                if page and (document["collection"] != page[0]["collection"]
+                             or page_chunks >= settings.BULK_MOVE_PAGE_SIZE):
+                    yield page
+                    page, page_chunks = [], 0
+                page.append(document)
+                page_chunks += document["chunks"] or 0
+            if page:
+                yield page
+
+        for page in pages():
+            if job is not None and job.cancelled:
+                break
+            source = by_name[page[0]["collection"]]
+            page_doc_ids = [document["doc_id"] for document in page]
+            source_bot_ids = {document["bot_id"] for document in page}
+
+            if source.name == target.name:
+                # los duplicados omitidos por la ingesta se re-escriben antes de cambiar de bot
+                progress["chunks_total"] += self._restore_linked_chunks(source, page_doc_ids)
+                source_bot_ids |= self._relink_duplicates(source, page_doc_ids)
+                ids = source.get(where={"doc_id": {"$in": page_doc_ids}}, include=[])["ids"]
+                source.set_bot_id(ids, new_bot_id)
+                for doc_id in page_doc_ids:
+                    registry.lexical_indexes.remove_document(doc_id)
+                    registry.dedup_indexes.remove_document(doc_id)
+                # el índice léxico del destino se reconstruye al próximo uso;
+                # el de duplicados se actualiza comparando los documentos movidos
+                registry.lexical_indexes.drop(new_bot_id)
+                self._dedup_moved(source, new_bot_id, page_doc_ids)
+                registry.bump_bot_version(new_bot_id, *source_bot_ids)
+                progress["chunks_moved"] += len(ids)
+            else:
+                for document in page:
+                    self.move_document_to_bot(document["doc_id"], new_bot_id)
+                    progress["chunks_moved"] += document["chunks"] or 0
+                    progress["documents_copied"] += 1
+            progress["documents_moved"] += len(page)
+            if job is not None:
+                job.update(**progress)
+
+        print(f"📦 {progress['documents_moved']}/{progress['documents_total']} documentos "
+              f"({progress['chunks_moved']} chunks) movidos al bot {new_bot_id}")
+        return {**progress, "not_found": missing}
+
     def delete_document(self, doc_id: str):
         """Elimina un documento específico de la base vectorial"""
-        self.vector_service.delete_by_doc_id(doc_id)
+        from app.core.registry import registry
+
+        bot_ids = set()
+        for vector_service in self._all_vector_services():
+            bot_ids |= self._document_bot_ids(vector_service, doc_id)
+            # chunks de otros documentos omitidos (o marcados) por ser duplicados de este
+            self._restore_linked_chunks(vector_service, [doc_id], owned=False)
+            bot_ids |= self._relink_duplicates(vector_service, [doc_id])
+            vector_service.delete_by_doc_id(doc_id)
+        registry.lexical_indexes.remove_document(doc_id)
+        registry.dedup_indexes.remove_document(doc_id)
+        registry.bump_bot_version(*bot_ids)
         print(f"🗑️ Documento {doc_id} eliminado")
 
-    def list_documents(self, bot_id: str | None = None):
-        """Lista todos los documentos, opcionalmente filtrados por bot_id"""
-        return self.vector_service.list_documents(bot_id=bot_id)
+    def delete_bot_documents(self, bot_id: str):
+        """
+        Elimina todos los documentos de un bot.
+        Su colección propia (CHROMA_COLLECTION_LAYOUT=bot) se borra completa;
+        en colecciones compartidas se borran sus chunks por bot_id.
+        """
+        from app.core.registry import registry
+
+        for vector_service in self._all_vector_services():
+            if self._vector_service is None and vector_service.partition == f"bot:{bot_id}":
+                registry.drop_vector_service(vector_service)
+            else:
+                vector_service.delete_by_bot_id(bot_id)
+        registry.lexical_indexes.drop(bot_id)
+        registry.dedup_indexes.drop(bot_id)
+        registry.bump_bot_version(bot_id)
+        print(f"🗑️ Documentos del bot {bot_id} eliminados")
+
+    @staticmethod
+    def _document_bot_ids(vector_service: VectorStore, doc_id: str) -> set:
+        """Bots dueños de un documento en una colección (para invalidar sus resultados cacheados)"""
+        metadatas = vector_service.get(where={"doc_id": doc_id}, limit=1, include=["metadatas"])["metadatas"]
+        return {metadata.get("bot_id") for metadata in metadatas or []}
+
+    def list_documents(
+        self,
+        bot_id: str | None = None,
+        file_type: str | None = None,
+        uploaded_from: str | None = None,
+        uploaded_to: str | None = None,
+        limit: int | None = None,
+        offset: int = 0
+    ) -> dict:
+        """
+        Lista documentos desde el registro de documentos (consulta indexada, sin leer chunks),
+        del más reciente al más antiguo, con su cantidad de chunks.
+        Filtros opcionales por bot_id, tipo de archivo y fecha de subida
+        (uploaded_from inclusive, uploaded_to exclusivo, fechas ISO).
+        Devuelve {"total": coincidencias, "documents": página}.
+        """
+        vector_services = self._all_vector_services()
+        for vector_service in vector_services:
+            vector_service.ensure_documents_indexed()
+        return vector_services[0].documents.list_documents(
+            [vector_service.name for vector_service in vector_services],
+            bot_id=bot_id,
+            file_type=file_type,
+            uploaded_from=uploaded_from,
+            uploaded_to=uploaded_to,
+            limit=limit,
+            offset=offset
+        )
+
+    def dedup_stats(self) -> dict:
+        """Chunks omitidos por duplicados (persistentes) e índices de duplicados cargados"""
+        from app.core.config import settings
+        from app.core.registry import registry
+
+        vector_services = self._all_vector_services()
+        return {
+            "mode": settings.DEDUP_MODE,
+            "threshold": settings.DEDUP_THRESHOLD,
+            "skipped": vector_services[0].documents.link_stats([vs.name for vs in vector_services]),
+            "indexes": registry.dedup_indexes.stats()
+        }
+
+
+# Factory
+def get_document_service() -> DocumentService:
+    """Crea un DocumentService sobre los recursos compartidos del registro"""
+    return DocumentService()
@@ -0,0 +1,125 @@
+"""
+Cache persistente de embeddings de chunks para la ingesta.
+Clave: (modelo, SHA-256 del texto). Los vectores se guardan como float32 en SQLite.
+"""
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+
+# SQLite limita la cantidad de parámetros por consulta
+_LOOKUP_PAGE = 500
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Almacén en disco de vectores ya calculados.
+    Un mismo chunk (re-subida, párrafos repetidos entre documentos) nunca se embebe dos veces.
+    """
+
+    def __init__(self, path: str = "embedding_cache.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, model_name: str, hashes: list[str]) -> dict[str, np.ndarray]:
+        """Devuelve {hash: vector float32} para los hashes que ya están en cache"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), _LOOKUP_PAGE):
+                page = hashes[start:start + _LOOKUP_PAGE]
+                placeholders = ",".join("?" * len(page))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model_name, *page]
+                )
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model_name: str, items: dict[str, np.ndarray]):
+        """Guarda vectores nuevos (float32) en una sola transacción"""
+        rows = [
+            (model_name, h, int(vector.shape[0]), np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+            for h, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, dim, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def count(self, model_name: str | None = None) -> int:
+        with self._lock:
+            if model_name:
+                row = self._conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model_name,)).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return row[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedDocumentEmbedder:
+    """
+    Mismo contrato que EmbeddingService.embed (matriz float32), pero solo pasa por el modelo los chunks
+    que no están en el EmbeddingCache (y cada texto repetido una sola vez).
+    """
+
+    def __init__(self, embedding_service, cache: EmbeddingCache):
+        self.embedding_service = embedding_service
+        self.model_name = embedding_service.model_name
+        self.cache_key = getattr(embedding_service, "cache_key", embedding_service.model_name)
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return self.embedding_service.embed(texts)
+
+        hashes = [content_hash(t) for t in texts]
+        vectors = self.cache.get_many(self.cache_key, list(set(hashes)))
+
+        # Textos faltantes, sin repetir
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors and h not in missing:
+                missing[h] = text
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            new_vectors = self.embedding_service.embed(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(self.cache_key, computed)
+            vectors.update(computed)
+
+        # una sola copia final a una matriz contigua (n, dim)
+        return np.stack([vectors[h] for h in hashes])
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,85 @@
+"""
+Embeddings en paralelo con un pool de procesos para subidas grandes.
+Cada worker carga su propia copia del modelo y limita sus hilos de inferencia.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+_worker_service = None
+
+
+def _init_worker(model_name: str, threads: int):
+    """Inicializador de cada proceso: fija los hilos y carga el modelo una vez"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    global _worker_service
+    from app.services.embedding_service import get_embedding_service
+    _worker_service = get_embedding_service(model_name, threads=threads)
+
+
+def _embed_shard(texts: list[str]) -> np.ndarray:
+    return _worker_service.embed(texts)
+
+
+class ParallelEmbedder:
+    """
+    Mismo contrato que EmbeddingService.embed.
+    Listas pequeñas se embeben en el proceso actual; a partir de min_chunks
+    se reparten en shards entre los workers y se devuelven en el orden original.
+    """
+
+    def __init__(
+        self,
+        embedding_service,
+        workers: int,
+        threads_per_worker: int = 1,
+        shard_size: int = 256,
+        min_chunks: int = 512
+    ):
+        self.embedding_service = embedding_service
+        self.model_name = embedding_service.model_name
+        self.cache_key = getattr(embedding_service, "cache_key", embedding_service.model_name)
+        self.workers = workers
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.shard_size = max(1, shard_size)
+        self.min_chunks = min_chunks
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Levanta el pool y carga el modelo en cada worker (idempotente)"""
+        with self._lock:
+            if self._pool is None:
+                # spawn: no heredar hilos ni el modelo ya cargado del proceso padre
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.threads_per_worker)
+                )
+                # fuerza la carga del modelo en todos los workers
+                list(self._pool.map(_embed_shard, [["warmup"]] * self.workers))
+        return self._pool
+
+    def stop(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if len(texts) < self.min_chunks:
+            return self.embedding_service.embed(texts)
+
+        pool = self.start()
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+
+        # map conserva el orden de los shards; cada shard llega como matriz float32
+        return np.concatenate(list(pool.map(_embed_shard, shards)))
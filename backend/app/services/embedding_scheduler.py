@@ -0,0 +1,143 @@
+"""
+Micro-batching de embeddings de consultas.
+Agrupa las preguntas que llegan al mismo tiempo en una sola llamada a model.encode.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+import numpy as np
+
+from app.services.embedding_service import EmbeddingService
+
+_STOP = object()
+
+
+class EmbeddingScheduler:
+    """
+    Cola de embeddings de consultas con batching dinámico.
+
+    Cada request deja su texto en la cola y espera un Future. Un hilo de fondo
+    junta textos durante max_wait_ms (o hasta max_batch_size), ejecuta un solo
+    encode y reparte cada vector a quien lo pidió.
+    Después de stop() las consultas nuevas fallan en lugar de quedar esperando un hilo
+    que ya no existe (start() lo vuelve a habilitar).
+    """
+
+    def __init__(self, embedding_service: EmbeddingService, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embedding_service = embedding_service
+        self.model_name = embedding_service.model_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        """Arranca el hilo de batching (idempotente)"""
+        with self._lock:
+            self._stopped = False
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        """Crea el hilo si no está corriendo (con el lock tomado)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="embedding-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Procesa lo encolado hasta ahora, detiene el hilo y rechaza las consultas siguientes"""
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+            self._thread = None
+            # bajo el lock: ninguna consulta puede quedar en la cola detrás de _STOP
+            if thread is not None and thread.is_alive():
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+        # lo que no alcanzó a procesar el hilo (p. ej. si murió) falla en lugar de esperar para siempre
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                item[1].set_exception(RuntimeError("EmbeddingScheduler detenido"))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embedding de una consulta, compartiendo forward pass con las concurrentes"""
+        future: Future = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("EmbeddingScheduler detenido")
+            self._ensure_thread()
+            self._queue.put((text, future))
+        return future.result()
+
+    def embed_queries(self, texts: list[str]) -> np.ndarray:
+        """
+        Embeddings de varias consultas de un mismo request (matriz (n, dim)).
+        Ya son un batch: se codifican en un solo encode en el hilo del caller, sin pasar por la cola.
+        """
+        vectors = self.embedding_service.embed(texts)
+        with self._lock:
+            self.batches += 1
+            self.items += len(texts)
+        return vectors
+
+    def stats(self) -> dict:
+        """Contadores de batching para monitoreo"""
+        with self._lock:
+            batches, items = self.batches, self.items
+        return {
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": round(items / batches, 2) if batches else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+    def _process(self, batch: list[tuple[str, Future]]):
+        texts = [text for text, _ in batch]
+        try:
+            vectors = self.embedding_service.embed(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+        # cada caller recibe su fila de la matriz del batch (sin copiar)
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
@@ -1,13 +1,135 @@
-from sentence_transformers import SentenceTransformer
+import os
+
+import numpy as np
+
 
 class EmbeddingService:
     """
     Wrap del modelo de embeddings.
     Lo separamos para que luego podamos cambiar a OpenAI.
+    Se instancia una sola vez por proceso (ver app.core.registry).
+
+    Devuelve matrices float32 contiguas (n, dim) ya normalizadas (L2),
+    sin pasar por listas de floats de Python.
     """
-    def __init__(self):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threads: int = 0):
+        # importación perezosa: con el backend ONNX no se carga torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+
         # modelo liviano y bueno
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    def embed_queries(self, texts: list[str]) -> np.ndarray:
+        return self.embed(texts)
+
+
+class OnnxEmbeddingService:
+    """
+    Backend CPU con ONNX Runtime (opcional int8 cuantizado).
+    Replica el pipeline de sentence-transformers: transformer → mean pooling → normalización L2.
+    El modelo se exporta con export_onnx_model.py a onnx_model_dir(model_name).
+    """
+    def __init__(
+        self,
+        model_dir: str,
+        model_name: str = "all-MiniLM-L6-v2",
+        quantized: bool = True,
+        threads: int = 0,
+        batch_size: int = 64
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        filename = "model.int8.onnx" if quantized else "model.onnx"
+        model_path = os.path.join(model_dir, filename)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No existe {model_path}. Exporta el modelo con: python export_onnx_model.py"
+            )
+
+        self.model_name = model_name
+        # los vectores int8 difieren levemente de los de torch: no comparten cache persistente
+        self.cache_key = f"{model_name}@onnx-int8" if quantized else f"{model_name}@onnx"
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = min(self.tokenizer.model_max_length, 512)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np"
+        )
+        feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # mean pooling respetando el padding
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        batches = [
+            self._encode_batch(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.ascontiguousarray(np.concatenate(batches), dtype=np.float32)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    def embed_queries(self, texts: list[str]) -> np.ndarray:
+        return self.embed(texts)
+
+
+def onnx_model_dir(model_name: str) -> str:
+    """Carpeta donde vive la exportación ONNX de un modelo"""
+    from app.core.config import settings
+    return os.path.join(settings.ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def get_embedding_service(model_name: str, threads: int | None = None):
+    """Crea el backend de embeddings configurado en settings (torch u onnx)"""
+    from app.core.config import settings
+
+    if threads is None:
+        threads = settings.EMBEDDING_THREADS
+
+    if settings.EMBEDDING_BACKEND.lower() == "onnx":
+        return OnnxEmbeddingService(
+            model_dir=onnx_model_dir(model_name),
+            model_name=model_name,
+            quantized=settings.ONNX_QUANTIZED,
+            threads=threads
+        )
 
-    def embed(self, texts: list[str]) -> list[list[float]]:
-        return self.model.encode(texts).tolist()
+    return EmbeddingService(model_name, threads=threads)
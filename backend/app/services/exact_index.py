@@ -0,0 +1,273 @@
+"""
+Índice exacto en proceso para bots pequeños.
+Con unos cientos o miles de chunks, un producto matriz-vector sobre los embeddings
+del bot es más rápido que pasar por SQLite + HNSW de Chroma, y con recall exacto.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from app.services.vector_store import matches_where
+
+
+class ExactIndex:
+    """
+    Embeddings de un bot en una matriz float32 contigua (memory-mapped desde un .npy),
+    con ids, textos y metadata en memoria. top-k = un producto punto + argpartition.
+    """
+
+    def __init__(self, ids: list[str], documents: list[str], metadatas: list[dict], matrix: np.ndarray):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.matrix = matrix
+        self.doc_ids = {m.get("doc_id") for m in metadatas}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self, query_embedding: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Posiciones y productos punto de los k vectores más parecidos, de mayor a menor (solo filas de mask)"""
+        return self.search_many(np.asarray(query_embedding, dtype=np.float32)[None, :], k, mask)[0]
+
+    def search_many(
+        self, query_embeddings: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        search para varias consultas con un solo producto matriz-matriz.
+        mask: filas candidatas (filtro de metadata); las demás quedan en -inf y fuera del top-k.
+        """
+        if mask is not None:
+            k = min(k, int(mask.sum()))
+        if not len(self.ids) or k <= 0:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return [empty for _ in query_embeddings]
+        scores = np.asarray(query_embeddings, dtype=np.float32) @ self.matrix.T
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        k = min(k, scores.shape[1])
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(-row[top], kind="stable")]
+            results.append((top, row[top]))
+        return results
+
+    def mask(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        """Filas cuya metadata cumple `where` (None: todas)"""
+        if not where:
+            return None
+        return np.fromiter((matches_where(m, where) for m in self.metadatas), dtype=bool, count=len(self.metadatas))
+
+
+class ExactIndexStore:
+    """
+    Un ExactIndex por bot dentro de una colección, persistido en `directory`.
+
+    Cada índice se construye perezosamente desde Chroma en la primera consulta del bot.
+    Al cargarlo se compara una huella de los ids del bot en Chroma con la guardada
+    junto al .npy: si no coincide (cambios hechos por otro proceso) se reconstruye.
+    Cada guardado escribe un .npy con nombre nuevo (el .json apunta al vigente): un
+    índice anterior puede seguir memory-mapped por una consulta en curso, y en Windows
+    un archivo abierto no se puede reemplazar ni borrar.
+    Los bots con más de `max_chunks` chunks quedan marcados para usar el ANN de Chroma.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_chunks: int,
+        list_ids: Callable[[str], list[str]],
+        load_chunks: Callable[[str], Iterable[dict]]
+    ):
+        self.directory = directory
+        self.max_chunks = max_chunks
+        self.list_ids = list_ids
+        self.load_chunks = load_chunks
+        # bot_id -> ExactIndex, o int (cantidad de chunks) si el bot supera el umbral
+        self._indexes: dict[str, ExactIndex | int] = {}
+        self._lock = threading.RLock()
+        self.exact_queries = 0
+        self.ann_queries = 0
+
+    def _base(self, bot_id: str) -> str:
+        slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", bot_id)[:40]
+        digest = hashlib.sha1(bot_id.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, f"{slug}-{digest}")
+
+    @staticmethod
+    def _fingerprint(ids: Iterable[str]) -> str:
+        return hashlib.sha1("\n".join(sorted(ids)).encode("utf-8")).hexdigest()
+
+    def _save(self, bot_id: str, ids: list[str], documents: list[str], metadatas: list[dict],
+              matrix: np.ndarray) -> ExactIndex:
+        """
+        Escribe un .npy nuevo y el .json que apunta a él (reemplazo atómico), borra los .npy
+        anteriores que ya no estén abiertos y devuelve el índice memory-mapped
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        base = self._base(bot_id)
+        matrix_path = f"{base}.{uuid.uuid4().hex[:12]}.npy"
+        sidecar_path = f"{base}.json"
+
+        with open(matrix_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(f"{sidecar_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "fingerprint": self._fingerprint(ids),
+                "matrix": os.path.basename(matrix_path),
+                "ids": ids,
+                "documents": documents,
+                "metadatas": metadatas
+            }, f, ensure_ascii=False)
+        os.replace(f"{sidecar_path}.tmp", sidecar_path)
+        self._remove_matrices(bot_id, keep=matrix_path)
+
+        return ExactIndex(ids, documents, metadatas, np.load(matrix_path, mmap_mode="r"))
+
+    def _remove_matrices(self, bot_id: str, keep: Optional[str] = None):
+        """Borra los .npy del bot salvo keep; los que siguen abiertos (Windows) quedan para el próximo guardado"""
+        for path in glob.glob(f"{glob.escape(self._base(bot_id))}.*.npy"):
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remove_files(self, bot_id: str):
+        sidecar_path = f"{self._base(bot_id)}.json"
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)
+        self._remove_matrices(bot_id)
+
+    def _load(self, bot_id: str) -> ExactIndex | int:
+        ids = self.list_ids(bot_id)
+        if len(ids) > self.max_chunks:
+            self._remove_files(bot_id)
+            return len(ids)
+        if not ids:
+            return ExactIndex([], [], [], np.empty((0, 0), dtype=np.float32))
+
+        sidecar_path = f"{self._base(bot_id)}.json"
+        if os.path.exists(sidecar_path):
+            with open(sidecar_path, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            matrix_path = os.path.join(self.directory, sidecar.get("matrix", ""))
+            if sidecar.get("fingerprint") == self._fingerprint(ids) and os.path.isfile(matrix_path):
+                matrix = np.load(matrix_path, mmap_mode="r")
+                return ExactIndex(sidecar["ids"], sidecar["documents"], sidecar["metadatas"], matrix)
+
+        chunk_ids, documents, metadatas, embeddings = [], [], [], []
+        for page in self.load_chunks(bot_id):
+            chunk_ids.extend(page['ids'])
+            documents.extend(page['documents'])
+            metadatas.extend(page['metadatas'])
+            embeddings.append(np.asarray(page['embeddings'], dtype=np.float32))
+        return self._save(bot_id, chunk_ids, documents, metadatas, np.concatenate(embeddings))
+
+    def query(self, bot_id: str, query_embedding: np.ndarray, k: int, where: Optional[dict] = None) -> Optional[dict]:
+        """
+        top-k exacto de un bot: {"ids", "documents", "metadatas", "scores"} (producto punto),
+        o None si el bot supera max_chunks y debe consultarse el ANN.
+        where: filtro de metadata (solo compiten los chunks que lo cumplen).
+        """
+        results = self.query_many(bot_id, np.asarray(query_embedding)[None, :], k, where=where)
+        return results[0] if results is not None else None
+
+    def query_many(
+        self, bot_id: str, query_embeddings: np.ndarray, k: int, where: Optional[dict] = None
+    ) -> Optional[list[dict]]:
+        """query para varias consultas (matriz (n, dim)): una lista de resultados, o None si el bot usa ANN"""
+        # el lock solo cubre buscar o cargar el índice: un ExactIndex no se modifica después
+        # de construido (append lo reemplaza), así el producto matricial corre sin bloquear
+        # las consultas de los demás bots
+        with self._lock:
+            entry = self._indexes.get(bot_id)
+            if entry is None:
+                entry = self._load(bot_id)
+                self._indexes[bot_id] = entry
+
+            if isinstance(entry, int):
+                self.ann_queries += len(query_embeddings)
+                return None
+            self.exact_queries += len(query_embeddings)
+
+        return [
+            {
+                "ids": [entry.ids[i] for i in positions],
+                "documents": [entry.documents[i] for i in positions],
+                "metadatas": [entry.metadatas[i] for i in positions],
+                "scores": scores
+            }
+            for positions, scores in entry.search_many(query_embeddings, k, entry.mask(where))
+        ]
+
+    def append(self, bot_id: str, ids: list[str], documents: list[str], metadatas: list[dict],
+               embeddings: np.ndarray):
+        """Agrega chunks nuevos de un bot ya cargado (o actualiza su cuenta si usa ANN)"""
+        with self._lock:
+            entry = self._indexes.get(bot_id)
+            if entry is None:
+                return
+            if isinstance(entry, int):
+                self._indexes[bot_id] = entry + len(ids)
+                return
+
+            if len(entry) + len(ids) > self.max_chunks:
+                # superó el umbral: pasa al ANN de Chroma
+                self._indexes[bot_id] = len(entry) + len(ids)
+                self._remove_files(bot_id)
+                print(f"📈 Bot {bot_id} superó {self.max_chunks} chunks: pasa al índice ANN")
+                return
+
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            if len(entry):
+                matrix = np.concatenate([entry.matrix, matrix])
+            self._indexes[bot_id] = self._save(
+                bot_id,
+                entry.ids + list(ids),
+                entry.documents + list(documents),
+                entry.metadatas + list(metadatas),
+                matrix
+            )
+
+    def invalidate(self, bot_id: Optional[str] = None, doc_id: Optional[str] = None):
+        """
+        Descarta índices para que se reconstruyan en la próxima consulta:
+        el de un bot, los que contienen un documento, o todos.
+        """
+        with self._lock:
+            for key, entry in list(self._indexes.items()):
+                if bot_id is not None and key != bot_id:
+                    continue
+                if doc_id is not None and isinstance(entry, ExactIndex) and doc_id not in entry.doc_ids:
+                    continue
+                del self._indexes[key]
+
+    def clear(self):
+        """Descarta todos los índices y sus archivos (p. ej. al eliminar la colección)"""
+        with self._lock:
+            self._indexes = {}
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict:
+        exact = [e for e in self._indexes.values() if isinstance(e, ExactIndex)]
+        return {
+            "exact_bots": len(exact),
+            "ann_bots": len(self._indexes) - len(exact),
+            "exact_chunks": sum(len(e) for e in exact),
+            "exact_queries": self.exact_queries,
+            "ann_queries": self.ann_queries,
+            "max_chunks": self.max_chunks
+        }
@@ -0,0 +1,144 @@
+"""
+Trabajos en segundo plano (p. ej. movimientos masivos de documentos).
+Corren en un pool de hilos propio, fuera de los workers de requests; el estado y el
+progreso se consultan por id mientras el proceso viva (son por nodo, no persistentes).
+"""
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+
+class Job:
+    """Estado de un trabajo: pending → running → completed | failed | cancelled"""
+
+    def __init__(self, kind: str, params: dict):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params
+        self.status = "pending"
+        self.progress: dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self._cancelled = threading.Event()
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """Los trabajos lo revisan entre páginas para detenerse en un punto consistente"""
+        return self._cancelled.is_set()
+
+    def update(self, **progress):
+        self.progress.update(progress)
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        if self.finished_at is not None:
+            elapsed = round(self._elapsed, 2)
+        elif self._started:
+            elapsed = round(time.monotonic() - self._started, 2)
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_s": elapsed
+        }
+
+
+class JobManager:
+    """
+    Cola de trabajos con `workers` hilos. Se conservan los últimos `max_finished`
+    trabajos terminados para consultar su resultado.
+    """
+
+    def __init__(self, workers: int = 1, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], **params) -> Job:
+        """Encola fn(job); lo que devuelva queda en job.result"""
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        if job.cancelled:
+            job.status = "cancelled"
+            job.finished_at = datetime.now().isoformat()
+            return
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        job._started = time.monotonic()
+        print(f"⚙️ Trabajo {job.kind} {job.job_id} iniciado")
+        try:
+            job.result = fn(job)
+            job.status = "cancelled" if job.cancelled else "completed"
+            print(f"✅ Trabajo {job.kind} {job.job_id} {job.status}")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"❌ Trabajo {job.kind} {job.job_id} falló: {e}")
+            traceback.print_exc()
+        finally:
+            job._elapsed = time.monotonic() - job._started
+            job.finished_at = datetime.now().isoformat()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None) -> list[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if kind is None or job.kind == kind]
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished_at is not None:
+            return False
+        job._cancelled.set()
+        return True
+
+    def shutdown(self):
+        """
+        Pide a los trabajos en curso que se detengan y espera a que terminen su página actual;
+        los que seguían en cola no llegan a correr y quedan como cancelled
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancelled.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == "pending":
+                    job.status = "cancelled"
+                    job.finished_at = datetime.now().isoformat()
+
+    def stats(self) -> dict:
+        counts: dict[str, int] = {}
+        for job in self.list():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
@@ -0,0 +1,230 @@
+"""
+Índice léxico BM25 en memoria, uno por bot.
+Complementa la búsqueda vectorial en consultas que dependen de palabras exactas
+("enlace plataforma SIGA") que MiniLM no distingue bien.
+"""
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset("""
+a al algo ante como con cual cuando de del desde donde el ella ellos en entre era es esa ese eso esta este
+esto fue ha hay la las le les lo los mas me mi muy no nos o otra otro para pero por que se segun ser si sin
+sobre son su sus tambien te tiene todo tu un una uno y ya
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    """Minúsculas, sin tildes ni stopwords (así "plataforma" y "Plataforma" o "página"/"pagina" coinciden)"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [t for t in _TOKEN_RE.findall(text) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+class BM25Index:
+    """
+    Postings compactos: por término, un array de ids internos (uint32) y otro de frecuencias (uint16).
+    El scoring se hace con NumPy sobre esos buffers, sin objetos por posting.
+
+    Borrar un documento solo marca sus chunks (tombstones); cuando los borrados superan
+    un cuarto del índice se compacta reconstruyendo los postings.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._chunk_ids: list[str] = []
+        self._lengths = array("I")
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._doc_chunks: dict[str, list[int]] = {}
+        self._deleted = np.zeros(0, dtype=bool)
+        self._deleted_count = 0
+        self._total_length = 0
+        self._norm: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._chunk_ids) - self._deleted_count
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_chunks
+
+    def add_document(self, doc_id: str, chunk_ids: list[str], texts: list[str]):
+        with self._lock:
+            if doc_id in self._doc_chunks:
+                self.remove_document(doc_id)
+
+            internal_ids = []
+            for chunk_id, text in zip(chunk_ids, texts):
+                internal_id = len(self._chunk_ids)
+                tokens = tokenize(text)
+                self._chunk_ids.append(chunk_id)
+                self._lengths.append(len(tokens))
+                self._total_length += len(tokens)
+                for term, tf in Counter(tokens).items():
+                    ids, tfs = self._postings.setdefault(term, (array("I"), array("H")))
+                    ids.append(internal_id)
+                    tfs.append(min(tf, 65535))
+                internal_ids.append(internal_id)
+
+            self._doc_chunks[doc_id] = internal_ids
+            self._norm = None
+            self._deleted = np.concatenate([self._deleted, np.zeros(len(internal_ids), dtype=bool)])
+
+    def remove_document(self, doc_id: str) -> bool:
+        with self._lock:
+            internal_ids = self._doc_chunks.pop(doc_id, None)
+            if not internal_ids:
+                return False
+            self._deleted[internal_ids] = True
+            self._deleted_count += len(internal_ids)
+            self._total_length -= sum(self._lengths[i] for i in internal_ids)
+            self._norm = None
+            if self._deleted_count > len(self._chunk_ids) / 4:
+                self._compact()
+            return True
+
+    def _compact(self):
+        """Reconstruye los postings sin los chunks borrados"""
+        live = [
+            (doc_id, [self._chunk_ids[i] for i in internal_ids], internal_ids)
+            for doc_id, internal_ids in self._doc_chunks.items()
+        ]
+        postings = self._postings
+        old_lengths = self._lengths
+        remap = np.full(len(self._chunk_ids), -1, dtype=np.int64)
+
+        self._reset()
+        for doc_id, chunk_ids, internal_ids in live:
+            start = len(self._chunk_ids)
+            remap[internal_ids] = np.arange(start, start + len(internal_ids))
+            self._chunk_ids.extend(chunk_ids)
+            for i in internal_ids:
+                self._lengths.append(old_lengths[i])
+                self._total_length += old_lengths[i]
+            self._doc_chunks[doc_id] = list(range(start, start + len(internal_ids)))
+        self._deleted = np.zeros(len(self._chunk_ids), dtype=bool)
+
+        for term, (ids, tfs) in postings.items():
+            new_ids = remap[np.frombuffer(ids, dtype=np.uint32)]
+            keep = new_ids >= 0
+            if keep.any():
+                self._postings[term] = (
+                    array("I", new_ids[keep].astype(np.uint32).tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes())
+                )
+
+    def search(
+        self, query: str, limit: int = 20, doc_ids: Optional[Iterable[str]] = None
+    ) -> list[tuple[str, float]]:
+        """
+        Top `limit` chunks por BM25: [(chunk_id, score)], de mayor a menor.
+        doc_ids: solo compiten los chunks de esos documentos (alcance de la búsqueda).
+        """
+        with self._lock:
+            total = len(self._chunk_ids)
+            live = total - self._deleted_count
+            if not live:
+                return []
+
+            if self._norm is None:
+                # normalización por largo de BM25; se recalcula solo cuando cambia el índice
+                lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+                avg_length = self._total_length / live or 1.0
+                self._norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+            norm = self._norm
+            scores = np.zeros(total, dtype=np.float32)
+
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                ids = np.frombuffer(posting[0], dtype=np.uint32)
+                tfs = np.frombuffer(posting[1], dtype=np.uint16).astype(np.float32)
+                idf = math.log(1 + (live - len(ids) + 0.5) / (len(ids) + 0.5))
+                scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[ids])
+
+            scores[self._deleted] = 0
+            if doc_ids is not None:
+                allowed = np.zeros(total, dtype=bool)
+                for doc_id in doc_ids:
+                    allowed[self._doc_chunks.get(doc_id, [])] = True
+                scores[~allowed] = 0
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._chunk_ids[i], float(scores[i])) for i in candidates]
+
+    def stats(self) -> dict:
+        postings = sum(len(ids) for ids, _ in self._postings.values())
+        return {
+            "documents": len(self._doc_chunks),
+            "chunks": len(self),
+            "terms": len(self._postings),
+            "postings": postings,
+            "deleted_chunks": self._deleted_count,
+            "postings_bytes": postings * 6 + len(self._lengths) * 4
+        }
+
+
+class LexicalIndexManager:
+    """
+    Un BM25Index por bot. Cada índice se construye perezosamente con `loader(bot_id)`
+    (que entrega (doc_id, chunk_ids, textos) desde el vector store) la primera vez
+    que el bot hace una búsqueda híbrida; desde ahí se mantiene al día en cada
+    subida, borrado y movimiento. Los bots que nunca lo usan no ocupan memoria.
+    """
+
+    def __init__(self, loader: Callable[[str], Iterable[tuple[str, list[str], list[str]]]]):
+        self.loader = loader
+        self._indexes: dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def get(self, bot_id: str) -> BM25Index:
+        index = self._indexes.get(bot_id)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(bot_id)
+                if index is None:
+                    index = BM25Index()
+                    for doc_id, chunk_ids, texts in self.loader(bot_id):
+                        index.add_document(doc_id, chunk_ids, texts)
+                    self._indexes[bot_id] = index
+                    print(f"🔤 Índice léxico del bot {bot_id}: {index.stats()['chunks']} chunks")
+        return index
+
+    def loaded(self, bot_id: str) -> Optional[BM25Index]:
+        return self._indexes.get(bot_id)
+
+    def add_document(self, bot_id: str, doc_id: str, chunk_ids: list[str], texts: list[str]):
+        """Solo actualiza índices ya construidos: los demás leerán el documento al construirse"""
+        index = self._indexes.get(bot_id)
+        if index is not None:
+            index.add_document(doc_id, chunk_ids, texts)
+
+    def remove_document(self, doc_id: str):
+        for index in list(self._indexes.values()):
+            index.remove_document(doc_id)
+
+    def drop(self, bot_id: str):
+        with self._lock:
+            self._indexes.pop(bot_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes = {}
+
+    def stats(self) -> dict:
+        return {bot_id: index.stats() for bot_id, index in self._indexes.items()}
@@ -0,0 +1,87 @@
+"""
+Diversificación de resultados con Maximal Marginal Relevance (MMR).
+
+Los chunks se trocean con overlap, así que una búsqueda suele devolver varios vecinos
+casi idénticos de un mismo documento. MMR elige, en cada paso, el candidato que maximiza
+    lambda * similitud(pregunta, chunk) - (1 - lambda) * max similitud(chunk, ya elegidos)
+y descarta los casi duplicados de lo ya elegido, así el prompt lleva información distinta
+en lugar de repetir el mismo texto.
+"""
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+def mmr_select(
+    query_embedding: np.ndarray,
+    embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+    max_similarity: Optional[float] = None
+) -> list[int]:
+    """
+    Índices de hasta k candidatos en orden de selección MMR (vectores normalizados).
+    lambda_mult = 1 es solo relevancia; 0 es solo diversidad.
+    Con max_similarity, los candidatos con similitud >= max_similarity a alguno ya
+    elegido se descartan (pueden quedar menos de k).
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if k <= 0 or len(embeddings) == 0:
+        return []
+
+    relevance = embeddings @ np.asarray(query_embedding, dtype=np.float32)
+    # similitudes entre candidatos: una sola matriz n x n
+    similarity = embeddings @ embeddings.T
+    redundancy = np.zeros(len(embeddings), dtype=np.float32)
+    available = np.ones(len(embeddings), dtype=bool)
+
+    selected: list[int] = []
+    while len(selected) < k and available.any():
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+        if max_similarity is not None:
+            available &= redundancy < max_similarity
+    return selected
+
+
+class MMRStats:
+    """
+    Contadores de la diversificación: chunks descartados y caracteres de prompt.
+    chars_baseline y chars_selected son los totales sin y con MMR; chars_saved es su
+    diferencia neta (negativa si MMR eligió en total chunks más largos).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.candidates = 0
+        self.selected = 0
+        self.chars_baseline = 0
+        self.chars_selected = 0
+
+    def record(self, candidates: int, selected: int, chars_baseline: int, chars_selected: int):
+        """chars_baseline: caracteres de los max_sources primeros candidatos (el prompt sin MMR)"""
+        with self._lock:
+            self.calls += 1
+            self.candidates += candidates
+            self.selected += selected
+            self.chars_baseline += chars_baseline
+            self.chars_selected += chars_selected
+
+    def stats(self) -> dict:
+        with self._lock:
+            chars_saved = self.chars_baseline - self.chars_selected
+            return {
+                "calls": self.calls,
+                "candidates": self.candidates,
+                "selected": self.selected,
+                "chars_baseline": self.chars_baseline,
+                "chars_selected": self.chars_selected,
+                "chars_saved": chars_saved,
+                "chars_saved_pct": round(100 * chars_saved / self.chars_baseline, 1) if self.chars_baseline else 0,
+                "avg_chars_saved": round(chars_saved / self.calls) if self.calls else 0
+            }
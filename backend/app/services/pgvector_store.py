@@ -0,0 +1,831 @@
+"""
+Backend pgvector de VectorStore (VECTOR_STORE_BACKEND = "pgvector").
+
+Los chunks viven en Postgres, junto al resto de los datos de la app: una tabla por
+modelo de embeddings y partición (mismo nombre que la colección de Chroma), con
+índice ANN HNSW o IVFFlat. Varios nodos de la API sin estado comparten así el mismo índice.
+Requiere la extensión `vector` (imagen pgvector/pgvector del docker-compose).
+"""
+import hashlib
+import io
+import json
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable
+
+import numpy as np
+
+from app.services.vector_store import VectorStore, configured_space
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+# clase de operadores del índice y operador de distancia de cada espacio
+_OPERATORS = {
+    "cosine": ("vector_cosine_ops", "<=>"),
+    "ip": ("vector_ip_ops", "<#>"),
+    "l2": ("vector_l2_ops", "<->"),
+}
+
+# operadores de rango de los filtros where (ver vector_store.RANGE_OPERATORS)
+_RANGE_SQL = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+CATALOG_DDL = """
+CREATE TABLE IF NOT EXISTS vector_collections (
+    name TEXT PRIMARY KEY,
+    embedding_model TEXT,
+    partition TEXT,
+    space TEXT NOT NULL,
+    dimension INTEGER,
+    index_type TEXT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+# registro de documentos (ver app.services.document_registry), actualizado en la misma
+# transacción que los chunks; se borra con la colección
+DOCUMENTS_DDL = """
+ALTER TABLE vector_collections ADD COLUMN IF NOT EXISTS documents_synced BOOLEAN NOT NULL DEFAULT false;
+CREATE TABLE IF NOT EXISTS vector_documents (
+    collection TEXT NOT NULL REFERENCES vector_collections (name) ON DELETE CASCADE,
+    doc_id TEXT NOT NULL,
+    bot_id TEXT,
+    filename TEXT,
+    file_type TEXT,
+    uploaded_at TEXT,
+    chunks INTEGER NOT NULL,
+    PRIMARY KEY (collection, doc_id)
+);
+CREATE INDEX IF NOT EXISTS vector_documents_bot ON vector_documents (bot_id, uploaded_at);
+CREATE INDEX IF NOT EXISTS vector_documents_type ON vector_documents (file_type, uploaded_at);
+CREATE INDEX IF NOT EXISTS vector_documents_uploaded ON vector_documents (uploaded_at);
+CREATE TABLE IF NOT EXISTS vector_chunk_links (
+    collection TEXT NOT NULL REFERENCES vector_collections (name) ON DELETE CASCADE,
+    chunk_id TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    bot_id TEXT,
+    duplicate_of TEXT NOT NULL,
+    duplicate_doc_id TEXT NOT NULL,
+    similarity REAL,
+    text TEXT NOT NULL,
+    metadata JSONB NOT NULL,
+    PRIMARY KEY (collection, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS vector_chunk_links_doc ON vector_chunk_links (collection, doc_id);
+CREATE INDEX IF NOT EXISTS vector_chunk_links_original ON vector_chunk_links (collection, duplicate_doc_id);
+"""
+
+
+def _vector_literal(vector) -> str:
+    """Texto '[x,y,...]' que Postgres convierte a vector (sin depender del paquete pgvector)"""
+    return "[" + ",".join(map(repr, vector.tolist())) + "]"
+
+
+# formato binario de COPY: firma, flags y largo de la extensión del encabezado
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+
+
+def _copy_field(value: bytes | None) -> bytes:
+    if value is None:
+        return struct.pack("!i", -1)
+    return struct.pack("!i", len(value)) + value
+
+
+def _binary_vector(vector: np.ndarray) -> bytes:
+    """Representación binaria de pgvector: dimensión (int16), reservado (int16) y float4 big-endian"""
+    return struct.pack("!hh", len(vector), 0) + vector.astype(">f4").tobytes()
+
+
+def _metadata_json(metadata: dict) -> str:
+    # Postgres no admite NUL en text ni en jsonb (aparecen en algunos PDFs)
+    return json.dumps(
+        {k: v.replace("\x00", "") if isinstance(v, str) else v for k, v in metadata.items()},
+        ensure_ascii=False
+    )
+
+
+def _parse_vector(text: str) -> np.ndarray:
+    return np.fromstring(text[1:-1], dtype=np.float32, sep=",")
+
+
+class PgVectorPool:
+    """
+    Pool de conexiones a Postgres compartido por todas las tablas de vectores del proceso.
+    psycopg2 falla si se piden más conexiones que max_size: un semáforo hace esperar
+    a los hilos que sobran en lugar de devolver error.
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10):
+        # importación perezosa: solo con VECTOR_STORE_BACKEND = "pgvector"
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.max_size = max(1, max_size)
+        self._pool = ThreadedConnectionPool(max(0, min(min_size, self.max_size)), self.max_size, dsn)
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._in_use = 0
+        self.waits = 0
+        self.ensure_schema()
+
+    @contextmanager
+    def connection(self, autocommit: bool = False):
+        """Conexión del pool en una transacción (commit al salir, rollback si hay error)"""
+        if not self._slots.acquire(blocking=False):
+            self.waits += 1
+            self._slots.acquire()
+        conn = self._pool.getconn()
+        self._in_use += 1
+        try:
+            conn.autocommit = autocommit
+            yield conn
+            if not autocommit:
+                conn.commit()
+        except Exception:
+            if not autocommit and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if autocommit and not conn.closed:
+                conn.autocommit = False
+            self._in_use -= 1
+            self._pool.putconn(conn, close=bool(conn.closed))
+            self._slots.release()
+
+    def ensure_schema(self):
+        """Extensión vector y catálogo de colecciones (idempotente)"""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            cur.execute(CATALOG_DDL)
+            cur.execute(DOCUMENTS_DDL)
+
+    def list_collections(self) -> list[dict]:
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT name, embedding_model, partition FROM vector_collections ORDER BY name")
+            return [{"name": n, "embedding_model": m, "partition": p} for n, m, p in cur.fetchall()]
+
+    def close(self):
+        self._pool.closeall()
+
+    def stats(self) -> dict:
+        return {"max_size": self.max_size, "in_use": self._in_use, "waits": self.waits}
+
+
+class PgDocumentRegistry:
+    """
+    Registro de documentos del backend pgvector (tabla vector_documents), compartido por los nodos.
+    Las filas las escribe PgVectorStore en la transacción de cada escritura de chunks;
+    aquí solo se consulta.
+    """
+
+    def __init__(self, pool: PgVectorPool):
+        self.pool = pool
+
+    def is_synced(self, collection: str) -> bool:
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT documents_synced FROM vector_collections WHERE name = %s", (collection,))
+            row = cur.fetchone()
+        return bool(row and row[0])
+
+    def list_documents(
+        self,
+        collections: list[str],
+        bot_id: str | None = None,
+        file_type: str | None = None,
+        uploaded_from: str | None = None,
+        uploaded_to: str | None = None,
+        limit: int | None = None,
+        offset: int = 0
+    ) -> dict:
+        """Mismo contrato que DocumentRegistry.list_documents"""
+        from app.services.document_registry import DOCUMENT_COLUMNS
+
+        if not collections:
+            return {"total": 0, "documents": []}
+        clauses, params = ["collection = ANY(%s)"], [list(collections)]
+        for clause, value in (
+            ("bot_id = %s", bot_id),
+            ("file_type = %s", file_type),
+            ("uploaded_at >= %s", uploaded_from),
+            ("uploaded_at < %s", uploaded_to),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = " AND ".join(clauses)
+
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(f"SELECT COUNT(*) FROM vector_documents WHERE {where}", params)
+            total = cur.fetchone()[0]
+            cur.execute(
+                f"SELECT {', '.join(DOCUMENT_COLUMNS)} FROM vector_documents WHERE {where} "
+                "ORDER BY uploaded_at DESC NULLS LAST, doc_id LIMIT %s OFFSET %s",
+                [*params, limit, offset]
+            )
+            rows = cur.fetchall()
+        return {"total": total, "documents": [dict(zip(DOCUMENT_COLUMNS, row)) for row in rows]}
+
+    def locate(self, collections: list[str], doc_ids: list[str] | None = None,
+               bot_id: str | None = None) -> list[dict]:
+        """Mismo contrato que DocumentRegistry.locate"""
+        from app.services.document_registry import DOCUMENT_COLUMNS
+
+        if not collections:
+            return []
+        query = f"SELECT collection, {', '.join(DOCUMENT_COLUMNS)} FROM vector_documents WHERE collection = ANY(%s)"
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            if doc_ids is None:
+                cur.execute(query + " AND bot_id = %s ORDER BY doc_id", (list(collections), bot_id))
+            else:
+                cur.execute(query + " AND doc_id = ANY(%s)", (list(collections), list(doc_ids)))
+            rows = cur.fetchall()
+        return [dict(zip(("collection", *DOCUMENT_COLUMNS), row)) for row in rows]
+
+    def add_links(self, collection: str, links: list[dict]):
+        """Mismo contrato que DocumentRegistry.add_links"""
+        from app.services.document_registry import LINK_COLUMNS
+
+        if not links:
+            return
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.executemany(
+                f"INSERT INTO vector_chunk_links (collection, {', '.join(LINK_COLUMNS)}) "
+                f"VALUES ({', '.join(['%s'] * (len(LINK_COLUMNS) + 1))}) "
+                "ON CONFLICT (collection, chunk_id) DO UPDATE SET duplicate_of = EXCLUDED.duplicate_of, "
+                "duplicate_doc_id = EXCLUDED.duplicate_doc_id, similarity = EXCLUDED.similarity, "
+                "text = EXCLUDED.text, metadata = EXCLUDED.metadata",
+                [
+                    (collection, *(json.dumps(link[c]) if c == "metadata" else link[c] for c in LINK_COLUMNS))
+                    for link in links
+                ]
+            )
+
+    def links_for(self, collection: str, doc_ids: list[str]) -> list[dict]:
+        """Mismo contrato que DocumentRegistry.links_for"""
+        from app.services.document_registry import LINK_COLUMNS
+
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {', '.join(LINK_COLUMNS)} FROM vector_chunk_links WHERE collection = %s "
+                "AND (doc_id = ANY(%s) OR duplicate_doc_id = ANY(%s))",
+                (collection, list(doc_ids), list(doc_ids))
+            )
+            return [dict(zip(LINK_COLUMNS, row)) for row in cur.fetchall()]
+
+    def delete_links(self, collection: str, chunk_ids: list[str] | None = None, bot_id: str | None = None):
+        """Mismo contrato que DocumentRegistry.delete_links"""
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            if chunk_ids is None:
+                cur.execute("DELETE FROM vector_chunk_links WHERE collection = %s AND bot_id = %s", (collection, bot_id))
+            else:
+                cur.execute(
+                    "DELETE FROM vector_chunk_links WHERE collection = %s AND chunk_id = ANY(%s)",
+                    (collection, list(chunk_ids))
+                )
+
+    def link_stats(self, collections: list[str]) -> dict:
+        """Mismo contrato que DocumentRegistry.link_stats"""
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM vector_chunk_links WHERE collection = ANY(%s)",
+                (list(collections),)
+            )
+            chunks, chars = cur.fetchone()
+        return {"chunks": chunks, "chars": int(chars)}
+
+
+class PgVectorStore(VectorStore):
+    """
+    Una tabla de chunks (id, bot_id, doc_id, document, metadata jsonb, embedding vector(d))
+    registrada en vector_collections con su modelo, partición, espacio, dimensión y tipo de índice.
+
+    - La tabla se crea en el primer add, cuando se conoce la dimensión.
+    - La ingesta usa COPY binario a una tabla temporal + INSERT ... ON CONFLICT (upsert por id).
+    - HNSW se crea con la tabla; IVFFlat necesita datos para entrenar sus listas, así que
+      se crea cuando la tabla alcanza 10 filas por lista (antes la búsqueda es secuencial y exacta).
+    - Cada escritura actualiza vector_documents (registro de documentos) en su misma transacción.
+    - Cada escritura incrementa la versión de la colección. Los índices exactos y BM25 en
+      memoria de cada nodo se descartan cuando ven una versión ajena (chequeo cada
+      PGVECTOR_SYNC_INTERVAL_S segundos, en las consultas).
+    """
+
+    transactional_documents = True
+
+    def __init__(
+        self,
+        collection_name: str = "chatbot_docs",
+        embedding_service=None,
+        pool: PgVectorPool | None = None,
+        query_embedder=None,
+        document_embedder=None,
+        model_name: str | None = None,
+        partition: str | None = None,
+        space: str | None = None,
+        index_type: str | None = None,
+        defer_index: bool = False
+    ):
+        super().__init__(
+            embedding_service=embedding_service,
+            query_embedder=query_embedder,
+            document_embedder=document_embedder,
+            model_name=model_name,
+            partition=partition
+        )
+        from app.core.config import settings
+
+        if pool is None:
+            from app.core.registry import registry
+            pool = registry.pg_pool
+
+        self.pool = pool
+        self.settings = settings
+        self.table = collection_name
+        digest = hashlib.sha1(collection_name.encode("utf-8")).hexdigest()[:12]
+        self._index_prefix = f"vs_{digest}"
+        self._index_ready = False
+        # cargas masivas: el índice ANN se construye al final con build_index (mucho más rápido)
+        self.defer_index = defer_index
+        self._version = 0
+        self._synced_at = 0.0
+        self._open_collection(space or configured_space(), (index_type or settings.PGVECTOR_INDEX).lower())
+
+    @property
+    def name(self) -> str:
+        return self.table
+
+    def _identifier(self, name: str):
+        from psycopg2 import sql
+        return sql.Identifier(name)
+
+    def _open_collection(self, space: str, index_type: str):
+        """Registra la colección en el catálogo (si no existe) y lee su espacio, dimensión e índice"""
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"PGVECTOR_INDEX debe ser uno de {INDEX_TYPES}, no '{index_type}'")
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO vector_collections (name, embedding_model, partition, space, index_type) "
+                "VALUES (%s, %s, %s, %s, %s) ON CONFLICT (name) DO NOTHING",
+                (self.table, self.model_name or "", self.partition, space, index_type)
+            )
+            cur.execute(
+                "SELECT space, dimension, index_type, version FROM vector_collections WHERE name = %s",
+                (self.table,)
+            )
+            self.space, self.dimension, self.index_type, self._version = cur.fetchone()
+        self._synced_at = time.monotonic()
+        if self.dimension is not None:
+            self._index_ready = self._has_ann_index()
+
+    def _table_exists(self) -> bool:
+        """La tabla se crea en el primer add, quizá desde otro nodo después de abrir la colección"""
+        if self.dimension is None:
+            with self.pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT dimension, index_type FROM vector_collections WHERE name = %s", (self.table,))
+                row = cur.fetchone()
+            if row and row[0] is not None:
+                self.dimension, self.index_type = row
+                self._index_ready = self._has_ann_index()
+        return self.dimension is not None
+
+    # --- Índices ---------------------------------------------------------
+
+    def _ann_index_name(self) -> str:
+        return f"{self._index_prefix}_ann"
+
+    def _has_ann_index(self) -> bool:
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (self._ann_index_name(),))
+            return cur.fetchone()[0]
+
+    def _ann_index_sql(self, index_type: str):
+        from psycopg2 import sql
+
+        opclass = _OPERATORS[self.space][0]
+        if index_type == "hnsw":
+            options = sql.SQL("m = {}, ef_construction = {}").format(
+                sql.Literal(self.settings.PGVECTOR_HNSW_M),
+                sql.Literal(self.settings.PGVECTOR_HNSW_EF_CONSTRUCTION)
+            )
+        else:
+            options = sql.SQL("lists = {}").format(sql.Literal(self.settings.PGVECTOR_IVFFLAT_LISTS))
+        return sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} USING {} (embedding {}) WITH ({})").format(
+            self._identifier(self._ann_index_name()),
+            self._identifier(self.table),
+            sql.SQL(index_type),
+            sql.SQL(opclass),
+            options
+        )
+
+    def build_index(self, index_type: str | None = None, concurrently: bool = True):
+        """
+        (Re)crea el índice ANN de la tabla, p. ej. después de una carga masiva o al
+        cambiar entre HNSW e IVFFlat. Con concurrently no bloquea las escrituras.
+        """
+        from psycopg2 import sql
+
+        index_type = (index_type or self.index_type).lower()
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Tipo de índice desconocido: {index_type}")
+        if not self._table_exists():
+            return
+
+        start = time.perf_counter()
+        # CREATE/DROP INDEX CONCURRENTLY no pueden ir dentro de una transacción
+        with self.pool.connection(autocommit=concurrently) as conn, conn.cursor() as cur:
+            drop = "DROP INDEX CONCURRENTLY IF EXISTS {}" if concurrently else "DROP INDEX IF EXISTS {}"
+            cur.execute(sql.SQL(drop).format(self._identifier(self._ann_index_name())))
+            create = self._ann_index_sql(index_type)
+            if concurrently:
+                create = sql.SQL(create.as_string(conn).replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+            cur.execute(create)
+            # estadísticas al día para que el planner elija el índice (p. ej. tras una carga masiva)
+            cur.execute(sql.SQL("ANALYZE {}").format(self._identifier(self.table)))
+            cur.execute(
+                "UPDATE vector_collections SET index_type = %s WHERE name = %s",
+                (index_type, self.table)
+            )
+        self.index_type = index_type
+        self._index_ready = True
+        print(f"🧭 Índice {index_type} de {self.table} creado en {time.perf_counter() - start:.1f} s")
+
+    def _maybe_build_ivfflat(self):
+        if self._index_ready or self.defer_index or self.index_type != "ivfflat":
+            return
+        if self.count() >= 10 * self.settings.PGVECTOR_IVFFLAT_LISTS:
+            self.build_index("ivfflat")
+
+    # --- Versión (coherencia entre nodos) ----------------------------------
+
+    def _bump_version(self, cur):
+        cur.execute(
+            "UPDATE vector_collections SET version = version + 1 WHERE name = %s RETURNING version",
+            (self.table,)
+        )
+        version = cur.fetchone()[0]
+        # si nadie más escribió desde la última lectura, los índices locales siguen al día
+        if version == self._version + 1:
+            self._version = version
+
+    # --- Registro de documentos -------------------------------------------
+
+    def _refresh_documents_sql(self, cur, doc_ids: list[str] | None = None):
+        """Recalcula en vector_documents las filas de doc_ids (o de toda la colección) desde la tabla de chunks"""
+        from psycopg2 import sql
+
+        table = self._identifier(self.table)
+        only = sql.SQL(" AND doc_id = ANY(%s)") if doc_ids is not None else sql.SQL("")
+        params = [list(doc_ids)] if doc_ids is not None else []
+        cur.execute(
+            sql.SQL(
+                "DELETE FROM vector_documents WHERE collection = %s{} "
+                "AND NOT EXISTS (SELECT 1 FROM {} t WHERE t.doc_id = vector_documents.doc_id)"
+            ).format(only, table),
+            [self.table, *params]
+        )
+        cur.execute(
+            sql.SQL(
+                "INSERT INTO vector_documents (collection, doc_id, bot_id, filename, file_type, uploaded_at, chunks) "
+                "SELECT %s, doc_id, min(bot_id), min(metadata ->> 'filename'), min(metadata ->> 'file_type'), "
+                "min(metadata ->> 'uploaded_at'), count(*) FROM {} WHERE doc_id IS NOT NULL{} GROUP BY doc_id "
+                "ON CONFLICT (collection, doc_id) DO UPDATE SET bot_id = EXCLUDED.bot_id, "
+                "filename = EXCLUDED.filename, file_type = EXCLUDED.file_type, "
+                "uploaded_at = EXCLUDED.uploaded_at, chunks = EXCLUDED.chunks"
+            ).format(table, only),
+            [self.table, *params]
+        )
+
+    def rebuild_documents(self, batch_size: int = 5000):
+        """Reconstruye el registro de documentos de la colección con una sola agregación en SQL"""
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            if self._table_exists():
+                self._refresh_documents_sql(cur)
+            cur.execute("UPDATE vector_collections SET documents_synced = true WHERE name = %s", (self.table,))
+
+    def sync(self):
+        """Descarta los índices en memoria (exactos, BM25, duplicados) y los resultados cacheados si otro nodo modificó la colección"""
+        now = time.monotonic()
+        if now - self._synced_at < self.settings.PGVECTOR_SYNC_INTERVAL_S:
+            return
+        self._synced_at = now
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT version FROM vector_collections WHERE name = %s", (self.table,))
+            row = cur.fetchone()
+        version = row[0] if row else 0
+        if version != self._version:
+            self._version = version
+            self._invalidate_local_state()
+
+    # --- Operaciones de VectorStore ----------------------------------------
+
+    def _where_sql(self, where: dict | None, ids: list[str] | None = None):
+        """
+        WHERE para igualdades ($in: pertenencia) y rangos numéricos de metadata:
+        bot_id/doc_id por columna, el resto sobre el jsonb
+        """
+        from psycopg2 import sql
+
+        clauses, params = [], []
+        if ids is not None:
+            clauses.append(sql.SQL("id = ANY(%s)"))
+            params.append(list(ids))
+        for key, value in (where or {}).items():
+            if isinstance(value, dict):
+                if "$in" in value:
+                    if key in ("bot_id", "doc_id"):
+                        clauses.append(sql.SQL("{} = ANY(%s)").format(sql.Identifier(key)))
+                    else:
+                        clauses.append(sql.SQL("metadata ->> {} = ANY(%s)").format(sql.Literal(key)))
+                    params.append([str(v) for v in value["$in"]])
+                for name, bound in value.items():
+                    if name in _RANGE_SQL:
+                        # CASE: las filas sin el campo numérico dan NULL (no cumplen) en lugar de fallar al castear
+                        clauses.append(sql.SQL(
+                            "CASE WHEN jsonb_typeof(metadata -> {key}) = 'number' "
+                            "THEN (metadata ->> {key})::double precision END {op} %s"
+                        ).format(key=sql.Literal(key), op=sql.SQL(_RANGE_SQL[name])))
+                        params.append(bound)
+            elif key in ("bot_id", "doc_id"):
+                clauses.append(sql.SQL("{} = %s").format(sql.Identifier(key)))
+                params.append(value)
+            else:
+                clauses.append(sql.SQL("metadata @> %s::jsonb"))
+                params.append(json.dumps({key: value}))
+        if not clauses:
+            return sql.SQL(""), params
+        return sql.SQL(" WHERE ") + sql.SQL(" AND ").join(clauses), params
+
+    def count(self) -> int:
+        from psycopg2 import sql
+
+        if not self._table_exists():
+            return 0
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql.SQL("SELECT count(*) FROM {}").format(self._identifier(self.table)))
+            return cur.fetchone()[0]
+
+    def _check_dimension(self, dimension: int):
+        """Crea la tabla con vector(dimension) en el primer add; después rechaza otras dimensiones"""
+        from psycopg2 import sql
+
+        if self.dimension is None:
+            with self.pool.connection() as conn, conn.cursor() as cur:
+                # otro nodo puede estar creando la misma tabla
+                cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (self.table,))
+                cur.execute("SELECT dimension FROM vector_collections WHERE name = %s", (self.table,))
+                self.dimension = cur.fetchone()[0]
+                if self.dimension is None:
+                    table = self._identifier(self.table)
+                    cur.execute(sql.SQL(
+                        "CREATE TABLE IF NOT EXISTS {} ("
+                        "id TEXT PRIMARY KEY, bot_id TEXT, doc_id TEXT, document TEXT NOT NULL, "
+                        "metadata JSONB NOT NULL DEFAULT '{{}}'::jsonb, embedding vector({}) NOT NULL)"
+                    ).format(table, sql.Literal(int(dimension))))
+                    for column in ("bot_id", "doc_id"):
+                        cur.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({})").format(
+                            self._identifier(f"{self._index_prefix}_{column}"), table, sql.Identifier(column)
+                        ))
+                    if self.index_type == "hnsw" and not self.defer_index:
+                        cur.execute(self._ann_index_sql("hnsw"))
+                    cur.execute(
+                        "UPDATE vector_collections SET dimension = %s, embedding_model = %s WHERE name = %s",
+                        (int(dimension), self.model_name or "", self.table)
+                    )
+                    self.dimension = int(dimension)
+            self._index_ready = self._has_ann_index()
+
+        if int(self.dimension) != int(dimension):
+            raise ValueError(
+                f"La tabla {self.table} guarda vectores de dimensión {self.dimension}, "
+                f"pero el modelo {self.model_name} produce {dimension}"
+            )
+
+    def _write(self, ids: list[str], documents: list[str], embeddings: np.ndarray, metadatas: list[dict]):
+        """
+        COPY binario a una tabla temporal y upsert en la tabla, en una sola transacción.
+        El formato binario evita convertir cada float a texto (el costo dominante con CSV).
+        """
+        from psycopg2 import sql
+        from psycopg2.extensions import encodings
+
+        table = self._identifier(self.table)
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            # text y jsonb viajan en la codificación del cliente
+            encoding = encodings.get(conn.encoding, "utf-8")
+
+            def encode(value) -> bytes | None:
+                # Postgres no admite NUL en text (aparecen en algunos PDFs)
+                return None if value is None else str(value).replace("\x00", "").encode(encoding)
+
+            buffer = io.BytesIO()
+            buffer.write(_COPY_HEADER)
+            for chunk_id, document, embedding, metadata in zip(ids, documents, embeddings, metadatas):
+                buffer.write(struct.pack("!h", 6))
+                buffer.write(_copy_field(encode(chunk_id)))
+                buffer.write(_copy_field(encode(metadata.get("bot_id"))))
+                buffer.write(_copy_field(encode(metadata.get("doc_id"))))
+                buffer.write(_copy_field(encode(document or "")))
+                # jsonb binario: versión 1 + texto JSON
+                buffer.write(_copy_field(b"\x01" + _metadata_json(metadata).encode(encoding)))
+                buffer.write(_copy_field(_binary_vector(embedding)))
+            buffer.write(_COPY_TRAILER)
+            buffer.seek(0)
+
+            cur.execute(sql.SQL(
+                "CREATE TEMP TABLE vector_staging (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ).format(table))
+            cur.copy_expert(
+                "COPY vector_staging (id, bot_id, doc_id, document, metadata, embedding) "
+                "FROM STDIN WITH (FORMAT binary)",
+                buffer
+            )
+            cur.execute(sql.SQL(
+                "INSERT INTO {} (id, bot_id, doc_id, document, metadata, embedding) "
+                "SELECT id, bot_id, doc_id, document, metadata, embedding FROM vector_staging "
+                "ON CONFLICT (id) DO UPDATE SET bot_id = EXCLUDED.bot_id, doc_id = EXCLUDED.doc_id, "
+                "document = EXCLUDED.document, metadata = EXCLUDED.metadata, embedding = EXCLUDED.embedding"
+            ).format(table))
+            self._refresh_documents_sql(cur, sorted({m.get("doc_id") for m in metadatas if m.get("doc_id")}))
+            self._bump_version(cur)
+
+        self._maybe_build_ivfflat()
+
+    def _search(self, query_embedding: np.ndarray, n_results: int, where: dict | None) -> dict:
+        return self._search_many(np.asarray(query_embedding, dtype=np.float32)[None, :], n_results, where)
+
+    def _search_many(self, query_embeddings: np.ndarray, n_results: int, where: dict | None) -> dict:
+        """
+        top-k de varias consultas en una sola sentencia: unnest de los vectores y un
+        LATERAL con ORDER BY distancia LIMIT k por cada uno (cada fila usa el índice ANN).
+        """
+        from psycopg2 import sql
+
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        results = {key: [[] for _ in query_embeddings] for key in ("ids", "documents", "metadatas", "distances")}
+        if not self._table_exists() or not len(query_embeddings):
+            return results
+
+        operator = _OPERATORS[self.space][1]
+        distance = sql.SQL("embedding {} q.embedding").format(sql.SQL(operator))
+        where_sql, params = self._where_sql(where)
+        vectors = [_vector_literal(vector) for vector in query_embeddings]
+
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            # parámetros de búsqueda solo para esta transacción
+            if self.index_type == "hnsw":
+                cur.execute("SET LOCAL hnsw.ef_search = %s",
+                            (max(self.settings.PGVECTOR_HNSW_EF_SEARCH, n_results),))
+            else:
+                cur.execute("SET LOCAL ivfflat.probes = %s", (self.settings.PGVECTOR_IVFFLAT_PROBES,))
+            if self.settings.PGVECTOR_ITERATIVE_SCAN:
+                # pgvector >= 0.8: sigue recorriendo el índice si el filtro por bot_id descarta candidatos
+                cur.execute(sql.SQL("SET LOCAL {} = {}").format(
+                    sql.SQL(f"{self.index_type}.iterative_scan"),
+                    sql.Literal(self.settings.PGVECTOR_ITERATIVE_SCAN)
+                ))
+            cur.execute(
+                sql.SQL(
+                    "SELECT q.position, r.id, r.document, r.metadata, r.distance "
+                    "FROM unnest(%s::vector[]) WITH ORDINALITY AS q(embedding, position) "
+                    "CROSS JOIN LATERAL ("
+                    "SELECT id, document, metadata, {} AS distance FROM {}{} ORDER BY {} LIMIT %s"
+                    ") r ORDER BY q.position, r.distance"
+                ).format(distance, self._identifier(self.table), where_sql, distance),
+                [vectors, *params, n_results]
+            )
+            rows = cur.fetchall()
+
+        if not rows:
+            return results
+        distances = np.array([row[4] for row in rows], dtype=np.float64)
+        # misma escala que Chroma: ip → 1 - <a, b> (pgvector devuelve -<a, b>), l2 → euclidiana al cuadrado
+        if self.space == "ip":
+            distances = 1.0 + distances
+        elif self.space == "l2":
+            distances = distances ** 2
+        for row, row_distance in zip(rows, distances.tolist()):
+            position = row[0] - 1
+            results["ids"][position].append(row[1])
+            results["documents"][position].append(row[2])
+            results["metadatas"][position].append(row[3])
+            results["distances"][position].append(row_distance)
+        return results
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: Iterable[str] = ("documents", "metadatas")
+    ) -> dict:
+        from psycopg2 import sql
+
+        include = list(include)
+        result = {
+            "ids": [],
+            "documents": [] if "documents" in include else None,
+            "metadatas": [] if "metadatas" in include else None,
+            "embeddings": np.empty((0, self.dimension or 0), dtype=np.float32) if "embeddings" in include else None
+        }
+        if not self._table_exists() or (ids is not None and not ids):
+            return result
+
+        columns = ["id"] + [
+            column for key, column in (("documents", "document"), ("metadatas", "metadata"), ("embeddings", "embedding"))
+            if key in include
+        ]
+        where_sql, params = self._where_sql(where, ids)
+        query = sql.SQL("SELECT {} FROM {}{} ORDER BY id").format(
+            sql.SQL(", ").join(sql.Identifier(c) for c in columns), self._identifier(self.table), where_sql
+        )
+        if limit is not None:
+            query += sql.SQL(" LIMIT %s")
+            params.append(limit)
+        if offset:
+            query += sql.SQL(" OFFSET %s")
+            params.append(offset)
+
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        result["ids"] = [row[0] for row in rows]
+        for position, column in enumerate(columns[1:], start=1):
+            values = [row[position] for row in rows]
+            if column == "document":
+                result["documents"] = values
+            elif column == "metadata":
+                result["metadatas"] = values
+            elif values:
+                result["embeddings"] = np.stack([_parse_vector(v) for v in values])
+        return result
+
+    def _update_metadatas(self, ids: list[str], metadatas: list[dict]):
+        from psycopg2 import sql
+        from psycopg2.extras import execute_values
+
+        if not self._table_exists():
+            return
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            execute_values(
+                cur,
+                sql.SQL(
+                    "UPDATE {} AS t SET metadata = v.metadata::jsonb, "
+                    "bot_id = v.metadata::jsonb ->> 'bot_id', doc_id = v.metadata::jsonb ->> 'doc_id' "
+                    "FROM (VALUES %s) AS v (id, metadata) WHERE t.id = v.id"
+                ).format(self._identifier(self.table)).as_string(conn),
+                [(chunk_id, _metadata_json(metadata)) for chunk_id, metadata in zip(ids, metadatas)]
+            )
+            self._refresh_documents_sql(cur, sorted({m.get("doc_id") for m in metadatas if m.get("doc_id")}))
+            self._bump_version(cur)
+
+    def _set_bot_id(self, ids: list[str], bot_id: str):
+        from psycopg2 import sql
+
+        if not self._table_exists():
+            return
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                sql.SQL(
+                    "WITH moved AS (UPDATE {} SET bot_id = %s, "
+                    "metadata = jsonb_set(metadata, '{{bot_id}}', to_jsonb(%s::text)) "
+                    "WHERE id = ANY(%s) RETURNING doc_id) "
+                    "SELECT DISTINCT doc_id FROM moved WHERE doc_id IS NOT NULL"
+                ).format(self._identifier(self.table)),
+                (bot_id, bot_id, list(ids))
+            )
+            doc_ids = [row[0] for row in cur.fetchall()]
+            if doc_ids:
+                self._refresh_documents_sql(cur, doc_ids)
+            self._bump_version(cur)
+
+    def _delete(self, where: dict | None = None, ids: list[str] | None = None):
+        from psycopg2 import sql
+
+        if not self._table_exists():
+            return
+        where_sql, params = self._where_sql(where, ids)
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                sql.SQL(
+                    "WITH deleted AS (DELETE FROM {}{} RETURNING doc_id) "
+                    "SELECT DISTINCT doc_id FROM deleted WHERE doc_id IS NOT NULL"
+                ).format(self._identifier(self.table), where_sql),
+                params
+            )
+            doc_ids = [row[0] for row in cur.fetchall()]
+            if doc_ids:
+                self._refresh_documents_sql(cur, doc_ids)
+            self._bump_version(cur)
+
+    def drop(self):
+        from psycopg2 import sql
+
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(self._identifier(self.table)))
+            cur.execute("DELETE FROM vector_collections WHERE name = %s", (self.table,))
+        self.dimension = None
+        if self.exact_indexes is not None:
+            self.exact_indexes.clear()
@@ -0,0 +1,115 @@
+"""
+Cache LRU en memoria para embeddings de consultas.
+Las preguntas repetidas del widget no vuelven a pasar por el modelo.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normaliza una pregunta para usarla como clave: solo colapsa los espacios.
+    Mayúsculas y signos cambian el embedding, así que preguntas que difieren en ellos
+    no comparten entrada.
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    Envuelve cualquier objeto con embed_query(text) (EmbeddingService o EmbeddingScheduler)
+    y, si lo tiene, usa su embed_queries(texts) para las consultas en lote.
+    Clave: (modelo, pregunta normalizada), y se embebe ese mismo texto normalizado.
+    Expulsión LRU al superar max_size.
+    """
+
+    def __init__(self, embedder, max_size: int = 2048):
+        self.embedder = embedder
+        self.model_name = embedder.model_name
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_query(self, text: str) -> np.ndarray:
+        text = normalize_query(text)
+        key = (self.model_name, text)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        # copia propia: no retener la matriz completa del batch del scheduler
+        vector = np.array(self.embedder.embed_query(text), dtype=np.float32)
+        vector.flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return vector
+
+    def embed_queries(self, texts: list[str]) -> np.ndarray:
+        """
+        Embeddings de varias consultas: las que no están en cache (sin repetir)
+        se calculan juntas en una sola llamada al embedder.
+        """
+        keys = [(self.model_name, normalize_query(text)) for text in texts]
+        found: dict = {}
+        missing: dict = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found[key] = vector
+                elif key in missing:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    missing[key] = key[1]
+
+        if missing:
+            embed = getattr(self.embedder, "embed_queries", None)
+            texts_to_embed = list(missing.values())
+            vectors = embed(texts_to_embed) if embed else [self.embedder.embed_query(text) for text in texts_to_embed]
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    vector = np.array(vector, dtype=np.float32)
+                    vector.flags.writeable = False
+                    found[key] = vector
+                    self._entries[key] = vector
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        return np.stack([found[key] for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Contadores de hits/misses para monitoreo"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0
+        }
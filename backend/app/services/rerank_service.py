@@ -0,0 +1,101 @@
+"""
+Reranking de candidatos con un cross-encoder en CPU.
+El cross-encoder lee pregunta y chunk juntos: ordena mejor que la distancia ANN,
+así que basta con enviar al LLM los mejores max_sources en lugar de sobre-recuperar.
+"""
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+class CrossEncoderReranker:
+    """
+    Puntúa pares (pregunta, chunk) en batches y reordena los candidatos.
+
+    Con presupuesto de tiempo: los candidatos se puntúan en orden ANN, batch a batch;
+    si el siguiente batch no alcanza a terminar dentro del presupuesto, se detiene y
+    los candidatos sin puntuar quedan detrás de los puntuados, en su orden original.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32, threads: int = 0, max_length: int = 512):
+        # importación perezosa: solo se carga si algún bot activa el rerank
+        from sentence_transformers import CrossEncoder
+
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.pairs_scored = 0
+        self.budget_exhausted = 0
+        self.total_ms = 0.0
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        """Scores de relevancia (logits) de cada texto, en una sola llamada batcheada"""
+        if not texts:
+            return np.empty(0, dtype=np.float32)
+        scores = self.model.predict(
+            [(query, text) for text in texts],
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        return np.asarray(scores, dtype=np.float32).reshape(-1)
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_n: int,
+        budget_ms: float | None = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Devuelve los top_n candidatos reordenados por el cross-encoder
+        (cada uno con "rerank_score"; None si el presupuesto no alcanzó a puntuarlo).
+        """
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000 if budget_ms else None
+        scores: List[float] = []
+        exhausted = False
+
+        # sin presupuesto, un solo batch con todos los candidatos
+        step = self.batch_size if deadline else max(1, len(candidates))
+        last_batch = 0.0
+        for offset in range(0, len(candidates), step):
+            now = time.perf_counter()
+            if deadline and scores and now + last_batch > deadline:
+                exhausted = True
+                break
+            batch = [c["text"] for c in candidates[offset:offset + step]]
+            scores.extend(self.score(query, batch).tolist())
+            last_batch = time.perf_counter() - now
+
+        scored = sorted(
+            ({**c, "rerank_score": round(s, 4)} for c, s in zip(candidates, scores)),
+            key=lambda c: c["rerank_score"],
+            reverse=True
+        )
+        unscored = [{**c, "rerank_score": None} for c in candidates[len(scores):]]
+
+        with self._lock:
+            self.calls += 1
+            self.pairs_scored += len(scores)
+            self.budget_exhausted += int(exhausted)
+            self.total_ms += (time.perf_counter() - start) * 1000
+
+        return (scored + unscored)[:top_n]
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "calls": self.calls,
+            "pairs_scored": self.pairs_scored,
+            "budget_exhausted": self.budget_exhausted,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0
+        }
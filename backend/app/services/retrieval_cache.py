@@ -0,0 +1,144 @@
+"""
+Cache en memoria de resultados de RetrieverService.search.
+Las preguntas repetidas a un mismo bot no vuelven a pasar por el encoder ni por el ANN.
+
+Cada bot tiene una versión de documentos que sube con cada cambio (subida, borrado,
+movimiento, cambio de configuración); la versión es parte de la clave, así que tras un
+cambio las entradas viejas nunca se sirven y se descartan de inmediato.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.services.query_embedding_cache import normalize_query
+
+
+def _chunk_size(chunk: dict) -> int:
+    """Tamaño aproximado en bytes de un chunk cacheado (texto + metadata + overhead del dict)"""
+    metadata = chunk.get("metadata") or {}
+    return 200 + len(chunk.get("text") or "") + sum(len(str(k)) + len(str(v)) for k, v in metadata.items())
+
+
+class RetrievalCache:
+    """
+    Clave: (bot_id, pregunta normalizada, k, threshold, versión del bot).
+    Expulsión LRU al superar max_entries o max_bytes (tamaño aproximado de los chunks)
+    y expiración a los ttl_s segundos.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024, ttl_s: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: dict[str, int] = {}
+        # sube con bump_all (cambios cuyo bot no se conoce, p. ej. hechos por otro nodo)
+        self._generation = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def version(self, bot_id: str) -> tuple[int, int]:
+        """Versión actual de los documentos de un bot (leerla antes de buscar, no después)"""
+        with self._lock:
+            return self._generation, self._versions.get(bot_id, 0)
+
+    def bump(self, *bot_ids: str):
+        """Sube la versión de los bots indicados y descarta sus entradas"""
+        bot_ids = {bot_id for bot_id in bot_ids if bot_id}
+        if not bot_ids:
+            return
+        with self._lock:
+            for bot_id in bot_ids:
+                self._versions[bot_id] = self._versions.get(bot_id, 0) + 1
+            for key in [key for key in self._entries if key[0] in bot_ids]:
+                self._remove(key)
+            self.invalidations += len(bot_ids)
+
+    def bump_all(self):
+        """Invalida todos los bots"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    @staticmethod
+    def _key(bot_id: str, query: str, k: int, threshold: Optional[float], version: tuple[int, int],
+             where: Optional[dict] = None) -> tuple:
+        # el filtro de documentos cambia el resultado: forma parte de la clave
+        scope = json.dumps(where, sort_keys=True) if where else None
+        return bot_id, normalize_query(query), k, threshold, version, scope
+
+    def get(self, bot_id: str, query: str, k: int, threshold: Optional[float],
+            version: tuple[int, int], where: Optional[dict] = None) -> Optional[list[dict[str, Any]]]:
+        key = self._key(bot_id, query, k, threshold, version, where)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, chunks, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # copia: quien llama puede recortar o anotar la lista sin tocar la entrada
+        return [{**chunk, "metadata": dict(chunk.get("metadata") or {})} for chunk in chunks]
+
+    def put(self, bot_id: str, query: str, k: int, threshold: Optional[float],
+            version: tuple[int, int], chunks: list[dict[str, Any]], where: Optional[dict] = None):
+        key = self._key(bot_id, query, k, threshold, version, where)
+        chunks = [{**chunk, "metadata": dict(chunk.get("metadata") or {})} for chunk in chunks]
+        size = sum(_chunk_size(chunk) for chunk in chunks) + 100
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            # la versión cambió mientras se buscaba: el resultado ya nació viejo
+            if version != (self._generation, self._versions.get(bot_id, 0)):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_s, chunks, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Contadores de hits/misses e invalidaciones para monitoreo"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
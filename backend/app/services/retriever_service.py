@@ -1,34 +1,47 @@
-from app.services.vector_service import VectorService
+from app.core.config import settings
+from app.models.bot import BotConfig
+from app.models.document import DocumentFilter
+from app.services.adaptive_k import ADAPTIVE, adaptive_cut, chunk_score, variant_for
+from app.services.bot_service import BotService
+from app.services.vector_store import VectorStore, distance_to_similarity, matches_where
 from typing import List, Dict, Any, Optional
 
+import numpy as np
+
 class RetrieverService:
     """
     Servicio que consulta en Chroma los chunks más parecidos.
     Filtra resultados por bot_id para multi-tenancy y por threshold de similitud.
     """
-    def __init__(self):
-        self.vector_service = VectorService()
+    def __init__(self, vector_service: Optional[VectorStore] = None):
+        # Sin vector_service fijo, cada bot consulta la colección de su modelo de embeddings
+        self._vector_service = vector_service
+
+    def vector_service_for(self, bot_id: str) -> VectorStore:
+        if self._vector_service is not None:
+            return self._vector_service
+        from app.core.registry import registry
+        return registry.vector_service_for_bot(bot_id)
 
     @staticmethod
-    def distance_to_similarity(distance: float) -> float:
+    def distance_to_similarity(distance: float, space: str = "l2") -> float:
         """
         Convierte distancia de ChromaDB a score de similitud (0.0-1.0).
 
-        ChromaDB usa distancia L2 (Euclidean):
-        - distance = 0.0 → 100% similar (similarity = 1.0)
-        - distance = 1.0 → ~50% similar (similarity = 0.5)
-        - distance = 2.0 → 0% similar (similarity = 0.0)
-
-        Formula: similarity = max(0, 1 - distance)
+        El score es la similitud coseno sin importar el espacio del índice
+        (cosine, ip o l2 sobre vectores normalizados), así que retrieval_threshold
+        significa lo mismo en todos los bots. Ver vector_store.distance_to_similarity.
         """
-        return max(0.0, min(1.0, 1.0 - distance))
+        return distance_to_similarity(distance, space)
 
     def search(
         self,
         query: str,
         bot_id: str,
         k: int = 5,
-        threshold: Optional[float] = None
+        threshold: Optional[float] = None,
+        bot_config: Optional[BotConfig] = None,
+        filters: Optional[DocumentFilter] = None
     ) -> List[Dict[str, Any]]:
         """
         Busca chunks relevantes en el vector store.
@@ -38,14 +51,278 @@ class RetrieverService:
             bot_id: ID del bot (para multi-tenancy)
             k: Número de resultados a recuperar
             threshold: Umbral mínimo de similitud (0.0-1.0). Chunks con score menor serán descartados.
+            bot_config: Configuración del bot (si no se pasa, se lee); define retrieval_mode, mmr y rerank
+            filters: Alcance de documentos (nombre, tipo, fecha de subida, ids), aplicado en el índice
 
         Returns:
-            Lista de chunks con texto, metadata y similarity score
+            Lista de hasta max_sources chunks con id, texto, metadata y similarity score
+            (con mmr: los más diversos; con rerank: los mejores según el cross-encoder, con
+            rerank_score; con adaptive_k: cortados en el codo de los scores o en el
+            presupuesto de caracteres)
+        """
+        if bot_config is None:
+            bot_config = BotService().get_bot(bot_id)
+
+        n_candidates = self._n_candidates(k, bot_config)
+        where = filters.to_where() if filters is not None else None
+
+        vector_service = self.vector_service_for(bot_id)
+        cache, version = self._cache_for(vector_service, bot_id)
+        if cache is not None:
+            cached = cache.get(bot_id, query, k, threshold, version, where)
+            if cached is not None:
+                return self._adapt(query, bot_id, cached, bot_config)
+
+        if bot_config is not None and bot_config.retrieval_mode == "hybrid":
+            combined = self._hybrid_search(
+                vector_service, query, bot_id, n_candidates, threshold, bot_config, where=where
+            )
+        else:
+            combined = self._vector_search(vector_service, query, bot_id, n_candidates, threshold, where)
+
+        combined = self._select(vector_service, query, combined, bot_config)
+
+        if cache is not None:
+            cache.put(bot_id, query, k, threshold, version, combined, where)
+        # el corte adaptativo va después del cache: la entrada sirve a las dos variantes del A/B
+        return self._adapt(query, bot_id, combined, bot_config)
+
+    def search_many(
+        self,
+        queries: List[str],
+        bot_id: str,
+        k: int = 5,
+        threshold: Optional[float] = None,
+        bot_config: Optional[BotConfig] = None,
+        filters: Optional[DocumentFilter] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Como search, para varias preguntas del mismo bot (evaluación, debug, clientes multi-pregunta).
+
+        Las preguntas se embeben en un solo pase del encoder y se buscan con una sola
+        consulta al vector store; el threshold, la etapa BM25, MMR y el rerank se aplican
+        por pregunta, y cada lista se recorta a max_sources del bot.
+
+        Returns:
+            Una lista de chunks por pregunta, en el mismo orden que queries
+        """
+        if not queries:
+            return []
+        if bot_config is None:
+            bot_config = BotService().get_bot(bot_id)
+
+        n_candidates = self._n_candidates(k, bot_config)
+        hybrid = bot_config is not None and bot_config.retrieval_mode == "hybrid"
+        where = filters.to_where() if filters is not None else None
+
+        vector_service = self.vector_service_for(bot_id)
+        cache, version = self._cache_for(vector_service, bot_id)
+        batch: List[Optional[List[Dict[str, Any]]]] = [
+            cache.get(bot_id, query, k, threshold, version, where) if cache is not None else None
+            for query in queries
+        ]
+        pending = [i for i, cached in enumerate(batch) if cached is None]
+
+        if pending:
+            # documentos en el alcance de BM25: una sola consulta para todas las preguntas
+            scope_doc_ids = vector_service.matching_doc_ids(bot_id, where) if hybrid and where else None
+            results = vector_service.query_many(
+                query_texts=[queries[i] for i in pending],
+                n_results=self._hybrid_candidates(n_candidates) if hybrid else n_candidates,
+                bot_id=bot_id,
+                where=where
+            )
+            for position, i in enumerate(pending):
+                # resultado de la pregunta i con la forma de una consulta individual
+                single = {key: values[position:position + 1] for key, values in results.items() if values}
+                if hybrid:
+                    combined = self._hybrid_search(
+                        vector_service, queries[i], bot_id, n_candidates, threshold, bot_config,
+                        results=single, where=where, scope_doc_ids=scope_doc_ids
+                    )
+                else:
+                    combined = self._vector_chunks(vector_service, single, threshold)
+
+                combined = self._select(vector_service, queries[i], combined, bot_config)
+                if cache is not None:
+                    cache.put(bot_id, queries[i], k, threshold, version, combined, where)
+                batch[i] = combined
+
+        return [self._adapt(query, bot_id, combined, bot_config) for query, combined in zip(queries, batch)]
+
+    def _cache_for(self, vector_service: VectorStore, bot_id: str):
+        """Cache de resultados y versión actual del bot, o (None, None) con un vector_service fijo o sin cache"""
+        if self._vector_service is not None:
+            return None, None
+        from app.core.registry import registry
+        cache = registry.retrieval_cache
+        if cache is None:
+            return None, None
+        # en pgvector, antes de leer la versión se aplican los cambios hechos por otros nodos
+        vector_service.sync()
+        return cache, cache.version(bot_id)
+
+    @staticmethod
+    def _n_candidates(k: int, bot_config: Optional[BotConfig]) -> int:
+        """Con MMR o rerank se recuperan más candidatos y ese paso elige los max_sources"""
+        n_candidates = k
+        if bot_config is not None and bot_config.mmr:
+            n_candidates = max(n_candidates, settings.MMR_CANDIDATES)
+        if bot_config is not None and bot_config.rerank:
+            n_candidates = max(n_candidates, settings.RERANK_CANDIDATES)
+        return n_candidates
+
+    def _select(
+        self,
+        vector_service: VectorStore,
+        query: str,
+        combined: List[Dict[str, Any]],
+        bot_config: Optional[BotConfig]
+    ) -> List[Dict[str, Any]]:
+        """Pasos finales sobre los candidatos: duplicados enlazados, MMR (diversidad) y luego rerank, según el bot"""
+        combined = self._collapse_duplicates(combined)
+        if bot_config is None or not combined:
+            return combined
+        if bot_config.mmr:
+            combined = self._diversify(vector_service, query, combined, bot_config)
+        if bot_config.rerank:
+            combined = self._rerank(query, combined, bot_config)
+        return combined
+
+    @staticmethod
+    def _collapse_duplicates(combined: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Quita los chunks marcados en la ingesta como casi duplicados (metadata duplicate_of,
+        DEDUP_MODE "link") cuyo original ya está entre los candidatos, o que repiten el
+        original de otro duplicado anterior: cada texto llega una sola vez al prompt.
+        """
+        ids = {c.get("id") for c in combined}
+        seen = set()
+        collapsed = []
+        for chunk in combined:
+            original = (chunk.get("metadata") or {}).get("duplicate_of")
+            if original:
+                if original in ids or original in seen:
+                    continue
+                seen.add(original)
+            collapsed.append(chunk)
+        return collapsed
+
+    @staticmethod
+    def _diversify(
+        vector_service: VectorStore,
+        query: str,
+        combined: List[Dict[str, Any]],
+        bot_config: BotConfig
+    ) -> List[Dict[str, Any]]:
+        """
+        MMR sobre los embeddings de los candidatos: hasta max_sources chunks, sin los vecinos
+        casi idénticos que deja el overlap del troceo. Registra los caracteres de prompt
+        ahorrados frente a los max_sources primeros candidatos (registry.mmr_stats).
+        """
+        from app.core.registry import registry
+        from app.services.mmr import mmr_select
+
+        fetched = vector_service.get_chunks([c["id"] for c in combined if c.get("id")], include_embeddings=True)
+        embeddings = dict(zip(fetched["ids"], fetched["embeddings"]))
+        candidates = [c for c in combined if c.get("id") in embeddings]
+        if not candidates:
+            return combined[:bot_config.max_sources]
+
+        selected = mmr_select(
+            vector_service.query_embedder.embed_query(query),
+            np.asarray([embeddings[c["id"]] for c in candidates], dtype=np.float32),
+            k=bot_config.max_sources,
+            lambda_mult=bot_config.mmr_lambda,
+            max_similarity=settings.MMR_DUPLICATE_SIMILARITY
+        )
+        diversified = [candidates[i] for i in selected]
+
+        registry.mmr_stats.record(
+            candidates=len(combined),
+            selected=len(diversified),
+            chars_baseline=sum(len(c["text"]) for c in combined[:bot_config.max_sources]),
+            chars_selected=sum(len(c["text"]) for c in diversified)
+        )
+        return diversified
+
+    @staticmethod
+    def variant(query: str, bot_id: str, bot_config: Optional[BotConfig]) -> Optional[str]:
+        """Variante A/B del top-k adaptativo para esta pregunta ("adaptive" / "control"), None si el bot no lo usa"""
+        if bot_config is None or not bot_config.adaptive_k:
+            return None
+        return variant_for(bot_id, query, bot_config.adaptive_traffic)
+
+    def _adapt(
+        self,
+        query: str,
+        bot_id: str,
+        combined: List[Dict[str, Any]],
+        bot_config: Optional[BotConfig]
+    ) -> List[Dict[str, Any]]:
         """
+        Recorte a max_sources y top-k adaptativo (BotConfig.adaptive_k): en la variante
+        adaptive corta en el codo de los scores o al llenar adaptive_char_budget; registra
+        ambas variantes en registry.adaptive_k_stats para comparar chunks y caracteres de prompt.
+        """
+        if bot_config is None:
+            return combined
+        combined = combined[:bot_config.max_sources]
+        variant = self.variant(query, bot_id, bot_config)
+        if variant is None or not combined:
+            return combined
+        from app.core.registry import registry
+
+        kept, reason = len(combined), None
+        if variant == ADAPTIVE:
+            kept, reason = adaptive_cut(
+                [chunk_score(c) for c in combined],
+                [len(c["text"]) for c in combined],
+                gap=bot_config.adaptive_gap,
+                char_budget=bot_config.adaptive_char_budget,
+                min_keep=bot_config.adaptive_min_sources
+            )
+        registry.adaptive_k_stats.record(
+            variant,
+            candidates=len(combined),
+            kept=kept,
+            chars_candidates=sum(len(c["text"]) for c in combined),
+            chars_kept=sum(len(c["text"]) for c in combined[:kept]),
+            reason=reason
+        )
+        return combined[:kept]
+
+    @staticmethod
+    def _rerank(query: str, combined: List[Dict[str, Any]], bot_config: BotConfig) -> List[Dict[str, Any]]:
+        from app.core.registry import registry
+        return registry.reranker.rerank(
+            query,
+            combined,
+            top_n=bot_config.max_sources,
+            budget_ms=settings.RERANK_BUDGET_MS or None
+        )
+
+    def _vector_search(
+        self,
+        vector_service: VectorStore,
+        query: str,
+        bot_id: str,
+        k: int,
+        threshold: Optional[float],
+        where: Optional[dict] = None
+    ) -> List[Dict[str, Any]]:
         # Buscar en ChromaDB
-        results = self.vector_service.query(query_text=query, n_results=k, bot_id=bot_id)
+        results = vector_service.query(query_text=query, n_results=k, bot_id=bot_id, where=where)
+        return self._vector_chunks(vector_service, results, threshold)
 
+    @staticmethod
+    def _vector_chunks(
+        vector_service: VectorStore,
+        results: dict,
+        threshold: Optional[float]
+    ) -> List[Dict[str, Any]]:
         # Chroma devuelve listas paralelas, las unimos
+        ids = results.get("ids", [[]])[0]
         documents = results.get("documents", [[]])[0]
         metadatas = results.get("metadatas", [[]])[0]
         distances = results.get("distances", [[]])[0]
@@ -54,13 +331,15 @@ class RetrieverService:
         for i, doc in enumerate(documents):
             # Convertir distancia a similarity score
             distance = distances[i] if i < len(distances) else 1.0
-            similarity = self.distance_to_similarity(distance)
+            similarity = vector_service.similarity(distance)
 
-            # Filtrar por threshold si está definido
+            # Filtrar por threshold si está definido.
+            # Chroma devuelve los resultados ordenados por distancia: el resto tampoco lo cumple
             if threshold is not None and similarity < threshold:
-                continue
+                break
 
             combined.append({
+                "id": ids[i] if i < len(ids) else None,
                 "text": doc,
                 "metadata": metadatas[i] if i < len(metadatas) else {},
                 "distance": distance,
@@ -68,3 +347,126 @@ class RetrieverService:
             })
 
         return combined
+
+    @staticmethod
+    def _hybrid_candidates(k: int) -> int:
+        """Candidatos de cada etapa (vectorial y BM25) en la búsqueda híbrida"""
+        return max(k * 2, settings.HYBRID_CANDIDATES)
+
+    def _hybrid_search(
+        self,
+        vector_service: VectorStore,
+        query: str,
+        bot_id: str,
+        k: int,
+        threshold: Optional[float],
+        bot_config: BotConfig,
+        results: Optional[dict] = None,
+        where: Optional[dict] = None,
+        scope_doc_ids: Optional[set] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Búsqueda vectorial + BM25 fusionadas (RRF o scores ponderados, según el bot).
+
+        El threshold se aplica a la similitud vectorial, salvo para los chunks que
+        BM25 encontró: una coincidencia exacta de palabras clave no se descarta
+        por tener un embedding lejano.
+        results: etapa vectorial ya resuelta (search_many la hace para todas las preguntas juntas).
+        where: alcance de documentos; la etapa vectorial lo aplica en el índice y BM25 (índice
+        por bot, sin metadata) solo puntúa los documentos que lo cumplen (scope_doc_ids, si
+        ya se calcularon), así el filtro no le quita lugares a su top-k.
+        """
+        from app.core.registry import registry
+
+        n_candidates = self._hybrid_candidates(k)
+
+        # etapa vectorial
+        if results is None:
+            results = vector_service.query(query_text=query, n_results=n_candidates, bot_id=bot_id, where=where)
+        candidates: Dict[str, Dict[str, Any]] = {}
+        for chunk_id, doc, metadata, distance in zip(
+            results.get("ids", [[]])[0],
+            results.get("documents", [[]])[0],
+            results.get("metadatas", [[]])[0],
+            results.get("distances", [[]])[0]
+        ):
+            candidates[chunk_id] = {
+                "id": chunk_id,
+                "text": doc,
+                "metadata": metadata,
+                "distance": distance,
+                "similarity": vector_service.similarity(distance),
+            }
+        vector_ranking = list(candidates)
+
+        # etapa léxica
+        if where and scope_doc_ids is None:
+            scope_doc_ids = vector_service.matching_doc_ids(bot_id, where)
+        lexical = registry.lexical_indexes.get(bot_id).search(
+            query, limit=n_candidates, doc_ids=scope_doc_ids
+        )
+        lexical_scores = dict(lexical)
+
+        # los chunks que solo encontró BM25 se completan desde el vector store,
+        # con su similitud real (producto punto: los vectores están normalizados)
+        missing = [chunk_id for chunk_id, _ in lexical if chunk_id not in candidates]
+        if missing:
+            fetched = vector_service.get_chunks(missing, include_embeddings=True)
+            query_embedding = vector_service.query_embedder.embed_query(query)
+            similarities = np.asarray(fetched['embeddings'], dtype=np.float32) @ query_embedding
+            for chunk_id, doc, metadata, similarity in zip(
+                fetched['ids'], fetched['documents'], fetched['metadatas'], similarities
+            ):
+                if where and not matches_where(metadata or {}, where):
+                    continue
+                similarity = max(0.0, min(1.0, float(similarity)))
+                candidates[chunk_id] = {
+                    "id": chunk_id,
+                    "text": doc,
+                    "metadata": metadata,
+                    "distance": None,
+                    "similarity": similarity,
+                }
+
+        if where:
+            # fuera del alcance: no compiten en la fusión
+            lexical = [(chunk_id, score) for chunk_id, score in lexical if chunk_id in candidates]
+            lexical_scores = dict(lexical)
+
+        # fusión
+        if bot_config.fusion_method == "weighted":
+            max_lexical = max(lexical_scores.values(), default=0.0) or 1.0
+            weight = bot_config.hybrid_vector_weight
+            fused = {
+                chunk_id: weight * c["similarity"] + (1 - weight) * lexical_scores.get(chunk_id, 0.0) / max_lexical
+                for chunk_id, c in candidates.items()
+            }
+        else:
+            rrf_k = settings.HYBRID_RRF_K
+            fused = dict.fromkeys(candidates, 0.0)
+            for ranking in (vector_ranking, [chunk_id for chunk_id, _ in lexical]):
+                for rank, chunk_id in enumerate(ranking):
+                    if chunk_id in fused:
+                        fused[chunk_id] += 1.0 / (rrf_k + rank + 1)
+
+        combined = []
+        for chunk_id in sorted(fused, key=fused.get, reverse=True):
+            candidate = candidates[chunk_id]
+            if threshold is not None and candidate["similarity"] < threshold and chunk_id not in lexical_scores:
+                continue
+            combined.append({
+                **candidate,
+                "similarity": round(candidate["similarity"], 3),
+                "lexical_score": round(lexical_scores.get(chunk_id, 0.0), 3),
+                "fusion_score": round(fused[chunk_id], 4),
+            })
+            if len(combined) == k:
+                break
+
+        return combined
+
+
+# Factory
+def get_retriever_service() -> RetrieverService:
+    """Crea un RetrieverService sobre los recursos compartidos del registro"""
+    return RetrieverService()
@@ -1,113 +1,203 @@
-import chromadb
-from chromadb.config import Settings
+import time
+import uuid
+
+import numpy as np
+
 from app.services.embedding_service import EmbeddingService
+from app.services.vector_store import (  # noqa: F401 (reexportados)
+    DISTANCE_SPACES,
+    VectorStore,
+    configured_space,
+    distance_to_similarity,
+)
+
 
-class VectorService:
+def _to_chroma(embeddings: np.ndarray) -> list[list[float]]:
     """
-    Encapsula ChromaDB.
-    Usamos una sola colección por ahora (luego podemos separar por bot_id).
+    chromadb 0.5.x solo acepta listas en add/query (validate_embeddings).
+    Es la única conversión del pipeline: hasta aquí todo viaja como matriz float32.
     """
-    def __init__(self, collection_name: str = "chatbot_docs"):
-        self.embedding_service = EmbeddingService()
-        self.client = chromadb.PersistentClient(
-            path="chroma_db",  # carpeta donde guarda la data
-            settings=Settings()
-        )
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name
-        )
+    return np.asarray(embeddings, dtype=np.float32).tolist()
+
 
-    def add_document_chunks(self, doc_id: str, chunks: list[str], metadata: dict | None = None):
-        # generamos ids únicos por chunk
-        ids = [f"{doc_id}_{i}" for i in range(len(chunks))]
-        embeddings = self.embedding_service.embed(chunks)
-
-        metadatas = []
-        for i, c in enumerate(chunks):
-            md = {"doc_id": doc_id}
-            if metadata:
-                md.update(metadata)
-            metadatas.append(md)
-
-        self.collection.add(
-            ids=ids,
-            documents=chunks,
-            embeddings=embeddings,
-            metadatas=metadatas
+def _chroma_where(where: dict | None) -> dict | None:
+    """
+    Filtro plano de VectorStore en la sintaxis de Chroma: un operador por condición
+    y varias condiciones dentro de $and
+    """
+    if not where:
+        return None
+    conditions = []
+    for key, value in where.items():
+        if isinstance(value, dict):
+            conditions.extend({key: {name: bound}} for name, bound in value.items())
+        else:
+            conditions.append({key: value})
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+class VectorService(VectorStore):
+    """
+    Backend ChromaDB de VectorStore (VECTOR_STORE_BACKEND = "chroma").
+    Una colección por modelo de embeddings y partición (ver app.core.registry.collection_name_for_model).
+    En colecciones compartidas los bots se separan por bot_id; una colección de un solo bot
+    (partición "bot:<bot_id>") se consulta sin filtro, sobre su propio índice HNSW.
+    El cliente de Chroma viene del registro del proceso.
+
+    Varios procesos (workers de uvicorn, scripts de migración) pueden abrir el mismo CHROMA_PATH:
+    cada escritura deja una versión nueva en la metadata de la colección y las consultas la
+    revisan cada CHROMA_SYNC_INTERVAL_S segundos; si otro proceso escribió, se descartan los
+    índices exactos, BM25 y de duplicados en memoria (como PgVectorStore.sync).
+    Chroma no tiene un incremento atómico: dos escrituras simultáneas de procesos distintos
+    pueden dejar la misma versión, y la segunda se ve en la escritura siguiente.
+    """
+    def __init__(
+        self,
+        collection_name: str = "chatbot_docs",
+        embedding_service: EmbeddingService | None = None,
+        client=None,
+        query_embedder=None,
+        document_embedder=None,
+        model_name: str | None = None,
+        partition: str | None = None,
+        space: str | None = None
+    ):
+        super().__init__(
+            embedding_service=embedding_service,
+            query_embedder=query_embedder,
+            document_embedder=document_embedder,
+            model_name=model_name,
+            partition=partition
         )
+        if client is None:
+            from app.core.registry import registry
+            client = registry.chroma_client
+
+        from app.core.config import settings
+
+        self.client = client
+        self.settings = settings
+        self.collection = self._open_collection(collection_name, space or configured_space())
+        metadata = self.collection.metadata or {}
+        # colecciones creadas antes de configurar el espacio usan el de Chroma por defecto (l2)
+        self.space = metadata.get("space") or metadata.get("hnsw:space") or "l2"
+        self._version = metadata.get("version")
+        self._synced_at = time.monotonic()
 
-    def query(self, query_text: str, n_results: int = 4, bot_id: str | None = None):
+    @property
+    def name(self) -> str:
+        return self.collection.name
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def _open_collection(self, name: str, space: str):
         """
-        Busca chunks similares en la colección.
-        Si se proporciona bot_id, filtra solo los documentos de ese bot.
+        Abre la colección o la crea con su metadata (modelo, partición y espacio de distancia).
+        No se usa get_or_create con metadata: la reemplazaría en colecciones existentes.
         """
-        query_embedding = self.embedding_service.embed([query_text])[0]
-
-        # Preparar filtro si bot_id está presente
-        where_filter = {"bot_id": bot_id} if bot_id else None
+        try:
+            return self.client.get_collection(name=name, embedding_function=None)
+        except ValueError:
+            # "space" replica hnsw:space: Chroma lo quita de la metadata visible en cada modify
+            metadata = {"embedding_model": self.model_name or "", "hnsw:space": space, "space": space}
+            if self.partition:
+                metadata["partition"] = self.partition
+            return self.client.get_or_create_collection(name=name, metadata=metadata, embedding_function=None)
+
+    def _check_dimension(self, dimension: int):
+        """
+        Registra modelo y dimensión en la metadata de la colección en el primer add
+        y rechaza vectores de otra dimensión (p. ej. si se cambió el modelo sin migrar).
+        """
+        # Chroma rechaza modify con claves hnsw:* (no permite cambiar el espacio de distancia)
+        metadata = {k: v for k, v in (self.collection.metadata or {}).items() if not k.startswith("hnsw:")}
+        expected = metadata.get("dimension")
+        if expected is None:
+            metadata.update({"dimension": int(dimension), "embedding_model": self.model_name or ""})
+            self.collection.modify(metadata=metadata)
+        elif int(expected) != int(dimension):
+            raise ValueError(
+                f"La colección {self.collection.name} guarda vectores de dimensión {expected}, "
+                f"pero el modelo {self.model_name} produce {dimension}"
+            )
+
+    # --- Versión (coherencia entre procesos) -------------------------------
+
+    def _stored_metadata(self) -> dict:
+        """Metadata actual de la colección (la de self.collection es la leída al abrirla)"""
+        return self.client.get_collection(name=self.name, embedding_function=None).metadata or {}
+
+    def _bump_version(self):
+        metadata = {k: v for k, v in self._stored_metadata().items() if not k.startswith("hnsw:")}
+        previous = metadata.get("version")
+        metadata["version"] = uuid.uuid4().hex
+        self.collection.modify(metadata=metadata)
+        # si nadie más escribió desde la última lectura, los índices locales siguen al día
+        if previous == self._version:
+            self._version = metadata["version"]
+
+    def sync(self):
+        """Descarta los índices en memoria y los resultados cacheados si otro proceso modificó la colección"""
+        now = time.monotonic()
+        if now - self._synced_at < self.settings.CHROMA_SYNC_INTERVAL_S:
+            return
+        self._synced_at = now
+        version = self._stored_metadata().get("version")
+        if version != self._version:
+            self._version = version
+            self._invalidate_local_state()
+
+    # --- Operaciones de VectorStore ----------------------------------------
+
+    def _write(self, ids: list[str], documents: list[str], embeddings: np.ndarray, metadatas: list[dict]):
+        # Chroma limita el tamaño de cada add: escribimos por lotes, en orden
+        batch_size = getattr(self.client, "max_batch_size", 5000) or 5000
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                embeddings=_to_chroma(embeddings[start:end]),
+                metadatas=metadatas[start:end]
+            )
+        self._bump_version()
+
+    def _search(self, query_embedding: np.ndarray, n_results: int, where: dict | None) -> dict:
+        return self.collection.query(
+            query_embeddings=_to_chroma(query_embedding[None, :]),
+            n_results=n_results,
+            where=_chroma_where(where)
+        )
 
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
+    def _search_many(self, query_embeddings: np.ndarray, n_results: int, where: dict | None) -> dict:
+        # Chroma acepta varias query_embeddings en una sola llamada
+        return self.collection.query(
+            query_embeddings=_to_chroma(query_embeddings),
             n_results=n_results,
-            where=where_filter
+            where=_chroma_where(where)
         )
-        return results
 
-    def update_document_bot_id(self, doc_id: str, new_bot_id: str):
-        """
-        Actualiza el bot_id de todos los chunks de un documento.
-        Usado para mover documentos entre bots.
-        """
-        # Obtener todos los chunks del documento
-        results = self.collection.get(where={"doc_id": doc_id})
-
-        if not results['ids']:
-            raise ValueError(f"Documento {doc_id} no encontrado")
-
-        # Actualizar metadata de cada chunk
-        ids = results['ids']
-        metadatas = results['metadatas']
-
-        # Actualizar bot_id en cada metadata
-        updated_metadatas = []
-        for metadata in metadatas:
-            updated_metadata = metadata.copy()
-            updated_metadata['bot_id'] = new_bot_id
-            updated_metadatas.append(updated_metadata)
-
-        # Actualizar en ChromaDB
-        self.collection.update(
-            ids=ids,
-            metadatas=updated_metadatas
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")) -> dict:
+        return self.collection.get(
+            ids=ids, where=_chroma_where(where), limit=limit, offset=offset, include=list(include)
         )
 
-    def delete_by_doc_id(self, doc_id: str):
-        """Elimina todos los chunks de un documento específico."""
-        self.collection.delete(where={"doc_id": doc_id})
-
-    def delete_by_bot_id(self, bot_id: str):
-        """Elimina todos los documentos de un bot específico."""
-        self.collection.delete(where={"bot_id": bot_id})
-
-    def list_documents(self, bot_id: str | None = None):
-        """Lista todos los documentos, opcionalmente filtrados por bot_id."""
-        where_filter = {"bot_id": bot_id} if bot_id else None
-        results = self.collection.get(where=where_filter)
-
-        # Agrupar por doc_id para obtener lista única de documentos
-        doc_ids = set()
-        documents = []
-
-        if results and results.get('metadatas'):
-            for metadata in results['metadatas']:
-                doc_id = metadata.get('doc_id')
-                if doc_id and doc_id not in doc_ids:
-                    doc_ids.add(doc_id)
-                    documents.append({
-                        'doc_id': doc_id,
-                        'bot_id': metadata.get('bot_id'),
-                        'filename': metadata.get('filename'),
-                        'uploaded_at': metadata.get('uploaded_at')
-                    })
-
-        return documents
+    def _update_metadatas(self, ids: list[str], metadatas: list[dict]):
+        self.collection.update(ids=ids, metadatas=metadatas)
+        self._bump_version()
+
+    def _set_bot_id(self, ids: list[str], bot_id: str):
+        # update de Chroma combina la metadata nueva con la existente: basta con el campo que cambia
+        self.collection.update(ids=ids, metadatas=[{"bot_id": bot_id}] * len(ids))
+        self._bump_version()
+
+    def _delete(self, where: dict | None = None, ids: list[str] | None = None):
+        self.collection.delete(ids=ids, where=_chroma_where(where))
+        self._bump_version()
+
+    def drop(self):
+        self.client.delete_collection(self.collection.name)
+        self.documents.delete(self.name)
+        if self.exact_indexes is not None:
+            self.exact_indexes.clear()
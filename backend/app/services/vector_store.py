@@ -0,0 +1,558 @@
+"""
+Interfaz común de los almacenes vectoriales (VECTOR_STORE_BACKEND).
+- VectorService (app.services.vector_service): ChromaDB local, una colección por modelo y partición
+- PgVectorStore (app.services.pgvector_store): tablas pgvector en Postgres, compartidas entre nodos
+
+Cada backend implementa las operaciones primitivas (escribir, buscar, leer, actualizar
+metadata, borrar); el resto del pipeline (ingesta, movimientos, índices exacto y léxico)
+se escribe una sola vez aquí, contra esa interfaz.
+"""
+import operator
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable
+
+import numpy as np
+
+DISTANCE_SPACES = ("cosine", "ip", "l2")
+
+# metadata propia de cada chunk (no del documento): no se copia de un chunk a los demás
+CHUNK_METADATA_KEYS = ("duplicate_of",)
+
+# operadores de rango de los filtros where (sobre campos numéricos de la metadata)
+RANGE_OPERATORS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+
+def distance_to_similarity(distance: float, space: str = "l2") -> float:
+    """
+    Convierte la distancia del índice en similitud coseno (0.0-1.0) según su espacio.
+    Los embeddings están normalizados (L2), así que las tres métricas dan el mismo score:
+    - cosine: distance = 1 - cos
+    - ip:     distance = 1 - <a, b> = 1 - cos
+    - l2:     distancia euclidiana al cuadrado = 2 - 2·cos (la que devuelve Chroma)
+    """
+    similarity = 1.0 - distance / 2 if space == "l2" else 1.0 - distance
+    return max(0.0, min(1.0, similarity))
+
+
+def configured_space() -> str:
+    """Espacio de distancia de las colecciones nuevas (CHROMA_DISTANCE)"""
+    from app.core.config import settings
+
+    space = settings.CHROMA_DISTANCE.lower()
+    if space not in DISTANCE_SPACES:
+        raise ValueError(f"CHROMA_DISTANCE debe ser uno de {DISTANCE_SPACES}, no '{settings.CHROMA_DISTANCE}'")
+    return space
+
+
+def embed_queries(embedder, texts: list[str]) -> np.ndarray:
+    """Matriz (n, dim) de varias consultas; usa embed_queries del embedder si lo tiene"""
+    if hasattr(embedder, "embed_queries"):
+        return np.asarray(embedder.embed_queries(texts), dtype=np.float32)
+    return np.stack([np.asarray(embedder.embed_query(text), dtype=np.float32) for text in texts])
+
+
+def to_epoch(value: str | datetime) -> float:
+    """Fecha ISO (o datetime) en segundos epoch: los filtros de rango necesitan un número"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def merge_where(*filters: dict | None) -> dict | None:
+    """Une filtros where (todas las condiciones deben cumplirse)"""
+    where = {}
+    for condition in filters:
+        where.update(condition or {})
+    return where or None
+
+
+def matches_where(metadata: dict, where: dict | None) -> bool:
+    """Evalúa un filtro where sobre la metadata de un chunk (índice exacto, candidatos de BM25)"""
+    for key, condition in (where or {}).items():
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        if "$in" in condition and value not in condition["$in"]:
+            return False
+        for name, bound in condition.items():
+            if name in RANGE_OPERATORS and not (
+                isinstance(value, (int, float)) and RANGE_OPERATORS[name](value, bound)
+            ):
+                return False
+    return True
+
+
+class VectorStore(ABC):
+    """
+    Chunks de documentos con su embedding y metadata (doc_id, bot_id, filename, ...),
+    en una colección por modelo de embeddings y partición.
+
+    Los resultados de get/query tienen la forma de Chroma
+    ({"ids", "documents", "metadatas", "embeddings"} y, en query, listas por consulta
+    con "distances"), así los servicios no dependen del backend.
+    Los filtros `where` son un dict plano campo -> condición, todas obligatorias:
+    igualdad ({"bot_id": ...}), pertenencia a una lista ({"doc_id": {"$in": [...]}})
+    o rango numérico ({"uploaded_at_ts": {"$gte": ..., "$lt": ...}}).
+
+    El modelo se resuelve perezosamente: listar, borrar o mover documentos no lo carga.
+    query_embedder (opcional) embebe las consultas, p. ej. el EmbeddingScheduler.
+    document_embedder (opcional) embebe los chunks en la ingesta, p. ej. el CachedDocumentEmbedder.
+
+    Las consultas de bots con hasta EXACT_INDEX_MAX_CHUNKS chunks se responden con un
+    índice exacto en proceso (ver app.services.exact_index); el almacén sigue siendo la
+    fuente de verdad y su ANN se usa para los bots más grandes.
+    """
+
+    # True si el backend actualiza el registro de documentos en la misma transacción que los chunks
+    transactional_documents = False
+
+    def __init__(
+        self,
+        embedding_service=None,
+        query_embedder=None,
+        document_embedder=None,
+        model_name: str | None = None,
+        partition: str | None = None
+    ):
+        self.model_name = model_name or (embedding_service.model_name if embedding_service else None)
+        self._embedding_service = embedding_service
+        self._query_embedder = query_embedder or embedding_service
+        self._document_embedder = document_embedder or embedding_service
+        self.partition = partition
+        # en colecciones de un solo bot (partición "bot:<bot_id>") el filtro por bot_id sobra
+        self.bot_scoped = bool(partition and partition.startswith("bot:"))
+        self.space = "l2"
+        self._exact_indexes = None
+        self._documents = None
+
+    # --- Operaciones de cada backend ---------------------------------------
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Nombre de la colección (o tabla) en el backend"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Cantidad de chunks de la colección"""
+
+    @abstractmethod
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: Iterable[str] = ("documents", "metadatas")
+    ) -> dict:
+        """Chunks por id o por filtro de metadata, paginados"""
+
+    @abstractmethod
+    def _check_dimension(self, dimension: int):
+        """Registra la dimensión en el primer add y rechaza vectores de otra dimensión"""
+
+    @abstractmethod
+    def _write(self, ids: list[str], documents: list[str], embeddings: np.ndarray, metadatas: list[dict]):
+        """Escribe chunks ya embebidos (matriz float32), por lotes"""
+
+    @abstractmethod
+    def _search(self, query_embedding: np.ndarray, n_results: int, where: dict | None) -> dict:
+        """top-k por el índice ANN del backend"""
+
+    def _search_many(self, query_embeddings: np.ndarray, n_results: int, where: dict | None) -> dict:
+        """top-k de varias consultas (matriz (n, dim)); por defecto una búsqueda por fila"""
+        merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query_embedding in query_embeddings:
+            results = self._search(query_embedding, n_results, where)
+            for key in merged:
+                merged[key].extend(results.get(key) or [[]])
+        return merged
+
+    @abstractmethod
+    def _update_metadatas(self, ids: list[str], metadatas: list[dict]):
+        """Reemplaza la metadata de los chunks indicados"""
+
+    @abstractmethod
+    def _set_bot_id(self, ids: list[str], bot_id: str):
+        """Cambia solo el bot_id de los chunks indicados (el resto de la metadata se conserva)"""
+
+    @abstractmethod
+    def _delete(self, where: dict | None = None, ids: list[str] | None = None):
+        """Borra chunks por filtro o por id"""
+
+    @abstractmethod
+    def drop(self):
+        """Elimina la colección completa"""
+
+    # --- Recursos compartidos ----------------------------------------------
+
+    @property
+    def embedding_service(self):
+        if self._embedding_service is None:
+            from app.core.registry import registry
+            self._embedding_service = registry.get_embedding_service(self.model_name)
+        return self._embedding_service
+
+    @property
+    def query_embedder(self):
+        if self._query_embedder is None:
+            from app.core.registry import registry
+            self._query_embedder = registry.get_query_embedder(self.model_name)
+        return self._query_embedder
+
+    @property
+    def document_embedder(self):
+        if self._document_embedder is None:
+            from app.core.registry import registry
+            self._document_embedder = registry.get_document_embedder(self.model_name)
+        return self._document_embedder
+
+    @property
+    def exact_indexes(self):
+        """Índices exactos por bot de esta colección (None si EXACT_INDEX_MAX_CHUNKS = 0)"""
+        from app.core.config import settings
+
+        if self._exact_indexes is None and settings.EXACT_INDEX_MAX_CHUNKS > 0:
+            from app.services.exact_index import ExactIndexStore
+            self._exact_indexes = ExactIndexStore(
+                directory=os.path.join(settings.EXACT_INDEX_DIR, self.name),
+                max_chunks=settings.EXACT_INDEX_MAX_CHUNKS,
+                list_ids=lambda bot_id: self.get(where=self._bot_filter(bot_id), include=[])['ids'],
+                load_chunks=lambda bot_id: self.iter_chunks(where=self._bot_filter(bot_id))
+            )
+        return self._exact_indexes
+
+    @property
+    def documents(self):
+        """Registro de documentos del backend (ver app.services.document_registry)"""
+        if self._documents is None:
+            from app.core.registry import registry
+            self._documents = registry.document_registry
+        return self._documents
+
+    def _refresh_documents(self, doc_ids: Iterable[str]):
+        """Recalcula las filas del registro de estos documentos a partir de sus chunks"""
+        doc_ids = sorted({doc_id for doc_id in doc_ids if doc_id})
+        if self.transactional_documents or not doc_ids:
+            return
+        from app.services.document_registry import summarize_documents
+
+        metadatas = self.get(where={"doc_id": {"$in": doc_ids}}, include=["metadatas"])["metadatas"]
+        self.documents.replace(self.name, doc_ids, summarize_documents(metadatas))
+
+    def rebuild_documents(self, batch_size: int = 5000):
+        """Reconstruye el registro de documentos de la colección recorriendo la metadata de sus chunks"""
+        from app.services.document_registry import summarize_documents
+
+        documents: dict = {}
+        offset = 0
+        while True:
+            page = self.get(limit=batch_size, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            summarize_documents(page["metadatas"], documents)
+            offset += len(page["ids"])
+        self.documents.rebuild(self.name, documents)
+
+    def ensure_documents_indexed(self):
+        """Colecciones anteriores al registro: se indexan una sola vez"""
+        if not self.documents.is_synced(self.name):
+            self.rebuild_documents()
+            print(f"📇 Registro de documentos de {self.name} construido")
+
+    def _bot_filter(self, bot_id: str | None) -> dict | None:
+        # en colecciones de un solo bot el filtro sobra
+        return {"bot_id": bot_id} if bot_id and not self.bot_scoped else None
+
+    # --- Escritura ---------------------------------------------------------
+
+    def add_document_chunks(
+        self,
+        doc_id: str,
+        chunks: list[str],
+        metadata: dict | None = None,
+        positions: list[int] | None = None,
+        chunk_metadatas: list[dict] | None = None
+    ):
+        """
+        positions: posición de cada chunk en el documento (por defecto 0..n-1; la ingesta
+        con deduplicación omite las de los chunks duplicados). chunk_metadatas: metadata
+        propia de cada chunk (p. ej. duplicate_of), sobre la del documento.
+        """
+        # generamos ids únicos por chunk
+        positions = range(len(chunks)) if positions is None else positions
+        ids = [f"{doc_id}_{i}" for i in positions]
+        embeddings = self.document_embedder.embed(chunks)
+
+        metadatas = []
+        for i, c in enumerate(chunks):
+            md = {"doc_id": doc_id}
+            if metadata:
+                md.update(metadata)
+            if chunk_metadatas:
+                md.update(chunk_metadatas[i])
+            metadatas.append(md)
+
+        self.add_embeddings(ids, chunks, embeddings, metadatas)
+
+    def add_embeddings(self, ids: list[str], documents: list[str], embeddings, metadatas: list[dict]):
+        """Escribe chunks ya embebidos (ingesta, movimientos entre colecciones del mismo modelo, migraciones)"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not ids:
+            return
+        self._check_dimension(embeddings.shape[1])
+        self._write(ids, documents, embeddings, metadatas)
+        self._refresh_documents(metadata.get("doc_id") for metadata in metadatas)
+
+        if self._exact_indexes is not None:
+            by_bot: dict[str, list[int]] = {}
+            for i, metadata in enumerate(metadatas):
+                by_bot.setdefault(metadata.get("bot_id"), []).append(i)
+            for bot_id, rows in by_bot.items():
+                self._exact_indexes.append(
+                    bot_id,
+                    [ids[i] for i in rows],
+                    [documents[i] for i in rows],
+                    [metadatas[i] for i in rows],
+                    embeddings[rows]
+                )
+
+    def update_document_bot_id(self, doc_id: str, new_bot_id: str):
+        """
+        Actualiza el bot_id de todos los chunks de un documento.
+        Usado para mover documentos entre bots.
+        """
+        ids = self.get(where={"doc_id": doc_id}, include=[])['ids']
+        if not ids:
+            raise ValueError(f"Documento {doc_id} no encontrado")
+        self.set_bot_id(ids, new_bot_id)
+
+    def set_bot_id(self, ids: list[str], new_bot_id: str):
+        """
+        Cambia solo el campo bot_id de estos chunks (sin leer ni reescribir textos,
+        vectores ni el resto de la metadata). Los movimientos masivos lo llaman por páginas de ids.
+        """
+        if not ids:
+            return
+        self._set_bot_id(ids, new_bot_id)
+        # ids "<doc_id>_<posición>" (ver add_document_chunks)
+        doc_ids = {chunk_id.rsplit("_", 1)[0] for chunk_id in ids}
+        self._refresh_documents(doc_ids)
+
+        if self._exact_indexes is not None:
+            for doc_id in doc_ids:
+                self._exact_indexes.invalidate(doc_id=doc_id)
+            self._exact_indexes.invalidate(bot_id=new_bot_id)
+
+    def update_chunk_metadatas(self, ids: list[str], metadatas: list[dict]):
+        """
+        Reescribe la metadata completa de estos chunks (sin tocar textos ni vectores).
+        Chroma combina la metadata con la existente y no permite borrar claves: para
+        "quitar" un campo se escribe vacío (p. ej. duplicate_of = "").
+        """
+        if not ids:
+            return
+        self._update_metadatas(ids, metadatas)
+        if self._exact_indexes is not None:
+            # los índices exactos guardan la metadata de sus chunks
+            for doc_id in {metadata.get("doc_id") for metadata in metadatas}:
+                self._exact_indexes.invalidate(doc_id=doc_id)
+
+    def backfill_upload_epochs(self, batch_size: int = 1000) -> int:
+        """
+        Agrega uploaded_at_ts (epoch de uploaded_at) a los chunks indexados antes de que la
+        ingesta lo guardara, para que los filtros por fecha los incluyan. Devuelve cuántos actualizó.
+        """
+        updated = 0
+        for page in self.iter_chunks(batch_size=batch_size, include_embeddings=False):
+            ids, metadatas = [], []
+            for chunk_id, metadata in zip(page['ids'], page['metadatas']):
+                if metadata.get("uploaded_at") and "uploaded_at_ts" not in metadata:
+                    ids.append(chunk_id)
+                    metadatas.append({**metadata, "uploaded_at_ts": to_epoch(metadata["uploaded_at"])})
+            if ids:
+                # las actualizaciones no cambian qué chunks hay: la paginación por offset sigue siendo válida
+                self._update_metadatas(ids, metadatas)
+                updated += len(ids)
+        if updated and self._exact_indexes is not None:
+            # los índices exactos guardan la metadata: se reconstruyen con el campo nuevo
+            self._exact_indexes.clear()
+        return updated
+
+    def delete_by_doc_id(self, doc_id: str):
+        """Elimina todos los chunks de un documento específico."""
+        self._delete(where={"doc_id": doc_id})
+        self._refresh_documents([doc_id])
+        if self._exact_indexes is not None:
+            self._exact_indexes.invalidate(doc_id=doc_id)
+
+    def delete_chunks(self, ids: list[str]):
+        """Elimina chunks por id (p. ej. los ya copiados a otra colección en una migración)."""
+        if not ids:
+            return
+        doc_ids = []
+        if not self.transactional_documents:
+            doc_ids = [metadata.get("doc_id") for metadata in self.get(ids=ids, include=["metadatas"])["metadatas"]]
+        self._delete(ids=ids)
+        self._refresh_documents(doc_ids)
+        if self._exact_indexes is not None:
+            self._exact_indexes.invalidate()
+
+    def delete_by_bot_id(self, bot_id: str):
+        """Elimina todos los documentos de un bot específico."""
+        self._delete(where={"bot_id": bot_id})
+        if not self.transactional_documents:
+            self.documents.delete(self.name, bot_id=bot_id)
+        self.documents.delete_links(self.name, bot_id=bot_id)
+        if self._exact_indexes is not None:
+            self._exact_indexes.invalidate(bot_id=bot_id)
+
+    # --- Lectura -----------------------------------------------------------
+
+    def similarity(self, distance: float) -> float:
+        """Similitud coseno (0.0-1.0) de una distancia devuelta por esta colección"""
+        return distance_to_similarity(distance, self.space)
+
+    def sync(self):
+        """Descarta el estado en memoria si otro proceso modificó la colección (cada backend sabe cómo verlo)"""
+
+    def _invalidate_local_state(self):
+        """
+        Descarta lo que este proceso guarda de la colección: índices exactos, BM25 y de
+        duplicados de sus bots, y los resultados cacheados (se reconstruyen al próximo uso)
+        """
+        if self._exact_indexes is not None:
+            self._exact_indexes.invalidate()
+        from app.core.registry import registry
+        if self.bot_scoped:
+            bot_id = self.partition.split(":", 1)[1]
+            registry.lexical_indexes.drop(bot_id)
+            registry.dedup_indexes.drop(bot_id)
+            registry.bump_bot_version(bot_id)
+        else:
+            registry.lexical_indexes.clear()
+            registry.dedup_indexes.clear()
+            registry.bump_all_bot_versions()
+
+    def query(self, query_text: str, n_results: int = 4, bot_id: str | None = None, where: dict | None = None):
+        """
+        Busca chunks similares en la colección.
+        Si se proporciona bot_id, filtra solo los documentos de ese bot
+        (salvo en colecciones de un solo bot, donde el filtro sobra).
+        where: filtro adicional sobre la metadata (alcance de documentos), aplicado en el índice.
+        """
+        self.sync()
+        query_embedding = self.query_embedder.embed_query(query_text)
+
+        # bots pequeños: búsqueda exacta en proceso, sin pasar por el ANN del backend
+        if bot_id and self.exact_indexes is not None:
+            exact = self.exact_indexes.query(bot_id, query_embedding, n_results, where=where)
+            if exact is not None:
+                return self._exact_results(exact)
+
+        return self._search(query_embedding, n_results, merge_where(self._bot_filter(bot_id), where))
+
+    def query_many(
+        self, query_texts: list[str], n_results: int = 4, bot_id: str | None = None, where: dict | None = None
+    ) -> dict:
+        """
+        Como query, para varias consultas a la vez: un solo pase del encoder y una sola
+        búsqueda en el backend (o un producto matriz-matriz en el índice exacto).
+        Devuelve una lista de resultados por consulta, en el mismo orden que query_texts.
+        """
+        if not query_texts:
+            return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        self.sync()
+        query_embeddings = embed_queries(self.query_embedder, query_texts)
+
+        if bot_id and self.exact_indexes is not None:
+            exact = self.exact_indexes.query_many(bot_id, query_embeddings, n_results, where=where)
+            if exact is not None:
+                merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+                for results in map(self._exact_results, exact):
+                    for key in merged:
+                        merged[key].extend(results[key])
+                return merged
+
+        return self._search_many(query_embeddings, n_results, merge_where(self._bot_filter(bot_id), where))
+
+    def _exact_results(self, exact: dict) -> dict:
+        """Resultado del índice exacto con la misma forma (y distancias) que query"""
+        scores = exact["scores"].astype(np.float64)
+        # vectores normalizados: producto punto = coseno; l2 es la euclidiana al cuadrado
+        distances = 2.0 - 2.0 * scores if self.space == "l2" else 1.0 - scores
+        return {
+            "ids": [exact["ids"]],
+            "documents": [exact["documents"]],
+            "metadatas": [exact["metadatas"]],
+            "distances": [distances.tolist()]
+        }
+
+    def get_document_chunks(self, doc_id: str) -> tuple[list[str], dict]:
+        """
+        Devuelve los textos de un documento en orden de chunk y su metadata base
+        (la del documento, sin los campos propios de cada chunk como duplicate_of).
+        """
+        results = self.get(where={"doc_id": doc_id}, include=["documents", "metadatas"])
+        if not results['ids']:
+            return [], {}
+
+        order = sorted(range(len(results['ids'])), key=lambda i: int(results['ids'][i].rsplit("_", 1)[1]))
+        chunks = [results['documents'][i] for i in order]
+        metadata = {k: v for k, v in results['metadatas'][order[0]].items() if k not in CHUNK_METADATA_KEYS}
+        return chunks, metadata
+
+    def export_document(self, doc_id: str) -> dict:
+        """Chunks de un documento con sus vectores, para copiarlo a otra colección del mismo modelo"""
+        results = self.get(where={"doc_id": doc_id}, include=["documents", "metadatas", "embeddings"])
+        return {
+            "ids": results['ids'],
+            "documents": results['documents'],
+            "metadatas": results['metadatas'],
+            "embeddings": np.asarray(results['embeddings'], dtype=np.float32)
+        }
+
+    def iter_chunks(self, batch_size: int = 1000, include_embeddings: bool = True, where: dict | None = None):
+        """Recorre la colección (o los chunks que cumplen `where`) por páginas"""
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        offset = 0
+        while True:
+            results = self.get(where=where, limit=batch_size, offset=offset, include=include)
+            if not results['ids']:
+                break
+            yield results
+            offset += len(results['ids'])
+
+    def iter_bot_documents(self, bot_id: str):
+        """(doc_id, chunk_ids, textos) de cada documento de un bot, en orden de chunk"""
+        documents: dict[str, list[tuple[int, str, str]]] = {}
+        for page in self.iter_chunks(include_embeddings=False, where={"bot_id": bot_id}):
+            for chunk_id, text, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                position = int(chunk_id.rsplit("_", 1)[1])
+                documents.setdefault(metadata.get("doc_id"), []).append((position, chunk_id, text))
+
+        for doc_id, chunks in documents.items():
+            chunks.sort()
+            yield doc_id, [chunk_id for _, chunk_id, _ in chunks], [text for _, _, text in chunks]
+
+    def get_chunks(self, ids: list[str], include_embeddings: bool = False) -> dict:
+        """Chunks por id (candidatos que solo encontró el índice léxico)"""
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        return self.get(ids=ids, include=include)
+
+    def matching_doc_ids(self, bot_id: str, where: dict) -> set[str]:
+        """Documentos del bot con chunks que cumplen `where` (alcance de la etapa BM25)"""
+        metadatas = self.get(where=merge_where(self._bot_filter(bot_id), where), include=["metadatas"])["metadatas"]
+        return {metadata.get("doc_id") for metadata in metadatas}
+
+    def has_document(self, doc_id: str) -> bool:
+        return bool(self.get(where={"doc_id": doc_id}, limit=1, include=[])['ids'])
+
+    def list_documents(self, bot_id: str | None = None):
+        """Lista todos los documentos (con su cantidad de chunks), opcionalmente filtrados por bot_id."""
+        self.ensure_documents_indexed()
+        return self.documents.list_documents([self.name], bot_id=bot_id)["documents"]
@@ -0,0 +1,101 @@
+"""
+Benchmark de retrieval por lotes: N consultas con query (una a una) vs query_many (una llamada).
+
+Usa vectores aleatorios normalizados (sin cargar el modelo; el ahorro del encoder
+en un solo pase se mide en bench_embedding_batching.py) en una colección temporal de Chroma,
+por el ANN y por el índice exacto en proceso.
+
+Uso (desde backend/):
+    python benchmarks/bench_batch_retrieval.py --size 20000 --dim 384 --batch 32
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append('.')
+
+
+class StaticEmbedder:
+    """Devuelve vectores ya calculados, en el orden en que se piden: mide solo el vector store"""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = {f"q{i}": vector for i, vector in enumerate(vectors)}
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.vectors[text]
+
+    def embed_queries(self, texts: list[str]) -> np.ndarray:
+        return np.stack([self.vectors[text] for text in texts])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=32, help="Consultas por lote")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    import chromadb
+
+    from app.core.config import settings
+    from app.services.vector_service import VectorService
+
+    workdir = tempfile.mkdtemp()
+    settings.EXACT_INDEX_DIR = f"{workdir}/exact"
+    client = chromadb.PersistentClient(path=f"{workdir}/chroma")
+    rng = np.random.default_rng(0)
+
+    vectors = rng.standard_normal((args.size, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.batch, args.dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    texts = [f"q{i}" for i in range(args.batch)]
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: RETRIEVAL POR LOTES (query vs query_many)")
+    print(f"{'='*80}")
+    print(f"Chunks: {args.size} | Dimensión: {args.dim} | k: {args.k} | Lote: {args.batch} | Rondas: {args.rounds}\n")
+
+    for label, max_chunks in (("ANN Chroma", 0), ("índice exacto", args.size)):
+        settings.EXACT_INDEX_MAX_CHUNKS = max_chunks
+        vector_service = VectorService(
+            collection_name=f"bench-batch-{max_chunks}",
+            client=client,
+            query_embedder=StaticEmbedder(queries),
+            model_name="bench",
+            space="cosine"
+        )
+        ids = [f"doc_{i}" for i in range(args.size)]
+        for offset in range(0, args.size, 5000):
+            end = offset + 5000
+            vector_service.add_embeddings(
+                ids[offset:end], [""] * len(ids[offset:end]), vectors[offset:end],
+                [{"bot_id": "bench", "doc_id": "doc"}] * len(ids[offset:end])
+            )
+        # calentamiento (y carga del índice exacto)
+        vector_service.query_many(texts[:1], n_results=args.k, bot_id="bench")
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            looped = [vector_service.query(text, n_results=args.k, bot_id="bench")["ids"][0] for text in texts]
+        loop_ms = (time.perf_counter() - start) * 1000 / args.rounds
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            batched = vector_service.query_many(texts, n_results=args.k, bot_id="bench")["ids"]
+        batch_ms = (time.perf_counter() - start) * 1000 / args.rounds
+
+        same = sum(a == b for a, b in zip(looped, batched))
+        print(f"[{label}] bucle: {loop_ms:.1f} ms/lote | query_many: {batch_ms:.1f} ms/lote "
+              f"({loop_ms / batch_ms if batch_ms else 0:.1f}x) | resultados iguales: {same}/{args.batch}")
+
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
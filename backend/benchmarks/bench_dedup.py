@@ -0,0 +1,130 @@
+"""
+Benchmark de la deduplicación en la ingesta (MinHash + LSH) sobre un corpus redundante:
+varias versiones del mismo manual, cada una con algunos párrafos editados.
+
+Compara DEDUP_MODE=off y skip: chunks indexados, tiempo de ingesta (incluye las firmas)
+y latencia de búsqueda. Usa un embedder de hashing (sin cargar el modelo) y colecciones
+temporales de Chroma.
+
+Uso (desde backend/):
+    python benchmarks/bench_dedup.py --versions 10 --paragraphs 400 --edits 20
+"""
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath('.'))
+
+
+class HashEmbedder:
+    """Bolsa de palabras con hashing, normalizada: textos parecidos dan vectores parecidos"""
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+def manual_versions(versions: int, paragraphs: int, edits: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    vocabulary = [f"termino{i}" for i in range(5000)]
+
+    def paragraph():
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(15, 40))) + "."
+
+    base = [paragraph() for _ in range(paragraphs)]
+    texts = []
+    for _ in range(versions):
+        version = list(base)
+        for _ in range(edits):
+            version[rng.randrange(paragraphs)] = paragraph()
+        texts.append("\n".join(version))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--versions", type=int, default=10, help="Versiones del manual")
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--edits", type=int, default=20, help="Párrafos editados por versión")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+
+    import chromadb
+
+    from app.core.config import settings
+    from app.core.registry import registry
+    from app.services.document_registry import DocumentRegistry
+    from app.services.document_service import DocumentService
+    from app.services.vector_service import VectorService
+
+    settings.EXACT_INDEX_MAX_CHUNKS = 0
+    client = chromadb.PersistentClient(path=f"{workdir}/chroma")
+    embedder = HashEmbedder(args.dim)
+    texts = manual_versions(args.versions, args.paragraphs, args.edits)
+    chunked = [DocumentService._chunk_text(text, chunk_size=500, overlap=100) for text in texts]
+    queries = [chunks[len(chunks) // 2 + i % 7][:120] for i, chunks in zip(range(args.queries), chunked * args.queries)]
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: DEDUPLICACIÓN EN LA INGESTA (MinHash + LSH)")
+    print(f"{'='*80}")
+    print(f"Versiones: {args.versions} | Chunks por versión: ~{len(chunked[0])} | Párrafos editados: {args.edits}\n")
+
+    for mode in ("off", "skip"):
+        settings.DEDUP_MODE = mode
+        registry.dedup_indexes.clear()
+        vector_service = VectorService(
+            collection_name=f"bench-dedup-{mode}",
+            client=client,
+            query_embedder=embedder,
+            document_embedder=embedder,
+            model_name="bench",
+            space="cosine"
+        )
+        vector_service._documents = DocumentRegistry(f"{workdir}/documents-{mode}.sqlite3")
+        service = DocumentService(vector_service=vector_service)
+
+        start = time.perf_counter()
+        duplicates = 0
+        for i, chunks in enumerate(chunked):
+            metadata = {"bot_id": f"bench-{mode}", "filename": f"manual_v{i}.txt"}
+            duplicates += service._store_chunks(vector_service, f"bench-{mode}", f"manual{i}", chunks, metadata)["duplicates"]
+        ingest_s = time.perf_counter() - start
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            vector_service.query(query, n_results=args.k, bot_id=f"bench-{mode}")
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"[{mode:>4}] chunks indexados: {vector_service.count():>6} | duplicados omitidos: {duplicates:>6} | "
+              f"ingesta: {ingest_s:.1f} s | búsqueda p50: {statistics.median(timings):.2f} ms "
+              f"p95: {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark del listado de documentos: escaneo de la metadata de todos los chunks
+(implementación anterior de list_documents) vs el registro de documentos (SQLite).
+
+Usa vectores aleatorios (sin cargar el modelo) en una colección temporal de Chroma.
+
+Uso (desde backend/):
+    python benchmarks/bench_document_list.py --documents 2000 --chunks-per-doc 50
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append('.')
+
+
+def scan_documents(vector_service, bot_id=None):
+    """Listado anterior: metadata de todos los chunks, deduplicada en Python"""
+    results = vector_service.get(where={"bot_id": bot_id} if bot_id else None, include=["metadatas"])
+    seen, documents = set(), []
+    for metadata in results["metadatas"]:
+        if metadata["doc_id"] not in seen:
+            seen.add(metadata["doc_id"])
+            documents.append(metadata)
+    return documents
+
+
+def timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--chunks-per-doc", type=int, default=50)
+    parser.add_argument("--bots", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import chromadb
+
+    from app.services.document_registry import DocumentRegistry
+    from app.services.vector_service import VectorService
+
+    workdir = tempfile.mkdtemp()
+    client = chromadb.PersistentClient(path=f"{workdir}/chroma")
+    vector_service = VectorService(collection_name="bench-documents", client=client, model_name="bench", space="cosine")
+    vector_service._documents = DocumentRegistry(f"{workdir}/documents.sqlite3")
+    rng = np.random.default_rng(0)
+
+    total_chunks = args.documents * args.chunks_per_doc
+    print(f"\n{'='*80}")
+    print("BENCHMARK: LISTADO DE DOCUMENTOS (escaneo de chunks vs registro)")
+    print(f"{'='*80}")
+    print(f"Documentos: {args.documents} | Chunks: {total_chunks} | Bots: {args.bots}\n")
+
+    for start in range(0, args.documents, 100):
+        ids, metadatas = [], []
+        for doc in range(start, min(start + 100, args.documents)):
+            for chunk in range(args.chunks_per_doc):
+                ids.append(f"doc{doc}_{chunk}")
+                metadatas.append({
+                    "doc_id": f"doc{doc}",
+                    "bot_id": f"bot{doc % args.bots}",
+                    "filename": f"doc{doc}.pdf",
+                    "file_type": "application/pdf" if doc % 2 else "text/plain",
+                    "uploaded_at": f"2024-01-{1 + doc % 28:02d}T10:00:00"
+                })
+        vectors = rng.standard_normal((len(ids), args.dim), dtype=np.float32)
+        vector_service.add_embeddings(ids, [""] * len(ids), vectors, metadatas)
+
+    start = time.perf_counter()
+    vector_service.rebuild_documents()
+    print(f"Construcción inicial del registro: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    documents = vector_service.documents
+    cases = [
+        ("todos", lambda: scan_documents(vector_service),
+         lambda: documents.list_documents([vector_service.name], limit=100)),
+        ("un bot", lambda: scan_documents(vector_service, "bot0"),
+         lambda: documents.list_documents([vector_service.name], bot_id="bot0", limit=100)),
+        ("bot + tipo + fecha", lambda: scan_documents(vector_service, "bot0"),
+         lambda: documents.list_documents([vector_service.name], bot_id="bot0", file_type="application/pdf",
+                                          uploaded_from="2024-01-10", uploaded_to="2024-01-20", limit=100)),
+    ]
+    for label, scan, registry_list in cases:
+        scan_ms = timed(scan, args.repeat)
+        registry_ms = timed(registry_list, args.repeat)
+        print(f"[{label}] escaneo: {scan_ms:.1f} ms | registro (página de 100): {registry_ms:.2f} ms "
+              f"({scan_ms / registry_ms if registry_ms else 0:.0f}x)")
+
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de throughput/latencia de embeddings de consultas con y sin micro-batching.
+Simula de 1 a 64 clientes concurrentes, cada uno embebiendo consultas de a una.
+
+Uso (desde backend/):
+    python benchmarks/bench_embedding_batching.py --queries-per-client 20
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('.')
+
+from app.core.config import settings
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_scheduler import EmbeddingScheduler
+
+QUERIES = [
+    "enlace plataforma SIGA",
+    "¿Cómo recupero mi contraseña?",
+    "horario de atención de soporte",
+    "requisitos para la matrícula",
+    "¿Dónde descargo el certificado?",
+    "costos del programa de posgrado",
+]
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(embedder, clients: int, queries_per_client: int) -> dict:
+    def client(client_id: int) -> list[float]:
+        latencies = []
+        for i in range(queries_per_client):
+            query = f"{QUERIES[(client_id + i) % len(QUERIES)]} {client_id}-{i}"
+            start = time.perf_counter()
+            embedder.embed_query(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = [lat for result in pool.map(client, range(clients)) for lat in result]
+    elapsed = time.perf_counter() - start
+
+    return {
+        "qps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries-per-client", type=int, default=20)
+    parser.add_argument("--clients", default="1,2,4,8,16,32,64")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.EMBEDDING_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    embedding_service = EmbeddingService(settings.EMBEDDING_MODEL)
+    scheduler = EmbeddingScheduler(embedding_service, max_batch_size=args.batch_size, max_wait_ms=args.max_wait_ms)
+    scheduler.start()
+    embedding_service.embed_query("warmup")
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: MICRO-BATCHING DE EMBEDDINGS DE CONSULTAS")
+    print(f"{'='*80}")
+    print(f"Modelo: {settings.EMBEDDING_MODEL} | batch_size={args.batch_size} | max_wait={args.max_wait_ms} ms\n")
+    print(f"{'clientes':>8} | {'directo qps':>11} {'p50':>8} {'p95':>8} | {'batching qps':>12} {'p50':>8} {'p95':>8}")
+
+    for clients in [int(c) for c in args.clients.split(",")]:
+        direct = run(embedding_service, clients, args.queries_per_client)
+        batched = run(scheduler, clients, args.queries_per_client)
+        print(f"{clients:>8} | {direct['qps']:>11.1f} {direct['p50']:>7.1f}ms {direct['p95']:>7.1f}ms | "
+              f"{batched['qps']:>12.1f} {batched['p50']:>7.1f}ms {batched['p95']:>7.1f}ms")
+
+    print(f"\nScheduler: {scheduler.stats()}")
+    scheduler.stop()
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
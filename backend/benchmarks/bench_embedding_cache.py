@@ -0,0 +1,66 @@
+"""
+Benchmark del cache persistente de embeddings: primera ingesta vs re-indexado.
+Usa un archivo de cache temporal para no tocar el de la aplicación.
+
+Uso (desde backend/):
+    python benchmarks/bench_embedding_cache.py --chunks 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append('.')
+
+from app.core.config import settings
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_cache import EmbeddingCache, CachedDocumentEmbedder
+
+
+def synthetic_chunks(n: int) -> list[str]:
+    base = ("La plataforma SIGA permite consultar notas, horarios y certificados. "
+            "Para ingresar use su usuario institucional y contraseña. ")
+    return [f"{base} Sección {i}: procedimiento {i % 97} del manual." for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    embedding_service = EmbeddingService(settings.EMBEDDING_MODEL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_cache.sqlite3")
+
+        print(f"\n{'='*80}")
+        print("BENCHMARK: CACHE PERSISTENTE DE EMBEDDINGS")
+        print(f"{'='*80}")
+        print(f"Modelo: {settings.EMBEDDING_MODEL} | Chunks: {len(chunks)}\n")
+
+        start = time.perf_counter()
+        embedding_service.embed(chunks)
+        print(f"{'sin cache':<28} {time.perf_counter() - start:8.2f} s")
+
+        cache = EmbeddingCache(path)
+        start = time.perf_counter()
+        CachedDocumentEmbedder(embedding_service, cache).embed(chunks)
+        print(f"{'cache frío (1ª ingesta)':<28} {time.perf_counter() - start:8.2f} s")
+        cache.close()
+
+        # Simula un reinicio: nueva conexión sobre el mismo archivo
+        cache = EmbeddingCache(path)
+        embedder = CachedDocumentEmbedder(embedding_service, cache)
+        start = time.perf_counter()
+        embedder.embed(chunks)
+        print(f"{'cache caliente (re-subida)':<28} {time.perf_counter() - start:8.2f} s  {embedder.stats()}")
+        print(f"Tamaño en disco: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+        cache.close()
+
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Benchmark de throughput de embeddings: chunks/s, latencia por batch (p50/p95) y RSS pico
+para cada combinación de backend × hilos × tamaño de batch × largo de chunk.
+
+Los chunks salen de DocumentService._chunk_text (el mismo troceo que la ingesta),
+sobre texto sintético o sobre documentos reales (--docs carpeta con PDF/DOCX/TXT).
+Los resultados se guardan en JSON para comparar corridas y detectar regresiones.
+
+Uso (desde backend/):
+    python benchmarks/bench_embedding_throughput.py --backends torch,onnx --threads 1,4 \\
+        --batch-sizes 8,32,128 --chunk-sizes 200,500,800 --output results.json
+    python benchmarks/bench_embedding_throughput.py --compare results.json --tolerance 0.1
+
+    # como casos de pytest-benchmark (pip install -r requirements-dev.txt)
+    pytest benchmarks/bench_embedding_throughput.py --benchmark-only --benchmark-json=results.json
+
+--isolate corre cada caso en un proceso nuevo: el RSS pico de un proceso solo crece,
+así que sin aislar el valor de cada caso incluye lo que reservaron los anteriores.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.append('.')
+
+from app.core.config import settings
+
+PARAGRAPH = ("La plataforma SIGA permite consultar notas, horarios y certificados. "
+             "Para ingresar use su usuario institucional y la contraseña enviada a su correo. "
+             "Si olvidó la contraseña puede restablecerla desde la opción de recuperación.")
+
+# servicios ya cargados por (backend, hilos): cargar el modelo no es parte de la medición
+_services: dict = {}
+
+
+def peak_rss_mb() -> float | None:
+    """RSS pico del proceso en MB (None en plataformas sin el módulo resource)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def synthetic_chunks(n: int, chunk_size: int) -> list[str]:
+    from app.services.document_service import DocumentService
+    text = "\n".join(f"{PARAGRAPH} Sección {i}." for i in range(n * max(1, chunk_size // 200) + 1))
+    return DocumentService._chunk_text(text, chunk_size=chunk_size, overlap=100)[:n]
+
+
+def document_chunks(docs_dir: str, n: int, chunk_size: int) -> list[str]:
+    """Chunks de documentos reales con los mismos extractores de la ingesta"""
+    from app.services.document_service import DocumentService
+
+    # sin __init__: solo se usan los extractores, no el vector store
+    extractor = DocumentService.__new__(DocumentService)
+    readers = {
+        ".pdf": extractor._extract_text_from_pdf,
+        ".docx": extractor._extract_text_from_docx,
+        ".txt": extractor._extract_text_from_txt,
+    }
+
+    chunks = []
+    for filename in sorted(os.listdir(docs_dir)):
+        reader = readers.get(os.path.splitext(filename)[1].lower())
+        if reader is None:
+            continue
+        text = reader(os.path.join(docs_dir, filename))
+        chunks.extend(DocumentService._chunk_text(text, chunk_size=chunk_size, overlap=100))
+        if len(chunks) >= n:
+            break
+
+    if not chunks:
+        raise ValueError(f"No hay documentos PDF/DOCX/TXT en {docs_dir}")
+    # se repiten si los documentos no alcanzan para n chunks
+    return list(itertools.islice(itertools.cycle(chunks), n))
+
+
+def load_chunks(n: int, chunk_size: int, docs_dir: str | None = None) -> list[str]:
+    if docs_dir:
+        return document_chunks(docs_dir, n, chunk_size)
+    return synthetic_chunks(n, chunk_size)
+
+
+def load_service(backend: str, threads: int, model_name: str = settings.EMBEDDING_MODEL):
+    key = (backend, threads, model_name)
+    if key not in _services:
+        if backend == "onnx":
+            from app.services.embedding_service import OnnxEmbeddingService, onnx_model_dir
+            _services[key] = OnnxEmbeddingService(
+                onnx_model_dir(model_name),
+                model_name=model_name,
+                quantized=settings.ONNX_QUANTIZED,
+                threads=threads
+            )
+        else:
+            from app.services.embedding_service import EmbeddingService
+            _services[key] = EmbeddingService(model_name, threads=threads)
+    elif backend == "torch" and threads > 0:
+        # torch usa un número de hilos global al proceso
+        import torch
+        torch.set_num_threads(threads)
+    return _services[key]
+
+
+def embed_batches(service, chunks: list[str], batch_size: int) -> list[float]:
+    """Embebe todos los chunks en batches; devuelve la latencia de cada batch en ms"""
+    latencies = []
+    for start in range(0, len(chunks), batch_size):
+        t = time.perf_counter()
+        service.embed(chunks[start:start + batch_size])
+        latencies.append((time.perf_counter() - t) * 1000)
+    return latencies
+
+
+def run_case(backend: str, threads: int, batch_size: int, chunk_size: int,
+             chunks_count: int, repeat: int, docs_dir: str | None = None) -> dict:
+    service = load_service(backend, threads)
+    chunks = load_chunks(chunks_count, chunk_size, docs_dir)
+    # calentamiento: la primera llamada paga inicializaciones perezosas del runtime
+    service.embed(chunks[:batch_size])
+
+    latencies, elapsed = [], 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        latencies.extend(embed_batches(service, chunks, batch_size))
+        elapsed += time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "threads": threads,
+        "batch_size": batch_size,
+        "chunk_size": chunk_size,
+        "chunks": len(chunks),
+        "avg_chunk_chars": round(sum(map(len, chunks)) / len(chunks), 1),
+        "source": "docs" if docs_dir else "synthetic",
+        "chunks_per_sec": round(len(chunks) * repeat / elapsed, 1),
+        "batch_p50_ms": round(statistics.median(latencies), 2),
+        "batch_p95_ms": round(percentile(latencies, 95), 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(case: dict) -> dict:
+    """Corre un caso en un intérprete nuevo para que el RSS pico sea solo suyo"""
+    result = subprocess.run(
+        [sys.executable, __file__, "--single-case", json.dumps(case)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "caso fallido")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def case_key(result: dict) -> tuple:
+    return tuple(result[k] for k in ("backend", "threads", "batch_size", "chunk_size", "source"))
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Casos cuyo throughput cayó más que `tolerance` respecto a la corrida base"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {case_key(r): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        base = baseline.get(case_key(result))
+        if base is None:
+            continue
+        change = result["chunks_per_sec"] / base["chunks_per_sec"] - 1
+        marker = "⚠️" if change < -tolerance else "  "
+        print(f"{marker} {case_key(result)}: {base['chunks_per_sec']:.1f} → "
+              f"{result['chunks_per_sec']:.1f} chunks/s ({change:+.1%})")
+        if change < -tolerance:
+            regressions.append(str(case_key(result)))
+    return regressions
+
+
+def parse_ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=settings.EMBEDDING_BACKEND, help="torch,onnx")
+    parser.add_argument("--threads", default=str(settings.EMBEDDING_THREADS), help="0 = valor por defecto del runtime")
+    parser.add_argument("--batch-sizes", default="8,32,128")
+    parser.add_argument("--chunk-sizes", default="200,500,800", help="chunk_size de _chunk_text (caracteres)")
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--docs", help="Carpeta con documentos reales en lugar de texto sintético")
+    parser.add_argument("--isolate", action="store_true", help="Un proceso por caso (RSS pico exacto)")
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Caída de chunks/s tolerada (0.1 = 10%%)")
+    parser.add_argument("--single-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_case:
+        print(json.dumps(run_case(**json.loads(args.single_case))))
+        return
+
+    cases = [
+        {"backend": backend, "threads": threads, "batch_size": batch_size, "chunk_size": chunk_size,
+         "chunks_count": args.chunks, "repeat": args.repeat, "docs_dir": args.docs}
+        for backend in args.backends.split(",")
+        for threads in parse_ints(args.threads)
+        for batch_size in parse_ints(args.batch_sizes)
+        for chunk_size in parse_ints(args.chunk_sizes)
+    ]
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: THROUGHPUT DE EMBEDDINGS")
+    print(f"{'='*80}")
+    print(f"Modelo: {settings.EMBEDDING_MODEL} | Chunks por caso: {args.chunks} | Casos: {len(cases)} | "
+          f"CPUs: {os.cpu_count()}\n")
+    print(f"{'backend':<8} {'hilos':>5} {'batch':>6} {'chunk':>6} {'chunks/s':>10} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'RSS MB':>8}")
+
+    results = []
+    for case in cases:
+        try:
+            result = run_isolated(case) if args.isolate else run_case(**case)
+        except Exception as e:
+            print(f"{case['backend']:<8} {case['threads']:>5} {case['batch_size']:>6} {case['chunk_size']:>6}  "
+                  f"❌ {e}")
+            continue
+        results.append(result)
+        print(f"{result['backend']:<8} {result['threads']:>5} {result['batch_size']:>6} {result['chunk_size']:>6} "
+              f"{result['chunks_per_sec']:>10.1f} {result['batch_p50_ms']:>9.2f} {result['batch_p95_ms']:>9.2f} "
+              f"{result['peak_rss_mb'] or 0:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "model": settings.EMBEDDING_MODEL,
+                    "timestamp": datetime.now().isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "isolated": args.isolate,
+                },
+                "results": results
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados guardados en {args.output}")
+
+    regressions = []
+    if args.compare:
+        print(f"\nComparación con {args.compare} (tolerancia {args.tolerance:.0%}):")
+        regressions = compare(results, args.compare, args.tolerance)
+
+    print(f"{'='*80}\n")
+    if regressions:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------------------
+# Casos de pytest-benchmark (pytest benchmarks/bench_embedding_throughput.py --benchmark-only)
+# La matriz se controla con BENCH_BACKENDS / BENCH_BATCH_SIZES / BENCH_CHUNK_SIZES.
+# ---------------------------------------------------------------------------
+
+def pytest_generate_tests(metafunc):
+    matrix = {
+        "backend": os.getenv("BENCH_BACKENDS", settings.EMBEDDING_BACKEND).split(","),
+        "batch_size": parse_ints(os.getenv("BENCH_BATCH_SIZES", "8,32,128")),
+        "chunk_size": parse_ints(os.getenv("BENCH_CHUNK_SIZES", "200,500,800")),
+    }
+    for name, values in matrix.items():
+        if name in metafunc.fixturenames:
+            metafunc.parametrize(name, values)
+
+
+def test_embedding_throughput(benchmark, backend, batch_size, chunk_size):
+    threads = int(os.getenv("BENCH_THREADS", settings.EMBEDDING_THREADS))
+    chunks = load_chunks(int(os.getenv("BENCH_CHUNKS", "256")), chunk_size, os.getenv("BENCH_DOCS"))
+    service = load_service(backend, threads)
+    service.embed(chunks[:batch_size])
+
+    latencies = benchmark.pedantic(embed_batches, args=(service, chunks, batch_size), rounds=3, iterations=1)
+
+    benchmark.extra_info.update({
+        "chunks": len(chunks),
+        "chunks_per_sec": round(len(chunks) / benchmark.stats.stats.mean, 1),
+        "batch_p50_ms": round(statistics.median(latencies), 2),
+        "batch_p95_ms": round(percentile(latencies, 95), 2),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+if __name__ == "__main__":
+    main()
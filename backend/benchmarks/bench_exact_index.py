@@ -0,0 +1,82 @@
+"""
+Benchmark del índice exacto en proceso vs el ANN de Chroma (HNSW + SQLite), por tamaño de bot.
+
+Usa vectores aleatorios normalizados (sin cargar el modelo) en una colección temporal:
+mide la latencia de top-k de cada backend y el recall@k del ANN respecto al exacto.
+
+Uso (desde backend/):
+    python benchmarks/bench_exact_index.py --sizes 500,2000,5000,20000 --dim 384
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append('.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="500,2000,5000,20000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    import chromadb
+
+    from app.services.exact_index import ExactIndexStore
+    from app.services.vector_service import VectorService
+
+    workdir = tempfile.mkdtemp()
+    client = chromadb.PersistentClient(path=f"{workdir}/chroma")
+    rng = np.random.default_rng(0)
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: ÍNDICE EXACTO EN PROCESO vs ANN DE CHROMA")
+    print(f"{'='*80}")
+    print(f"Dimensión: {args.dim} | k: {args.k} | Consultas: {args.queries}\n")
+    print(f"{'chunks':>8} {'exacto p50':>12} {'exacto p95':>12} {'ANN p50':>10} {'ANN p95':>10} {'recall ANN':>11}")
+
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        vector_service = VectorService(collection_name=f"bench-{size}", client=client, model_name="bench", space="cosine")
+        ids = [f"doc_{i}" for i in range(size)]
+        vector_service.add_embeddings(ids, [""] * size, vectors, [{"bot_id": "bench", "doc_id": "doc"}] * size)
+
+        store = ExactIndexStore(
+            directory=f"{workdir}/exact/{size}",
+            max_chunks=size,
+            list_ids=lambda bot_id: vector_service.collection.get(include=[])['ids'],
+            load_chunks=lambda bot_id: vector_service.iter_chunks()
+        )
+        store.query("bench", queries[0], args.k)
+        vector_service.collection.query(query_embeddings=queries[:1].tolist(), n_results=args.k)
+
+        exact_ms, ann_ms, recall = [], [], []
+        for query in queries:
+            start = time.perf_counter()
+            exact = store.query("bench", query, args.k)
+            exact_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            ann = vector_service.collection.query(query_embeddings=[query.tolist()], n_results=args.k, include=[])
+            ann_ms.append((time.perf_counter() - start) * 1000)
+            recall.append(len(set(exact["ids"]) & set(ann["ids"][0])) / args.k)
+
+        p95 = lambda values: sorted(values)[int(0.95 * (len(values) - 1))]
+        print(f"{size:>8} {statistics.median(exact_ms):>9.3f} ms {p95(exact_ms):>9.3f} ms "
+              f"{statistics.median(ann_ms):>7.3f} ms {p95(ann_ms):>7.3f} ms {statistics.mean(recall):>11.3f}")
+
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
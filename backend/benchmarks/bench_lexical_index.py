@@ -0,0 +1,113 @@
+"""
+Presupuesto de latencia de la etapa léxica (BM25) de la búsqueda híbrida.
+
+Construye un BM25Index con chunks de DocumentService._chunk_text (texto sintético
+o documentos reales con --source) y mide por consulta la latencia de index.search.
+Falla (exit 1) si el p95 supera --budget-ms: la etapa léxica debe sumar solo unos
+pocos milisegundos a RetrieverService.search.
+
+Uso (desde backend/):
+    python benchmarks/bench_lexical_index.py --chunks 20000 --budget-ms 3
+"""
+import argparse
+import random
+import sys
+import time
+
+sys.path.append('.')
+
+from app.services.lexical_index import BM25Index, tokenize
+
+QUERIES = [
+    "enlace plataforma SIGA",
+    "¿cómo restablezco la contraseña del correo institucional?",
+    "horario de atención certificados de notas",
+    "requisitos matrícula estudiantes nuevos",
+    "usuario bloqueado plataforma",
+]
+
+VOCABULARY = ("plataforma SIGA notas horarios certificados usuario institucional contraseña correo "
+              "recuperación matrícula estudiantes docentes biblioteca préstamo laboratorio soporte "
+              "técnico enlace portal pagos financiera calendario académico inscripción grados").split()
+
+
+def synthetic_text(n_chunks: int, seed: int = 0) -> str:
+    """Párrafos de ~15 palabras (_chunk_text trocea por párrafos)"""
+    rng = random.Random(seed)
+    return "\n".join(
+        " ".join(rng.choice(VOCABULARY) for _ in range(15))
+        for _ in range(n_chunks * 6)
+    )
+
+
+def build_index(chunks: list[str], docs: int) -> tuple[BM25Index, float]:
+    index = BM25Index()
+    per_doc = max(1, len(chunks) // docs)
+    start = time.perf_counter()
+    for d, offset in enumerate(range(0, len(chunks), per_doc)):
+        texts = chunks[offset:offset + per_doc]
+        index.add_document(f"doc{d}", [f"doc{d}_{i}" for i in range(len(texts))], texts)
+    return index, (time.perf_counter() - start) * 1000
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--docs", type=int, default=200, help="Documentos en que se reparten los chunks")
+    parser.add_argument("--limit", type=int, default=20, help="Candidatos léxicos por consulta")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=3.0, help="p95 máximo aceptado")
+    parser.add_argument("--source", help="Carpeta con documentos reales en lugar de texto sintético")
+    args = parser.parse_args()
+
+    from app.services.document_service import DocumentService
+
+    if args.source:
+        sys.path.append('benchmarks')
+        from bench_embedding_throughput import document_chunks
+        chunks = document_chunks(args.source, args.chunks, 500)
+    else:
+        chunks = DocumentService._chunk_text(synthetic_text(args.chunks), chunk_size=500, overlap=100)[:args.chunks]
+
+    index, build_ms = build_index(chunks, args.docs)
+    stats = index.stats()
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: ETAPA LÉXICA (BM25) DE LA BÚSQUEDA HÍBRIDA")
+    print(f"{'='*80}")
+    print(f"Chunks: {stats['chunks']} | Términos: {stats['terms']} | Postings: {stats['postings']} "
+          f"({stats['postings_bytes'] / 1024:.0f} KB) | Construcción: {build_ms:.0f} ms\n")
+
+    timings = []
+    for i in range(args.runs):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        index.search(query, limit=args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # actualización incremental: borrar y volver a subir un documento
+    start = time.perf_counter()
+    index.remove_document("doc0")
+    index.add_document("doc0", ["doc0_0"], [chunks[0]])
+    update_ms = (time.perf_counter() - start) * 1000
+
+    p95 = percentile(timings, 95)
+    print(f"search     p50={percentile(timings, 50):7.3f} ms  p95={p95:7.3f} ms  "
+          f"p99={percentile(timings, 99):7.3f} ms  (términos por consulta: "
+          f"{sum(len(tokenize(q)) for q in QUERIES) / len(QUERIES):.1f})")
+    print(f"update     {update_ms:7.3f} ms (borrar + agregar un documento)")
+
+    ok = p95 <= args.budget_ms
+    print(f"\n{'✅' if ok else '❌'} p95 {p95:.3f} ms {'dentro' if ok else 'fuera'} del presupuesto de {args.budget_ms} ms")
+    print(f"{'='*80}\n")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark del camino de embeddings encoder → vector store:
+listas de floats de Python (.tolist()) vs matrices NumPy float32 contiguas.
+
+Mide tiempo y memoria asignada (tracemalloc) por cada 10k chunks, sin cargar el modelo:
+la matriz del encoder se simula con datos aleatorios del mismo tamaño.
+
+- listas: el pipeline anterior (encoder .tolist() → cache/pool vuelven a armar arrays → .tolist() para Chroma)
+- numpy + Chroma: matrices en todo el pipeline y una sola conversión en la frontera con chromadb 0.5.x
+- numpy puro: backends que reciben la matriz directamente
+
+Uso (desde backend/):
+    python benchmarks/bench_numpy_path.py --chunks 10000 --dim 384
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def list_path(encoded: np.ndarray):
+    """Camino anterior: listas de floats entre cada etapa"""
+    from_encoder = encoded.tolist()
+    rows = list(np.asarray(from_encoder, dtype=np.float32))
+    return np.stack(rows).tolist()
+
+
+def numpy_chroma_path(encoded: np.ndarray):
+    """Camino actual con Chroma: la matriz viaja intacta y se convierte una vez al escribir"""
+    rows = list(np.ascontiguousarray(encoded, dtype=np.float32))
+    return np.stack(rows).tolist()
+
+
+def numpy_path(encoded: np.ndarray):
+    """Camino actual sin conversión final"""
+    rows = list(np.ascontiguousarray(encoded, dtype=np.float32))
+    return np.stack(rows)
+
+
+def measure(fn, encoded: np.ndarray, repeat: int) -> tuple[float, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(encoded)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    # memoria en una corrida aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    fn(encoded)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoded = np.random.default_rng(0).standard_normal((args.chunks, args.dim), dtype=np.float32)
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: CAMINO DE EMBEDDINGS (LISTAS vs NUMPY)")
+    print(f"{'='*80}")
+    print(f"Chunks: {args.chunks} | Dimensión: {args.dim} | Matriz: {encoded.nbytes / (1024 * 1024):.1f} MB\n")
+
+    list_ms, list_mb = measure(list_path, encoded, args.repeat)
+    print(f"{'listas':<16} {list_ms:9.1f} ms  pico asignado {list_mb:8.1f} MB")
+    for label, fn in (("numpy + Chroma", numpy_chroma_path), ("numpy puro", numpy_path)):
+        ms, mb = measure(fn, encoded, args.repeat)
+        print(f"{label:<16} {ms:9.1f} ms  pico asignado {mb:8.1f} MB  "
+              f"(ahorro {list_ms - ms:.1f} ms, {list_mb - mb:.1f} MB por {args.chunks} chunks)")
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
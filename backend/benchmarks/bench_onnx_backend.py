@@ -0,0 +1,109 @@
+"""
+Paridad y benchmark del backend ONNX Runtime frente a sentence-transformers (PyTorch).
+
+1. Paridad: similitud coseno entre los vectores de ambos backends (falla si baja del umbral).
+2. Latencia: consulta individual y lote de chunks.
+3. Memoria: RSS añadido al cargar cada backend.
+
+Requiere haber exportado el modelo: python export_onnx_model.py
+Uso (desde backend/):
+    python benchmarks/bench_onnx_backend.py --min-cosine 0.99
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embedding_service import EmbeddingService, OnnxEmbeddingService, onnx_model_dir
+
+SAMPLES = [
+    "enlace plataforma SIGA",
+    "¿Cómo recupero mi contraseña del campus virtual?",
+    "Horario de atención de la oficina de soporte técnico",
+    "Requisitos para solicitar el certificado de notas",
+    "La matrícula se realiza en línea durante las dos primeras semanas del semestre.",
+    "Para ingresar use su usuario institucional y la contraseña enviada a su correo.",
+] * 8
+
+
+def rss_mb() -> float:
+    """RSS actual del proceso en MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load(factory):
+    before = rss_mb()
+    start = time.perf_counter()
+    service = factory()
+    return service, time.perf_counter() - start, rss_mb() - before
+
+
+def latency(service, repeat: int) -> tuple[float, float]:
+    single = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        service.embed_query(SAMPLES[i % len(SAMPLES)])
+        single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    service.embed(SAMPLES * 4)
+    batch = (time.perf_counter() - start) * 1000
+    return statistics.median(single), batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=settings.EMBEDDING_THREADS)
+    args = parser.parse_args()
+
+    model_dir = onnx_model_dir(args.model)
+    backends = [
+        ("torch", lambda: EmbeddingService(args.model, threads=args.threads)),
+        ("onnx fp32", lambda: OnnxEmbeddingService(model_dir, args.model, quantized=False, threads=args.threads)),
+        ("onnx int8", lambda: OnnxEmbeddingService(model_dir, args.model, quantized=True, threads=args.threads)),
+    ]
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: BACKEND ONNX RUNTIME vs PYTORCH")
+    print(f"{'='*80}")
+    print(f"Modelo: {args.model} | Textos: {len(SAMPLES)}\n")
+    print(f"{'backend':<10} | {'carga':>7} | {'RSS +MB':>8} | {'consulta p50':>12} | {'lote x{0}'.format(len(SAMPLES) * 4):>10} | {'coseno min':>10}")
+
+    reference = None
+    failed = False
+    for name, factory in backends:
+        service, load_s, rss = load(factory)
+        vectors = np.asarray(service.embed(SAMPLES), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        if reference is None:
+            reference = vectors
+        cosine = float(np.min(np.sum(reference * vectors, axis=1)))
+        failed = failed or cosine < args.min_cosine
+
+        single_ms, batch_ms = latency(service, args.repeat)
+        print(f"{name:<10} | {load_s:>6.2f}s | {rss:>8.1f} | {single_ms:>10.2f}ms | {batch_ms:>8.1f}ms | {cosine:>10.4f}")
+        del service
+
+    print(f"\nParidad (coseno >= {args.min_cosine}): {'FALLA' if failed else 'OK'}")
+    print(f"{'='*80}\n")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
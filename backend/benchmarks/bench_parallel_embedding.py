@@ -0,0 +1,71 @@
+"""
+Benchmark de ingesta con pool de procesos: tiempo total vs número de workers.
+Usa chunks generados con DocumentService._chunk_text sobre texto sintético.
+
+Uso (desde backend/):
+    python benchmarks/bench_parallel_embedding.py --chunks 4000 --workers 1,2,4,8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append('.')
+
+from app.core.config import settings
+from app.services.embedding_service import get_embedding_service
+from app.services.embedding_pool import ParallelEmbedder
+
+PARAGRAPH = ("La plataforma SIGA permite consultar notas, horarios y certificados. "
+             "Para ingresar use su usuario institucional y la contraseña enviada a su correo. "
+             "Si olvidó la contraseña puede restablecerla desde la opción de recuperación.")
+
+
+def synthetic_chunks(n: int) -> list[str]:
+    from app.services.document_service import DocumentService
+    text = "\n".join(f"{PARAGRAPH} Sección {i}." for i in range(n * 2))
+    return DocumentService._chunk_text(text, chunk_size=500, overlap=100)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--workers", default=f"1,2,4,{os.cpu_count()}")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--shard-size", type=int, default=settings.EMBEDDING_SHARD_SIZE)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    embedding_service = get_embedding_service(settings.EMBEDDING_MODEL)
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: EMBEDDINGS EN PARALELO (POOL DE PROCESOS)")
+    print(f"{'='*80}")
+    print(f"Modelo: {settings.EMBEDDING_MODEL} | Chunks: {len(chunks)} | CPUs: {os.cpu_count()}\n")
+
+    start = time.perf_counter()
+    embedding_service.embed(chunks)
+    baseline = time.perf_counter() - start
+    print(f"{'en proceso':<16} {baseline:8.2f} s  {len(chunks) / baseline:8.1f} chunks/s")
+
+    for workers in sorted({int(w) for w in args.workers.split(",")}):
+        embedder = ParallelEmbedder(
+            embedding_service,
+            workers=workers,
+            threads_per_worker=args.threads_per_worker,
+            shard_size=args.shard_size,
+            min_chunks=0
+        )
+        embedder.start()
+        start = time.perf_counter()
+        embedder.embed(chunks)
+        elapsed = time.perf_counter() - start
+        embedder.stop()
+        print(f"{f'{workers} workers':<16} {elapsed:8.2f} s  {len(chunks) / elapsed:8.1f} chunks/s  "
+              f"speedup {baseline / elapsed:4.1f}x")
+
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
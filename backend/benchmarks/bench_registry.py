@@ -0,0 +1,78 @@
+"""
+Benchmark de latencia por request: servicios creados en cada request vs registro compartido.
+
+Uso (desde backend/):
+    python benchmarks/bench_registry.py --requests 20 --bot-id default
+"""
+import argparse
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+
+from app.core.config import settings
+from app.core.registry import registry
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_service import VectorService
+from app.services.retriever_service import RetrieverService
+
+
+def per_request_retriever() -> RetrieverService:
+    """Reproduce el comportamiento anterior: modelo y cliente nuevos en cada request"""
+    vector_service = VectorService(
+        collection_name=settings.CHROMA_COLLECTION,
+        embedding_service=EmbeddingService(settings.EMBEDDING_MODEL),
+        client=chromadb.PersistentClient(path=settings.CHROMA_PATH, settings=ChromaSettings())
+    )
+    return RetrieverService(vector_service)
+
+
+def shared_retriever() -> RetrieverService:
+    """Comportamiento actual: recursos del registro del proceso"""
+    return RetrieverService(registry.vector_service)
+
+
+def run(label: str, factory, query: str, bot_id: str, n: int) -> list[float]:
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        retriever = factory()
+        retriever.search(query, bot_id=bot_id)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"{label:<22} p50={statistics.median(timings):9.1f} ms  "
+          f"max={max(timings):9.1f} ms  total={sum(timings):10.1f} ms")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Requests simulados por modo")
+    parser.add_argument("--query", default="enlace plataforma SIGA")
+    parser.add_argument("--bot-id", default="default")
+    args = parser.parse_args()
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: LATENCIA POR REQUEST (retrieval)")
+    print(f"{'='*80}")
+    print(f"Modelo: {settings.EMBEDDING_MODEL} | Requests: {args.requests}\n")
+
+    before = run("antes (por request)", per_request_retriever, args.query, args.bot_id, args.requests)
+
+    startup = time.perf_counter()
+    registry.startup()
+    print(f"{'arranque registro':<22} {(time.perf_counter() - startup) * 1000:9.1f} ms (una sola vez)")
+
+    after = run("después (registro)", shared_retriever, args.query, args.bot_id, args.requests)
+    registry.shutdown()
+
+    print(f"\nSpeedup p50: {statistics.median(before) / statistics.median(after):.1f}x")
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
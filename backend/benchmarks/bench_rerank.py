@@ -0,0 +1,68 @@
+"""
+Benchmark del rerank con cross-encoder: latencia por número de candidatos y
+contexto que se deja de enviar al LLM.
+
+Compara el contexto de la configuración sin rerank (retrieval_k chunks en orden ANN)
+con el rerank (RERANK_CANDIDATES puntuados, se envían max_sources).
+
+Uso (desde backend/):
+    python benchmarks/bench_rerank.py --bot-id SoporteTech --query "enlace plataforma SIGA"
+"""
+import argparse
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+
+from app.core.config import settings
+from app.core.registry import registry
+from app.services.bot_service import BotService
+from app.services.retriever_service import RetrieverService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bot-id", default="default")
+    parser.add_argument("--query", default="enlace plataforma SIGA")
+    parser.add_argument("--candidates", default=f"10,{settings.RERANK_CANDIDATES},50")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    bot = BotService().get_bot(args.bot_id)
+    if bot is None:
+        sys.exit(f"Bot no encontrado: {args.bot_id}")
+
+    retriever = RetrieverService()
+    baseline = retriever.search(args.query, args.bot_id, k=bot.retrieval_k, bot_config=bot.model_copy(update={"rerank": False}))
+    reranker = registry.reranker
+    reranker.score("warmup", ["warmup"])
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: RERANK CON CROSS-ENCODER")
+    print(f"{'='*80}")
+    print(f"Modelo: {settings.RERANK_MODEL} | Bot: {args.bot_id} | Query: {args.query}\n")
+
+    for n in sorted({int(c) for c in args.candidates.split(",")}):
+        candidates = retriever.search(args.query, args.bot_id, k=n, bot_config=bot.model_copy(update={"rerank": False}))
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            reranker.rerank(args.query, candidates, top_n=bot.max_sources)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{len(candidates):>4} candidatos  p50={statistics.median(timings):8.1f} ms  max={max(timings):8.1f} ms")
+
+    reranked = retriever.search(args.query, args.bot_id, k=bot.retrieval_k, bot_config=bot.model_copy(update={"rerank": True}))
+    baseline_chars = sum(len(c["text"]) for c in baseline)
+    reranked_chars = sum(len(c["text"]) for c in reranked)
+    print(f"\nContexto sin rerank: {len(baseline)} chunks, {baseline_chars} caracteres")
+    print(f"Contexto con rerank: {len(reranked)} chunks, {reranked_chars} caracteres "
+          f"(ahorro de {baseline_chars - reranked_chars} caracteres en el prompt)")
+    for i, chunk in enumerate(reranked, 1):
+        print(f"  {i}. rerank={chunk['rerank_score']}  similarity={chunk['similarity']}  {chunk['text'][:80]!r}")
+    print(f"{'='*80}\n")
+    registry.shutdown()
+
+
+if __name__ == "__main__":
+    main()
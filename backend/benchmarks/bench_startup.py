@@ -0,0 +1,69 @@
+"""
+Benchmark de arranque en frío.
+
+1. Tiempo de `import app.main` (lo que tarda la app en poder responder /health),
+   medido en procesos nuevos para no reutilizar módulos ya importados.
+2. Costo de importar cada dependencia pesada que ahora se carga perezosamente.
+3. Tiempo de precarga de cada componente del registro (lo que reporta /ready).
+
+Uso (desde backend/):
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+sys.path.append('.')
+
+HEAVY_MODULES = ["chromadb", "sentence_transformers", "onnxruntime", "pypdf", "docx"]
+
+
+def import_time(statement: str, runs: int) -> float | None:
+    """Mediana (ms) de ejecutar un import en un intérprete nuevo"""
+    code = (
+        "import sys, time; sys.path.append('.'); t = time.perf_counter(); "
+        f"{statement}; print((time.perf_counter() - t) * 1000)"
+    )
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-warmup", action="store_true", help="No cargar el modelo ni el índice")
+    args = parser.parse_args()
+
+    print(f"\n{'='*80}")
+    print("BENCHMARK: ARRANQUE EN FRÍO")
+    print(f"{'='*80}\n")
+
+    app_ms = import_time("import app.main", args.runs)
+    print(f"{'import app.main':<28} {app_ms:9.1f} ms  (liveness: /health disponible)\n")
+
+    print("Dependencias diferidas hasta la precarga o el primer uso:")
+    for module in HEAVY_MODULES:
+        ms = import_time(f"import {module}", args.runs)
+        print(f"  {module:<26} {'no instalado' if ms is None else f'{ms:9.1f} ms'}")
+
+    if not args.skip_warmup:
+        from app.core.registry import registry
+
+        registry.startup()
+        print("\nPrecarga en segundo plano (readiness):")
+        for name, status in registry.readiness(recheck=False)["components"].items():
+            detail = f"{status['load_ms']:9.1f} ms" if status["state"] == "ready" else status["error"]
+            print(f"  {name:<26} {detail}")
+        registry.shutdown()
+
+    print(f"\n{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
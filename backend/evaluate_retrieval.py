@@ -0,0 +1,333 @@
+"""
+Evaluación del retrieval: calidad (recall@k, MRR, nDCG@k) y latencia (p50/p95/p99)
+sobre un conjunto de preguntas etiquetadas, con la configuración de retrieval que se indique.
+
+El resultado se guarda en JSON para comparar cambios de índice, troceo o modelo
+(--compare con un resultado anterior muestra las diferencias).
+
+Formato del conjunto (JSONL, una pregunta por línea):
+    {"query": "enlace plataforma SIGA", "bot_id": "SoporteTech", "relevant": ["<doc_id>", "manual.pdf"]}
+    {"query": "horario biblioteca", "relevant": {"<doc_id>_3": 2, "<doc_id>_4": 1}}
+    {"query": "costo matrícula", "answers": ["valor de la matrícula"]}
+
+- relevant: doc_ids, ids de chunk o nombres de archivo; como dict, con grado de relevancia (nDCG)
+- answers: fragmentos de texto (sin distinguir mayúsculas) que contiene un chunk relevante;
+  no dependen de ids, así que sirven para comparar distintos troceos o re-indexaciones
+- bot_id: opcional (por defecto --bot-id)
+- filters: opcional, alcance de documentos de la pregunta (campos de DocumentFilter:
+  doc_ids, filenames, file_types, uploaded_from, uploaded_to)
+
+Uso (desde backend/):
+    python evaluate_retrieval.py eval/soporte.jsonl --bot-id SoporteTech
+    python evaluate_retrieval.py eval/soporte.jsonl --mode hybrid --rerank --ks 1,5,10 --output hybrid.json
+    python evaluate_retrieval.py eval/soporte.jsonl --mmr --compare hybrid.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append('.')
+
+
+def load_queries(path: str, default_bot_id: str | None) -> list[dict]:
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            relevant = item.get("relevant") or {}
+            if isinstance(relevant, list):
+                relevant = {label: 1 for label in relevant}
+            answers = [answer.lower() for answer in item.get("answers") or []]
+            bot_id = item.get("bot_id") or default_bot_id
+            if not item.get("query") or not bot_id or not (relevant or answers):
+                raise SystemExit(f"{path}:{line_number}: cada línea necesita query, bot_id (o --bot-id) "
+                                 f"y relevant o answers")
+            queries.append({"query": item["query"], "bot_id": bot_id, "relevant": relevant, "answers": answers,
+                            "filters": item.get("filters")})
+    return queries
+
+
+def judge(chunk: dict, item: dict) -> tuple[str | None, float]:
+    """Etiqueta que cubre un chunk recuperado y su grado (None, 0 si no es relevante)"""
+    metadata = chunk.get("metadata") or {}
+    best, grade = None, 0.0
+    for key in (chunk.get("id"), metadata.get("doc_id"), metadata.get("filename")):
+        if key is not None and item["relevant"].get(key, 0) > grade:
+            best, grade = key, float(item["relevant"][key])
+    text = (chunk.get("text") or "").lower()
+    for answer in item["answers"]:
+        if answer in text and grade < 1:
+            best, grade = f"answer:{answer}", 1.0
+    return best, grade
+
+
+def score_query(chunks: list[dict], item: dict, ks: list[int]) -> dict:
+    """
+    Métricas de una pregunta. Cada etiqueta cuenta una sola vez (el primer chunk que la cubre):
+    varios chunks del mismo documento relevante no inflan recall ni nDCG.
+    """
+    labels = {**item["relevant"], **{f"answer:{answer}": 1 for answer in item["answers"]}}
+    ideal = sorted(labels.values(), reverse=True)
+    seen, gains, first_hit = set(), [], None
+    for rank, chunk in enumerate(chunks, 1):
+        label, grade = judge(chunk, item)
+        if label is not None and label not in seen:
+            seen.add(label)
+            gains.append((rank, grade, label))
+            if first_hit is None:
+                first_hit = rank
+
+    metrics = {"mrr": 1.0 / first_hit if first_hit else 0.0}
+    for k in ks:
+        found = [(rank, grade) for rank, grade, _ in gains if rank <= k]
+        dcg = sum((2 ** grade - 1) / math.log2(rank + 1) for rank, grade in found)
+        idcg = sum((2 ** grade - 1) / math.log2(rank + 1) for rank, grade in enumerate(ideal[:k], 1))
+        metrics[f"recall@{k}"] = len(found) / len(labels)
+        metrics[f"hit@{k}"] = 1.0 if found else 0.0
+        metrics[f"ndcg@{k}"] = dcg / idcg if idcg else 0.0
+    return metrics
+
+
+def latency_summary(latencies_ms: list[float]) -> dict:
+    if not latencies_ms:
+        return {}
+    values = np.asarray(latencies_ms)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "mean": round(float(values.mean()), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+
+def average(rows: list[dict]) -> dict:
+    return {key: round(sum(row[key] for row in rows) / len(rows), 4) for key in rows[0]} if rows else {}
+
+
+def bot_overrides(args) -> dict:
+    """Cambios sobre la configuración de cada bot indicados por línea de comandos"""
+    overrides = {
+        "retrieval_mode": args.mode,
+        "fusion_method": args.fusion,
+        "hybrid_vector_weight": args.vector_weight,
+        "rerank": args.rerank,
+        "mmr": args.mmr,
+        "mmr_lambda": args.mmr_lambda,
+        "max_sources": args.max_sources,
+        "adaptive_k": args.adaptive,
+        "adaptive_gap": args.adaptive_gap,
+        "adaptive_char_budget": args.char_budget,
+    }
+    if args.adaptive:
+        # todas las preguntas en la variante adaptive (sin grupo de control)
+        overrides["adaptive_traffic"] = 1.0
+    return {key: value for key, value in overrides.items() if value is not None}
+
+
+def evaluate(queries: list[dict], args) -> dict:
+    from app.core.config import settings
+    from app.core.registry import registry
+    from app.models.document import DocumentFilter
+    from app.services.bot_service import BotService
+    from app.services.retriever_service import RetrieverService
+
+    if not args.cache:
+        # se mide el retrieval, no el cache de resultados
+        settings.RETRIEVAL_CACHE_SIZE = 0
+    retriever = RetrieverService()
+    overrides = bot_overrides(args)
+    k = max(args.ks)
+
+    bot_configs = {}
+    for bot_id in sorted({item["bot_id"] for item in queries}):
+        bot_config = BotService().get_bot(bot_id)
+        if bot_config is None:
+            raise SystemExit(f"Bot {bot_id} no encontrado")
+        bot_configs[bot_id] = bot_config.model_copy(update=overrides)
+
+    def threshold_for(bot_id):
+        return args.threshold if args.threshold is not None else bot_configs[bot_id].retrieval_threshold
+
+    for item in queries:
+        item["scope"] = DocumentFilter(**item["filters"]) if item["filters"] else None
+
+    # calentamiento: carga de modelos, índices exactos y léxicos fuera de la medición
+    for item in queries[:args.warmup]:
+        retriever.search(item["query"], item["bot_id"], k=k, threshold=threshold_for(item["bot_id"]),
+                         bot_config=bot_configs[item["bot_id"]], filters=item["scope"])
+
+    results, latencies = [], []
+    for _ in range(args.repeat):
+        results, start_all = [], time.perf_counter()
+        if args.batch:
+            # una llamada a search_many por bot y alcance (latencia por pregunta = lote / preguntas)
+            groups = {}
+            for item in queries:
+                groups.setdefault((item["bot_id"], json.dumps(item["filters"], sort_keys=True)), []).append(item)
+            for (bot_id, _), items in groups.items():
+                start = time.perf_counter()
+                batch = retriever.search_many([item["query"] for item in items], bot_id, k=k,
+                                              threshold=threshold_for(bot_id), bot_config=bot_configs[bot_id],
+                                              filters=items[0]["scope"])
+                elapsed = (time.perf_counter() - start) * 1000
+                latencies.extend([elapsed / len(items)] * len(items))
+                results.extend(zip(items, batch, [elapsed / len(items)] * len(items)))
+        else:
+            for item in queries:
+                start = time.perf_counter()
+                chunks = retriever.search(item["query"], item["bot_id"], k=k, threshold=threshold_for(item["bot_id"]),
+                                          bot_config=bot_configs[item["bot_id"]], filters=item["scope"])
+                elapsed = (time.perf_counter() - start) * 1000
+                latencies.append(elapsed)
+                results.append((item, chunks, elapsed))
+        total_s = time.perf_counter() - start_all
+
+    per_query, per_bot = [], {}
+    for item, chunks, elapsed in results:
+        metrics = score_query(chunks, item, args.ks)
+        per_bot.setdefault(item["bot_id"], []).append(metrics)
+        per_query.append({
+            "query": item["query"],
+            "bot_id": item["bot_id"],
+            "filters": item["filters"],
+            "latency_ms": round(elapsed, 2),
+            "context_chars": sum(len(chunk.get("text") or "") for chunk in chunks),
+            "metrics": {key: round(value, 4) for key, value in metrics.items()},
+            "retrieved": [
+                {
+                    "id": chunk.get("id"),
+                    "doc_id": (chunk.get("metadata") or {}).get("doc_id"),
+                    "filename": (chunk.get("metadata") or {}).get("filename"),
+                    "similarity": chunk.get("similarity"),
+                    "relevant": judge(chunk, item)[1]
+                }
+                for chunk in chunks
+            ]
+        })
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "dataset": os.path.abspath(args.dataset),
+        "queries": len(queries),
+        "config": {
+            "ks": args.ks,
+            "threshold": args.threshold,
+            "overrides": overrides,
+            "batch": args.batch,
+            "cache": args.cache,
+            "repeat": args.repeat,
+            "vector_store": settings.VECTOR_STORE_BACKEND,
+            "bots": {
+                bot_id: {
+                    "embedding_model": bot_config.embedding_model or settings.EMBEDDING_MODEL,
+                    "retrieval_mode": bot_config.retrieval_mode,
+                    "fusion_method": bot_config.fusion_method,
+                    "rerank": bot_config.rerank,
+                    "mmr": bot_config.mmr,
+                    "mmr_lambda": bot_config.mmr_lambda,
+                    "adaptive_k": bot_config.adaptive_k,
+                    "adaptive_gap": bot_config.adaptive_gap,
+                    "adaptive_char_budget": bot_config.adaptive_char_budget,
+                    "max_sources": bot_config.max_sources,
+                    "threshold": threshold_for(bot_id),
+                    "collection": registry.vector_service_for_bot(bot_id).name
+                }
+                for bot_id, bot_config in bot_configs.items()
+            }
+        },
+        "metrics": average([row["metrics"] for row in per_query]),
+        "latency_ms": latency_summary(latencies),
+        "context": {
+            "avg_chunks": round(sum(len(row["retrieved"]) for row in per_query) / len(per_query), 2),
+            "avg_chars": round(sum(row["context_chars"] for row in per_query) / len(per_query))
+        },
+        "throughput_qps": round(len(queries) / total_s, 2) if total_s else None,
+        "per_bot": {bot_id: average(rows) for bot_id, rows in per_bot.items()},
+        "per_query": per_query
+    }
+
+
+def print_report(result: dict, baseline: dict | None = None):
+    print(f"\n{'='*80}")
+    print("EVALUACIÓN DE RETRIEVAL")
+    print(f"{'='*80}")
+    print(f"Conjunto: {result['dataset']} ({result['queries']} preguntas)")
+    print(f"Configuración: {json.dumps(result['config']['overrides'] or 'la de cada bot', ensure_ascii=False)}\n")
+
+    def line(label, value, base):
+        delta = f"  ({value - base:+.4f})" if base is not None else ""
+        print(f"  {label:<12} {value:>9.4f}{delta}")
+
+    base_metrics = (baseline or {}).get("metrics", {})
+    for key, value in result["metrics"].items():
+        line(key, value, base_metrics.get(key))
+    print()
+    base_latency = (baseline or {}).get("latency_ms", {})
+    for key, value in result["latency_ms"].items():
+        delta = f"  ({value - base_latency[key]:+.2f})" if key in base_latency else ""
+        print(f"  {key + ' ms':<12} {value:>9.2f}{delta}")
+
+    context = result["context"]
+    print(f"\n  Contexto por pregunta: {context['avg_chunks']} chunks, {context['avg_chars']} caracteres")
+
+    if len(result["per_bot"]) > 1:
+        print()
+        for bot_id, metrics in result["per_bot"].items():
+            print(f"  [{bot_id}] " + " | ".join(f"{key}: {value:.3f}" for key, value in metrics.items()))
+    print(f"{'='*80}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", help="Preguntas etiquetadas (JSONL)")
+    parser.add_argument("--bot-id", help="Bot de las líneas sin bot_id")
+    parser.add_argument("--ks", type=lambda value: sorted({int(k) for k in value.split(",")}), default=[1, 3, 5, 10],
+                        help="Cortes para recall/nDCG (se recuperan max(ks) chunks; con rerank o mmr, "
+                             "a lo sumo max_sources)")
+    parser.add_argument("--threshold", type=float, help="Umbral de similitud (por defecto el de cada bot)")
+    parser.add_argument("--mode", choices=["vector", "hybrid"], help="retrieval_mode")
+    parser.add_argument("--fusion", choices=["rrf", "weighted"], help="fusion_method en modo hybrid")
+    parser.add_argument("--vector-weight", type=float, help="hybrid_vector_weight")
+    parser.add_argument("--rerank", action=argparse.BooleanOptionalAction, default=None, help="Rerank con cross-encoder")
+    parser.add_argument("--mmr", action=argparse.BooleanOptionalAction, default=None, help="Diversificación MMR")
+    parser.add_argument("--mmr-lambda", type=float)
+    parser.add_argument("--max-sources", type=int)
+    parser.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=None,
+                        help="Top-k adaptativo (codo de scores / presupuesto de caracteres)")
+    parser.add_argument("--adaptive-gap", type=float)
+    parser.add_argument("--char-budget", type=int, help="adaptive_char_budget")
+    parser.add_argument("--batch", action="store_true", help="Buscar con search_many (un lote por bot)")
+    parser.add_argument("--cache", action="store_true", help="Usar el cache de resultados (por defecto desactivado)")
+    parser.add_argument("--warmup", type=int, default=3, help="Preguntas de calentamiento (no se miden)")
+    parser.add_argument("--repeat", type=int, default=1, help="Pasadas medidas (la latencia usa todas)")
+    parser.add_argument("--output", help="JSON de resultados (por defecto eval_results/retrieval_<fecha>.json)")
+    parser.add_argument("--compare", help="Resultado anterior (JSON) para mostrar diferencias")
+    args = parser.parse_args()
+
+    queries = load_queries(args.dataset, args.bot_id)
+    result = evaluate(queries, args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = args.output or os.path.join("eval_results", f"retrieval_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Exporta el modelo de embeddings a ONNX (y opcionalmente a int8) para EMBEDDING_BACKEND=onnx.
+
+Uso:
+    python export_onnx_model.py                      # modelo de settings.EMBEDDING_MODEL
+    python export_onnx_model.py --model all-MiniLM-L6-v2 --no-quantize
+"""
+import argparse
+import os
+import sys
+
+sys.path.append('.')
+
+import torch
+from sentence_transformers import SentenceTransformer
+
+from app.core.config import settings
+from app.services.embedding_service import onnx_model_dir
+
+
+class _TransformerOutput(torch.nn.Module):
+    """Devuelve solo last_hidden_state; el pooling se hace en OnnxEmbeddingService"""
+
+    def __init__(self, transformer):
+        super().__init__()
+        self.transformer = transformer
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.transformer(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids
+        )[0]
+
+
+def export(model_name: str, quantize: bool = True, opset: int = 14) -> str:
+    output_dir = onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    tokenizer = model.tokenizer
+    tokenizer.model_max_length = model.max_seq_length
+    tokenizer.save_pretrained(output_dir)
+
+    wrapper = _TransformerOutput(model[0].auto_model).eval()
+    dummy = tokenizer(["hola mundo"], return_tensors="pt", return_token_type_ids=True)
+    model_path = os.path.join(output_dir, "model.onnx")
+
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            model_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "token_type_ids": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset
+        )
+    print(f"✅ Modelo exportado: {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantized_path = os.path.join(output_dir, "model.int8.onnx")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"✅ Modelo int8: {quantized_path}")
+
+    return output_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--no-quantize", action="store_true", help="No generar la versión int8")
+    args = parser.parse_args()
+
+    export(args.model, quantize=not args.no_quantize)
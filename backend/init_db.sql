@@ -17,6 +17,7 @@ GRANT ALL PRIVILEGES ON SCHEMA public TO chatbot_user;
 -- Crear extensiones necesarias
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";  -- Para gen_random_uuid()
 CREATE EXTENSION IF NOT EXISTS "pg_trgm";     -- Para búsquedas de texto similares
+CREATE EXTENSION IF NOT EXISTS vector;        -- pgvector (VECTOR_STORE_BACKEND=pgvector)
 
 -- Mensaje de confirmación
 SELECT 'Base de datos chatbot_db creada exitosamente!' AS status;
@@ -0,0 +1,128 @@
+"""
+Script para redistribuir los vectores según CHROMA_COLLECTION_LAYOUT
+(colecciones de ChromaDB o tablas pgvector, según VECTOR_STORE_BACKEND)
+
+Copia cada chunk (texto, metadata y vector, sin re-embeber) a la colección que le
+corresponde en la distribución destino y luego lo borra de la colección de origen:
+- shared → bot: parte la colección compartida en una colección por bot
+- shared → organization: una colección por organización (bots sin organización, por bot)
+- bot/organization → shared: vuelve a juntar todo en la colección del modelo
+
+Uso:
+    python migrate_chroma_collections.py --layout bot --dry-run
+    python migrate_chroma_collections.py --layout bot
+    # luego: CHROMA_COLLECTION_LAYOUT=bot en .env y reiniciar la API
+"""
+import argparse
+from collections import defaultdict
+
+from app.core.config import settings
+from app.core.registry import collection_name_for_model, registry
+from app.services.bot_service import BotService
+
+LAYOUTS = ("shared", "bot", "organization")
+
+
+def target_partition(bot_id: str | None, bots: dict) -> str | None:
+    """Partición destino de un chunk según su bot_id"""
+    if not bot_id:
+        return None
+    return registry.partition_for_bot(bot_id, bots.get(bot_id))
+
+
+def migrate_collection(source, bots: dict, batch_size: int, dry_run: bool) -> tuple[dict, dict]:
+    """
+    Copia los chunks de una colección a sus colecciones destino;
+    devuelve los ids movidos y la partición de cada destino
+    """
+    moved = defaultdict(list)
+    pending = defaultdict(lambda: {"ids": [], "documents": [], "metadatas": [], "embeddings": []})
+    partitions = {}
+
+    def flush(name):
+        batch = pending.pop(name)
+        if not dry_run:
+            # en dry-run no se crean las colecciones destino
+            target = registry.get_vector_service(source.model_name, partitions[name])
+            target.add_embeddings(batch["ids"], batch["documents"], batch["embeddings"], batch["metadatas"])
+        moved[name].extend(batch["ids"])
+
+    for page in source.iter_chunks(batch_size=batch_size, include_embeddings=not dry_run):
+        for i, chunk_id in enumerate(page['ids']):
+            metadata = page['metadatas'][i]
+            partition = target_partition(metadata.get("bot_id"), bots)
+            name = collection_name_for_model(source.model_name, partition)
+            if name == source.name:
+                continue
+
+            partitions[name] = partition
+            batch = pending[name]
+            batch["ids"].append(chunk_id)
+            batch["documents"].append(page['documents'][i])
+            batch["metadatas"].append(metadata)
+            batch["embeddings"].append(None if dry_run else page['embeddings'][i])
+            if len(batch["ids"]) >= batch_size:
+                flush(name)
+
+    for name in list(pending):
+        flush(name)
+
+    return moved, partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layout", choices=LAYOUTS, default=settings.CHROMA_COLLECTION_LAYOUT,
+                        help="Distribución destino")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué se movería")
+    parser.add_argument("--keep-source", action="store_true", help="No borrar los chunks copiados del origen")
+    args = parser.parse_args()
+
+    # el registro enruta según la distribución destino
+    configured_layout = settings.CHROMA_COLLECTION_LAYOUT
+    settings.CHROMA_COLLECTION_LAYOUT = args.layout
+    bots = {bot.bot_id: bot for bot in BotService().list_bots()}
+
+    print(f"🔀 Migrando colecciones ({settings.VECTOR_STORE_BACKEND}) a la distribución '{args.layout}'"
+          f"{' (dry-run)' if args.dry_run else ''}\n")
+
+    # se toma la lista antes de crear las colecciones destino
+    sources = registry.document_vector_services()
+    total = 0
+    for source in sources:
+        before = source.count()
+        moved, partitions = migrate_collection(source, bots, args.batch_size, args.dry_run)
+        count = sum(len(ids) for ids in moved.values())
+        total += count
+        print(f"📚 {source.name}: {before} chunks, {count} a mover")
+        for name, ids in sorted(moved.items()):
+            print(f"   → {name}: {len(ids)} chunks")
+
+        if args.dry_run or not count:
+            continue
+
+        # verificar antes de borrar el origen
+        for name, ids in moved.items():
+            target = registry.get_vector_service(source.model_name, partitions[name])
+            found = target.get(ids=ids, include=[])['ids']
+            if len(found) != len(ids):
+                raise RuntimeError(f"La colección {name} tiene {len(found)} de {len(ids)} chunks copiados; "
+                                   f"no se borra el origen {source.name}")
+
+        if not args.keep_source:
+            for ids in moved.values():
+                for start in range(0, len(ids), args.batch_size):
+                    source.delete_chunks(ids[start:start + args.batch_size])
+            # las particiones que quedaron vacías sobran en la nueva distribución
+            if source.partition and source.count() == 0:
+                registry.drop_vector_service(source)
+
+    print(f"\n✅ Migración {'simulada' if args.dry_run else 'completada'}: {total} chunks")
+    if not args.dry_run and args.layout != configured_layout:
+        print(f"   Recuerda fijar CHROMA_COLLECTION_LAYOUT={args.layout} en .env y reiniciar la API")
+    registry.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Script para copiar las colecciones de ChromaDB a tablas pgvector (VECTOR_STORE_BACKEND=pgvector)
+
+Por cada colección de documentos crea la tabla del mismo nombre, con el mismo modelo,
+partición y espacio de distancia, y copia chunks, metadata y vectores sin re-embeber
+(COPY por lotes). El índice ANN se construye al final de la carga, que es mucho más
+rápido que mantenerlo fila a fila. ChromaDB no se modifica.
+
+Uso (Postgres con la extensión vector, p. ej. docker compose up -d postgres):
+    python migrate_chroma_to_pgvector.py --dry-run
+    python migrate_chroma_to_pgvector.py --index hnsw
+    # luego: VECTOR_STORE_BACKEND=pgvector en .env y reiniciar los nodos de la API
+
+    # solo recrear los índices ANN de las tablas existentes (p. ej. pasar a IVFFlat)
+    python migrate_chroma_to_pgvector.py --reindex --index ivfflat
+"""
+import argparse
+import time
+
+from app.core.config import settings
+from app.core.registry import registry
+from app.services.pgvector_store import INDEX_TYPES, PgVectorStore
+
+
+def copy_collection(source, index_type: str, batch_size: int) -> int:
+    """Copia una colección de Chroma a su tabla pgvector; devuelve los chunks copiados"""
+    target = PgVectorStore(
+        collection_name=source.name,
+        pool=registry.pg_pool,
+        model_name=source.model_name,
+        partition=source.partition,
+        space=source.space,
+        index_type=index_type,
+        defer_index=True
+    )
+    if target.space != source.space:
+        raise RuntimeError(f"La tabla {target.name} ya existe con espacio '{target.space}' "
+                           f"y la colección usa '{source.space}'")
+
+    copied = 0
+    start = time.perf_counter()
+    for page in source.iter_chunks(batch_size=batch_size):
+        target.add_embeddings(page['ids'], page['documents'], page['embeddings'], page['metadatas'])
+        found = target.get(ids=page['ids'], include=[])['ids']
+        if len(found) != len(page['ids']):
+            raise RuntimeError(f"{target.name}: se copiaron {len(found)} de {len(page['ids'])} chunks del lote")
+        copied += len(found)
+    elapsed = time.perf_counter() - start
+    print(f"   ↳ {copied} chunks en {elapsed:.1f} s ({copied / elapsed if elapsed else 0:.0f} chunks/s)")
+
+    target.build_index(index_type, concurrently=False)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", choices=INDEX_TYPES, default=settings.PGVECTOR_INDEX.lower(),
+                        help="Índice ANN de las tablas (por defecto PGVECTOR_INDEX)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué colecciones se copiarían")
+    parser.add_argument("--reindex", action="store_true", help="Solo recrear el índice ANN de las tablas existentes")
+    args = parser.parse_args()
+
+    if args.reindex:
+        print(f"🧭 Recreando índices '{args.index}' de las tablas pgvector\n")
+        for collection in registry.pg_pool.list_collections():
+            store = PgVectorStore(
+                collection_name=collection["name"],
+                pool=registry.pg_pool,
+                model_name=collection["embedding_model"],
+                partition=collection["partition"]
+            )
+            print(f"📚 {store.name}: {store.index_type} → {args.index} ({store.count()} chunks)")
+            if not args.dry_run:
+                store.build_index(args.index)
+        registry.shutdown()
+        return
+
+    # las colecciones de origen se leen siempre de ChromaDB
+    settings.VECTOR_STORE_BACKEND = "chroma"
+    print(f"🐘 Copiando colecciones de ChromaDB a pgvector (índice '{args.index}')"
+          f"{' (dry-run)' if args.dry_run else ''}\n")
+
+    total = 0
+    for source in registry.document_vector_services():
+        count = source.count()
+        print(f"📚 {source.name}: {count} chunks ({source.model_name}, {source.space})")
+        if args.dry_run or not count:
+            continue
+        total += copy_collection(source, args.index, args.batch_size)
+
+    print(f"\n✅ Copia {'simulada' if args.dry_run else 'completada'}: {total} chunks")
+    if not args.dry_run:
+        print("   Recuerda fijar VECTOR_STORE_BACKEND=pgvector en .env y reiniciar la API")
+    registry.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Script para agregar uploaded_at_ts (fecha de subida en segundos epoch) a los chunks
+indexados antes de los filtros por documento (DocumentFilter)
+
+Los filtros de rango por fecha se aplican en el índice sobre ese campo numérico; sin él,
+los chunks antiguos quedan fuera de cualquier búsqueda con uploaded_from/uploaded_to.
+Recorre todas las colecciones de documentos (Chroma o pgvector, según VECTOR_STORE_BACKEND)
+y solo actualiza metadata: no re-embebe ni mueve chunks. Se puede ejecutar varias veces.
+
+Uso:
+    python migrate_upload_epochs.py
+    # luego reiniciar la API (con Chroma, los índices exactos en memoria guardan la metadata anterior)
+"""
+import argparse
+
+from app.core.registry import registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    total = 0
+    for vector_service in registry.document_vector_services():
+        updated = vector_service.backfill_upload_epochs(batch_size=args.batch_size)
+        total += updated
+        print(f"📚 {vector_service.name}: {updated} chunks actualizados")
+
+    print(f"\n✅ uploaded_at_ts agregado a {total} chunks")
+    registry.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Script para reconstruir las colecciones de ChromaDB con otro espacio de distancia
+
+Chroma no permite cambiar hnsw:space de una colección existente. Por cada colección
+de documentos con otro espacio:
+1. copia chunks, metadata y vectores (re-normalizados a norma 1) a una colección temporal
+   creada con el espacio nuevo, sin re-embeber
+2. verifica que estén todos
+3. renombra la original a un respaldo, la temporal al nombre original y borra el respaldo
+   (si la ejecución se interrumpe, la siguiente restaura o descarta el respaldo y vuelve a copiar)
+
+Uso (con la API detenida):
+    python rebuild_chroma_index.py --dry-run
+    python rebuild_chroma_index.py --space cosine
+"""
+import argparse
+import os
+import shutil
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.registry import registry
+from app.services.vector_service import DISTANCE_SPACES, VectorService
+
+
+def temporary_name(name: str) -> str:
+    return f"{name[:55]}-rebuild"
+
+
+def backup_name(name: str) -> str:
+    return f"{name[:55]}-previous"
+
+
+def discard_temporary(tmp_name: str):
+    """Borra la colección temporal junto con sus filas del registro de documentos y sus índices exactos"""
+    if tmp_name in {c.name for c in registry.chroma_client.list_collections()}:
+        registry.chroma_client.delete_collection(tmp_name)
+    registry.document_registry.delete(tmp_name)
+    shutil.rmtree(os.path.join(settings.EXACT_INDEX_DIR, tmp_name), ignore_errors=True)
+
+
+def recover(name: str):
+    """
+    Deja en orden lo que haya dejado una reconstrucción interrumpida: restaura el respaldo si
+    la original ya no existe (o lo borra si el cambio de nombre se completó) y descarta la temporal
+    """
+    existing = {c.name for c in registry.chroma_client.list_collections()}
+    backup = backup_name(name)
+    if backup in existing:
+        if name in existing:
+            registry.chroma_client.delete_collection(backup)
+            print(f"   🧹 {name}: se borra el respaldo de una reconstrucción anterior")
+        else:
+            registry.chroma_client.get_collection(backup, embedding_function=None).modify(name=name)
+            print(f"   ♻️ {name}: restaurada desde el respaldo de una reconstrucción interrumpida")
+    discard_temporary(temporary_name(name))
+
+
+def normalize(embeddings) -> np.ndarray:
+    """Los vectores viejos pueden no estar normalizados: ip y el score coseno lo requieren"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def rebuild_collection(source: VectorService, space: str, batch_size: int) -> int:
+    name = source.collection.name
+    tmp_name = temporary_name(name)
+    recover(name)
+
+    target = VectorService(
+        collection_name=tmp_name,
+        client=registry.chroma_client,
+        model_name=source.model_name,
+        partition=source.partition,
+        space=space
+    )
+    for page in source.iter_chunks(batch_size=batch_size):
+        target.add_embeddings(page['ids'], page['documents'], normalize(page['embeddings']), page['metadatas'])
+
+    expected, copied = source.collection.count(), target.collection.count()
+    if copied != expected:
+        discard_temporary(tmp_name)
+        raise RuntimeError(f"{name}: se copiaron {copied} de {expected} chunks; se conserva la colección original")
+
+    # las filas del registro de documentos de la original siguen valiendo (mismos chunks)
+    backup = backup_name(name)
+    source.collection.modify(name=backup)
+    target.collection.modify(name=name)
+    registry.chroma_client.delete_collection(backup)
+    discard_temporary(tmp_name)
+    # los índices exactos guardados tienen los vectores sin re-normalizar
+    shutil.rmtree(os.path.join(settings.EXACT_INDEX_DIR, name), ignore_errors=True)
+    if source.exact_indexes is not None:
+        source.exact_indexes.clear()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--space", choices=DISTANCE_SPACES, default=settings.CHROMA_DISTANCE.lower(),
+                        help="Espacio de distancia destino (por defecto CHROMA_DISTANCE)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--force", action="store_true", help="Reconstruir aunque ya use ese espacio")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué colecciones se reconstruirían")
+    args = parser.parse_args()
+
+    if settings.VECTOR_STORE_BACKEND != "chroma":
+        raise SystemExit("Este script reconstruye colecciones de ChromaDB; con pgvector usa "
+                         "migrate_chroma_to_pgvector.py --reindex")
+
+    print(f"🔧 Reconstruyendo colecciones de ChromaDB con espacio '{args.space}'"
+          f"{' (dry-run)' if args.dry_run else ''}\n")
+
+    rebuilt = 0
+    for vector_service in registry.document_vector_services():
+        name = vector_service.collection.name
+        if vector_service.space == args.space and not args.force:
+            print(f"   ✓ {name}: ya usa '{args.space}'")
+            continue
+
+        count = vector_service.collection.count()
+        print(f"📚 {name}: {vector_service.space} → {args.space} ({count} chunks)")
+        if args.dry_run:
+            continue
+
+        rebuild_collection(vector_service, args.space, args.batch_size)
+        rebuilt += 1
+        print(f"   ✅ {name} reconstruida")
+
+    print(f"\n✅ Colecciones reconstruidas: {rebuilt}")
+    if args.space != settings.CHROMA_DISTANCE.lower():
+        print(f"   Recuerda fijar CHROMA_DISTANCE={args.space} en .env para las colecciones nuevas")
+    registry.shutdown()
+
+
+if __name__ == "__main__":
+    main()
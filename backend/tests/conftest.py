@@ -0,0 +1,77 @@
+"""
+Fixtures comunes: cada test corre en un directorio temporal (bots_config.json, chroma_db,
+registro de documentos...) con un embedder determinista en lugar del modelo real, así los
+tests no descargan modelos ni dependen del orden en que corren.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.registry import registry as process_registry
+
+
+class FakeEmbedding:
+    """Bolsa de palabras con hashing: textos con las mismas palabras dan el mismo vector normalizado"""
+
+    def __init__(self, model_name: str = "fake-model", dimension: int = 64):
+        self.model_name = model_name
+        self.dimension = dimension
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return np.ascontiguousarray(vectors / norms)
+
+    def embed_query(self, text):
+        return self.embed([text])[0]
+
+
+def bot(bot_id: str, **config) -> dict:
+    """Configuración mínima de un bot para bots_config.json"""
+    return {"bot_id": bot_id, "name": bot_id, "retrieval_threshold": 0.0, **config}
+
+
+@pytest.fixture
+def embedding_dimension() -> int:
+    return 64
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch, embedding_dimension):
+    """Registro del proceso aislado en tmp_path, con embeddings falsos y sin caches entre llamadas"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "bots_config.json").write_text(json.dumps([bot("default")]))
+    for name, value in {
+        "EMBEDDING_CACHE_ENABLED": False,
+        "QUERY_EMBEDDING_CACHE_SIZE": 0,
+        "EMBEDDING_BATCHING": False,
+        "RETRIEVAL_CACHE_SIZE": 0,
+        "EXACT_INDEX_MAX_CHUNKS": 0,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+    embedders = {}
+
+    def get_embedding_service(model_name, threads=None):
+        return embedders.setdefault(model_name, FakeEmbedding(model_name, embedding_dimension))
+
+    import app.services.embedding_service as embedding_service
+    monkeypatch.setattr(embedding_service, "get_embedding_service", get_embedding_service)
+
+    yield process_registry
+    process_registry.shutdown()
+
+
+@pytest.fixture
+def bots(registry, tmp_path):
+    """Escribe los bots indicados en bots_config.json: bots(bot("a"), bot("b", embedding_model="m2"))"""
+    def write(*configs):
+        (tmp_path / "bots_config.json").write_text(json.dumps([bot("default"), *configs]))
+    return write
@@ -0,0 +1,40 @@
+from app.services.adaptive_k import ADAPTIVE, CONTROL, adaptive_cut, variant_for
+from app.services.document_service import DocumentService
+from app.services.retriever_service import RetrieverService
+from tests.conftest import bot
+
+
+def test_cut_at_the_largest_drop_over_gap():
+    assert adaptive_cut([0.9, 0.85, 0.4, 0.35], [100] * 4, gap=0.2) == (2, "gap")
+    assert adaptive_cut([0.9, 0.85, 0.8], [100] * 3, gap=0.2) == (3, None)
+
+
+def test_cut_respects_char_budget_and_min_keep():
+    assert adaptive_cut([0.9, 0.8, 0.7], [400, 400, 400], gap=1.0, char_budget=900) == (2, "budget")
+    assert adaptive_cut([0.9, 0.2, 0.1], [100] * 3, gap=0.1, min_keep=2) == (2, "gap")
+    assert adaptive_cut([0.9, 0.8], [1000, 1000], gap=1.0, char_budget=10, min_keep=1) == (1, "budget")
+
+
+def test_unscored_chunks_do_not_count_for_the_elbow():
+    assert adaptive_cut([0.9, 0.5, None], [100] * 3, gap=0.3) == (1, "gap")
+
+
+def test_variant_is_stable_and_follows_traffic():
+    assert variant_for("a", "horario", 1.0) == ADAPTIVE
+    assert variant_for("a", "horario", 0.0) == CONTROL
+    assert len({variant_for("a", "horario", 0.5) for _ in range(5)}) == 1
+    share = sum(variant_for("a", f"pregunta {i}", 0.3) == ADAPTIVE for i in range(2000)) / 2000
+    assert 0.25 < share < 0.35
+
+
+def test_search_and_search_many_trim_to_max_sources(registry, bots):
+    bots(bot("a", max_sources=2, retrieval_k=5))
+    DocumentService()._store_chunks(
+        registry.vector_service_for_bot("a"), "a", "doc",
+        [f"contrato cláusula {i} {'anexo ' * i}" for i in range(5)],
+        {"bot_id": "a", "filename": "doc.txt"}
+    )
+    retriever = RetrieverService()
+
+    assert len(retriever.search("contrato", "a", k=5)) == 2
+    assert [len(chunks) for chunks in retriever.search_many(["contrato", "cláusula"], "a", k=5)] == [2, 2]
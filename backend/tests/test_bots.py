@@ -0,0 +1,69 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import bots as bots_api
+from app.core.config import settings
+from tests.conftest import bot
+
+
+@pytest.fixture
+def client(registry):
+    app = FastAPI()
+    app.include_router(bots_api.router, prefix="/bots")
+    return TestClient(app)
+
+
+def add_document(registry, bot_id, doc_id="doc", text="manzana pera"):
+    registry.vector_service_for_bot(bot_id).add_document_chunks(
+        doc_id=doc_id, chunks=[text], metadata={"bot_id": bot_id, "filename": f"{doc_id}.txt"}
+    )
+
+
+def test_change_embedding_model_with_documents_conflicts(client, registry, bots):
+    bots(bot("a"))
+    add_document(registry, "a")
+
+    response = client.put("/bots/a", json={"embedding_model": "otro-modelo"})
+
+    assert response.status_code == 409
+    assert client.get("/bots/a").json()["bot"]["embedding_model"] is None
+
+
+def test_change_embedding_model_without_documents(client, bots):
+    bots(bot("a"))
+
+    response = client.put("/bots/a", json={"embedding_model": "otro-modelo"})
+
+    assert response.status_code == 200
+    assert response.json()["bot"]["embedding_model"] == "otro-modelo"
+
+
+def test_update_other_fields_with_documents(client, registry, bots):
+    bots(bot("a"))
+    add_document(registry, "a")
+
+    response = client.put("/bots/a", json={"retrieval_k": 3})
+
+    assert response.status_code == 200
+
+
+def test_change_organization_with_documents_conflicts(client, registry, bots, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_COLLECTION_LAYOUT", "organization")
+    bots(bot("a", organization_id="org1"))
+    add_document(registry, "a")
+
+    response = client.put("/bots/a", json={"organization_id": "org2"})
+
+    assert response.status_code == 409
+    assert client.get("/bots/a").json()["bot"]["organization_id"] == "org1"
+
+
+def test_change_organization_in_shared_layout(client, registry, bots, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_COLLECTION_LAYOUT", "shared")
+    bots(bot("a", organization_id="org1"))
+    add_document(registry, "a")
+
+    response = client.put("/bots/a", json={"organization_id": "org2"})
+
+    assert response.status_code == 200
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import chat
+from tests.conftest import bot
+
+
+@pytest.fixture
+def client(registry, bots):
+    bots(bot("a"))
+    store = registry.vector_service_for_bot("a")
+    for doc_id, filename, text in (("d1", "a.pdf", "manzana pera"), ("d2", "b.txt", "manzana uva")):
+        store.add_document_chunks(doc_id=doc_id, chunks=[text], metadata={"bot_id": "a", "filename": filename})
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/chat")
+    return TestClient(app)
+
+
+def test_debug_retrieval_reports_similarity_and_distance(client):
+    response = client.get("/chat/debug-retrieval", params={"query": "manzana pera", "bot_id": "a"})
+
+    chunks = response.json()["chunks"]
+    assert response.status_code == 200
+    assert chunks[0]["metadata"]["doc_id"] == "d1"
+    for chunk in chunks:
+        assert 0 <= chunk["similarity"] <= 1
+        assert chunk["distance"] == pytest.approx(1 - chunk["similarity"], abs=1e-3)
+
+
+def test_debug_retrieval_filters(client):
+    response = client.get("/chat/debug-retrieval", params={"query": "manzana", "bot_id": "a", "filename": ["b.txt"]})
+    invalid = client.get("/chat/debug-retrieval", params={
+        "query": "manzana", "bot_id": "a", "uploaded_from": "2025-03-01", "uploaded_to": "2024-03-01"
+    })
+
+    assert [chunk["metadata"]["filename"] for chunk in response.json()["chunks"]] == ["b.txt"]
+    assert invalid.status_code == 422
+
+
+def test_retrieve_batch_matches_individual_searches(client, registry, monkeypatch):
+    from app.services.retriever_service import RetrieverService
+
+    queries = ["manzana pera", "uva", "manzana"]
+    store = registry.vector_service_for_bot("a")
+    query_many = store.query_many
+    calls = []
+
+    def counted_query_many(*args, **kwargs):
+        calls.append(kwargs.get("query_texts"))
+        return query_many(*args, **kwargs)
+
+    monkeypatch.setattr(store, "query_many", counted_query_many)
+    response = client.post("/chat/retrieve-batch", json={"bot_id": "a", "queries": queries})
+
+    results = response.json()["results"]
+    assert response.status_code == 200
+    assert calls == [queries]
+    for query, result in zip(queries, results):
+        expected = RetrieverService().search(query, "a", k=response.json()["k"], threshold=response.json()["threshold"])
+        assert result["query"] == query
+        assert [c["metadata"]["doc_id"] for c in result["chunks"]] == [c["metadata"]["doc_id"] for c in expected]
+
+
+def test_retrieve_batch_unknown_bot(client):
+    response = client.post("/chat/retrieve-batch", json={"bot_id": "nadie", "queries": ["manzana"]})
+
+    assert response.status_code == 404
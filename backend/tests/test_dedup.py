@@ -0,0 +1,103 @@
+from app.core.config import settings
+from app.models.document import DocumentFilter
+from app.services.document_service import DocumentService
+from app.services.retriever_service import RetrieverService
+from tests.conftest import bot
+
+TEXT = "el contrato de arrendamiento vence el treinta de junio y se renueva por un año más"
+
+
+def upload(registry, bot_id, doc_id, chunks):
+    DocumentService()._store_chunks(
+        registry.vector_service_for_bot(bot_id), bot_id, doc_id, chunks,
+        {"bot_id": bot_id, "filename": f"{doc_id}.txt"}
+    )
+
+
+def test_default_mode_keeps_duplicates_searchable_by_document(registry, bots):
+    bots(bot("a"))
+    assert settings.DEDUP_MODE == "link"
+    upload(registry, "a", "original", [TEXT])
+    upload(registry, "a", "copia", [TEXT])
+
+    chunks = RetrieverService().search(
+        "contrato arrendamiento", "a", k=5, filters=DocumentFilter(doc_ids=["copia"])
+    )
+
+    assert [chunk["metadata"]["doc_id"] for chunk in chunks] == ["copia"]
+    assert chunks[0]["metadata"]["duplicate_of"] == "original_0"
+
+
+def test_search_collapses_linked_duplicates(registry, bots):
+    bots(bot("a"))
+    upload(registry, "a", "original", [TEXT])
+    upload(registry, "a", "copia", [TEXT])
+    upload(registry, "a", "copia2", [TEXT])
+
+    chunks = RetrieverService().search("contrato arrendamiento", "a", k=5)
+
+    assert [chunk["id"] for chunk in chunks] == ["original_0"]
+
+
+def test_skip_mode_does_not_write_duplicates(registry, bots, monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_MODE", "skip")
+    bots(bot("a"))
+    upload(registry, "a", "original", [TEXT])
+    upload(registry, "a", "copia", ["otro texto distinto del contrato", TEXT])
+
+    ids = registry.vector_service_for_bot("a").get(where={"doc_id": "copia"}, include=[])["ids"]
+
+    assert ids == ["copia_0"]
+
+
+OTHER = "la biblioteca central abre los sábados de ocho de la mañana a dos de la tarde"
+THIRD = "las solicitudes de beca se reciben hasta el quince de marzo en la oficina de bienestar"
+
+
+def duplicate_of(registry, bot_id, chunk_id):
+    return registry.vector_service_for_bot(bot_id).get(ids=[chunk_id], include=["metadatas"])["metadatas"][0].get("duplicate_of")
+
+
+def test_move_to_other_model_keeps_per_chunk_metadata(registry, bots):
+    bots(bot("a"), bot("c", embedding_model="otro-modelo"))
+    upload(registry, "a", "original", [TEXT])
+    upload(registry, "a", "copia", [TEXT, OTHER])
+    assert duplicate_of(registry, "a", "copia_0") == "original_0"
+    assert duplicate_of(registry, "a", "copia_1") is None
+
+    DocumentService().move_document_to_bot("copia", "c")
+
+    # en el bot destino no hay original: ninguno de los dos es duplicado
+    assert not duplicate_of(registry, "c", "copia_0")
+    assert not duplicate_of(registry, "c", "copia_1")
+
+
+def test_move_links_to_originals_in_target_bot(registry, bots):
+    bots(bot("a"), bot("b"))
+    upload(registry, "a", "copia", [OTHER, TEXT])
+    upload(registry, "b", "original", [TEXT])
+
+    DocumentService().move_document_to_bot("copia", "b")
+
+    assert not duplicate_of(registry, "b", "copia_0")
+    assert duplicate_of(registry, "b", "copia_1") == "original_0"
+
+
+def test_moving_or_deleting_an_original_relinks_its_duplicates(registry, bots):
+    bots(bot("a"), bot("b"))
+    upload(registry, "a", "original", [TEXT, THIRD])
+    upload(registry, "a", "copia1", [TEXT])
+    upload(registry, "a", "copia2", [TEXT])
+    upload(registry, "a", "copia3", [THIRD])
+    assert duplicate_of(registry, "a", "copia2_0") == "original_0"
+
+    DocumentService().move_document_to_bot("original", "b")
+
+    # el primero queda como original y el otro apunta a él, ya no al chunk del bot b
+    assert not duplicate_of(registry, "a", "copia1_0")
+    assert duplicate_of(registry, "a", "copia2_0") == "copia1_0"
+    assert not duplicate_of(registry, "a", "copia3_0")
+
+    DocumentService().delete_document("copia1")
+
+    assert not duplicate_of(registry, "a", "copia2_0")
@@ -0,0 +1,63 @@
+from app.services.document_registry import DocumentRegistry
+from app.services.document_service import DocumentService
+from tests.conftest import bot
+
+
+def document(doc_id, bot_id="a", day=1, file_type="application/pdf", chunks=1):
+    return {
+        "doc_id": doc_id, "bot_id": bot_id, "filename": f"{doc_id}.pdf", "file_type": file_type,
+        "uploaded_at": f"2025-03-{day:02d}T10:00:00", "chunks": chunks
+    }
+
+
+def test_pagination_filters_and_total(tmp_path):
+    registry = DocumentRegistry(str(tmp_path / "registry.sqlite3"))
+    registry.rebuild("c1", {f"d{i}": document(f"d{i}", day=i + 1) for i in range(5)})
+    registry.rebuild("c2", {"otro": document("otro", bot_id="b", day=9, file_type="text/plain")})
+
+    first = registry.list_documents(["c1", "c2"], limit=2)
+    second = registry.list_documents(["c1", "c2"], limit=2, offset=2)
+
+    assert first["total"] == second["total"] == 6
+    # del más reciente al más antiguo
+    assert [d["doc_id"] for d in first["documents"]] == ["otro", "d4"]
+    assert [d["doc_id"] for d in second["documents"]] == ["d3", "d2"]
+    assert registry.list_documents(["c1"], bot_id="b")["total"] == 0
+    assert registry.list_documents(["c1", "c2"], file_type="text/plain")["documents"][0]["doc_id"] == "otro"
+    filtered = registry.list_documents(["c1"], uploaded_from="2025-03-02", uploaded_to="2025-03-04")
+    assert [d["doc_id"] for d in filtered["documents"]] == ["d2", "d1"]
+    registry.close()
+
+
+def test_replace_and_delete(tmp_path):
+    registry = DocumentRegistry(str(tmp_path / "registry.sqlite3"))
+    registry.rebuild("c1", {"d1": document("d1"), "d2": document("d2", bot_id="b")})
+
+    registry.replace("c1", ["d1"], {"d1": document("d1", chunks=7)})
+    registry.replace("c1", ["d2"], {})
+
+    assert [(d["doc_id"], d["chunks"]) for d in registry.list_documents(["c1"])["documents"]] == [("d1", 7)]
+    registry.delete("c1", bot_id="a")
+    assert registry.list_documents(["c1"])["total"] == 0
+    assert registry.is_synced("c1")
+    registry.close()
+
+
+def test_listing_follows_writes_and_indexes_existing_collections(registry, bots):
+    bots(bot("a"), bot("b", embedding_model="m2"))
+    registry.vector_service_for_bot("a").add_document_chunks("d1", ["uno", "dos"], {"bot_id": "a"})
+    registry.vector_service_for_bot("b").add_document_chunks("d2", ["tres"], {"bot_id": "b"})
+    service = DocumentService()
+
+    listed = service.list_documents()
+    assert listed["total"] == 2
+    assert {d["doc_id"]: d["chunks"] for d in listed["documents"]} == {"d1": 2, "d2": 1}
+    assert [d["doc_id"] for d in service.list_documents(bot_id="b")["documents"]] == ["d2"]
+
+    # registro perdido (colección anterior al registro): se reconstruye en el primer listado
+    store = registry.vector_service_for_bot("a")
+    store.documents.delete(store.name)
+    assert [d["doc_id"] for d in service.list_documents(bot_id="a")["documents"]] == ["d1"]
+
+    service.delete_document("d1")
+    assert service.list_documents()["total"] == 1
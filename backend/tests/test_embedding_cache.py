@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.services.embedding_cache import CachedDocumentEmbedder, EmbeddingCache, content_hash
+from tests.conftest import FakeEmbedding
+
+
+class CountingEmbedding(FakeEmbedding):
+    """FakeEmbedding que guarda los textos que llegan al modelo"""
+
+    def __init__(self, model_name="fake-model"):
+        super().__init__(model_name)
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+
+def test_repeated_chunks_are_embedded_once(tmp_path):
+    embedder = CountingEmbedding()
+    cached = CachedDocumentEmbedder(embedder, EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+
+    first = cached.embed(["uno dos", "tres", "uno dos"])
+    second = cached.embed(["tres", "cuatro"])
+
+    assert embedder.calls == [["uno dos", "tres"], ["cuatro"]]
+    assert first.dtype == np.float32 and first.shape == (3, embedder.dimension)
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(second[0], first[1])
+    assert cached.stats() == {"hits": 2, "misses": 3}
+
+
+def test_cache_persists_and_is_scoped_by_model(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = EmbeddingCache(path)
+    CachedDocumentEmbedder(CountingEmbedding("m1"), cache).embed(["uno dos"])
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    m1, m2 = CountingEmbedding("m1"), CountingEmbedding("m2")
+    CachedDocumentEmbedder(m1, reopened).embed(["uno dos"])
+    CachedDocumentEmbedder(m2, reopened).embed(["uno dos"])
+
+    assert m1.calls == []
+    assert m2.calls == [["uno dos"]]
+    assert reopened.count() == 2 and reopened.count("m1") == 1
+    assert set(reopened.get_many("m1", [content_hash("uno dos"), content_hash("otro")])) == {content_hash("uno dos")}
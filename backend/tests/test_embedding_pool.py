@@ -0,0 +1,60 @@
+"""
+ParallelEmbedder sin levantar procesos: los workers reales cargan el modelo en cada proceso,
+así que aquí el pool es de hilos y el "modelo del worker" es el FakeEmbedding.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import embedding_pool
+from app.services.embedding_pool import ParallelEmbedder
+from tests.conftest import FakeEmbedding
+
+
+class ShardRecorder(FakeEmbedding):
+    def __init__(self):
+        super().__init__()
+        self.shards = []
+
+    def embed(self, texts):
+        self.shards.append(len(texts))
+        return super().embed(texts)
+
+
+def test_small_lists_stay_in_process():
+    local = ShardRecorder()
+    parallel = ParallelEmbedder(local, workers=2, shard_size=2, min_chunks=5)
+
+    vectors = parallel.embed(["uno", "dos", "tres"])
+
+    assert local.shards == [3]
+    assert vectors.shape == (3, local.dimension)
+    assert parallel._pool is None
+
+
+def test_large_lists_are_sharded_and_keep_their_order(monkeypatch):
+    local, worker = ShardRecorder(), ShardRecorder()
+    monkeypatch.setattr(embedding_pool, "_worker_service", worker)
+    parallel = ParallelEmbedder(local, workers=2, shard_size=2, min_chunks=3)
+    parallel._pool = ThreadPoolExecutor(max_workers=2)
+    texts = [f"texto número {i}" for i in range(5)]
+
+    vectors = parallel.embed(texts)
+    parallel.stop()
+
+    assert local.shards == []
+    assert sorted(worker.shards) == [1, 2, 2]
+    assert vectors.dtype == np.float32
+    np.testing.assert_array_equal(vectors, FakeEmbedding().embed(texts))
+    assert parallel._pool is None
+
+
+def test_registry_composes_pool_below_the_cache(registry, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_WORKERS", 2)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+
+    embedder = registry.get_document_embedder()
+
+    assert isinstance(embedder.embedding_service, ParallelEmbedder)
+    assert embedder.embedding_service.workers == 2
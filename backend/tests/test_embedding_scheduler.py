@@ -0,0 +1,59 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.embedding_scheduler import EmbeddingScheduler
+from tests.conftest import FakeEmbedding
+
+
+def test_concurrent_queries_share_batches():
+    scheduler = EmbeddingScheduler(FakeEmbedding(), max_batch_size=8, max_wait_ms=20)
+    scheduler.start()
+    texts = [f"consulta número {i}" for i in range(16)]
+    results = {}
+
+    def embed(text):
+        results[text] = scheduler.embed_query(text)
+
+    threads = [threading.Thread(target=embed, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.stop()
+
+    expected = FakeEmbedding().embed(texts)
+    np.testing.assert_allclose(np.stack([results[text] for text in texts]), expected)
+    stats = scheduler.stats()
+    assert stats["items"] == 16
+    assert stats["batches"] < 16
+
+
+def test_query_after_stop_fails_instead_of_hanging():
+    scheduler = EmbeddingScheduler(FakeEmbedding())
+    scheduler.start()
+    scheduler.embed_query("antes de detener")
+    scheduler.stop()
+
+    with pytest.raises(RuntimeError):
+        scheduler.embed_query("después de detener")
+
+    scheduler.start()
+    assert scheduler.embed_query("otra vez").shape == (64,)
+    scheduler.stop()
+
+
+def test_stop_fails_queued_queries_without_a_worker():
+    scheduler = EmbeddingScheduler(FakeEmbedding())
+    scheduler.start()
+    scheduler.stop()
+    # una consulta que quedó en la cola sin hilo que la procese
+    from concurrent.futures import Future
+    future = Future()
+    scheduler._queue.put(("huérfana", future))
+
+    scheduler.stop()
+
+    with pytest.raises(RuntimeError):
+        future.result(timeout=1)
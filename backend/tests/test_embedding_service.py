@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from tests.conftest import bot
+
+
+class FakeSentenceTransformer:
+    """Devuelve float64 y no contiguo, como un modelo que no respeta el dtype"""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        return np.ones((4, len(texts)), dtype=np.float64).T / 2
+
+
+def test_embed_returns_contiguous_float32_matrix(monkeypatch):
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", FakeSentenceTransformer)
+    from app.services.embedding_service import EmbeddingService
+
+    service = EmbeddingService("fake-model")
+    vectors = service.embed(["uno", "dos"])
+
+    assert vectors.dtype == np.float32 and vectors.flags.c_contiguous
+    assert vectors.shape == (2, 4)
+    assert service.embed([]).shape == (0, 4)
+    assert service.embed_query("uno").shape == (4,)
+
+
+def test_ingestion_writes_the_embedder_matrix_without_copies(registry, bots, monkeypatch):
+    bots(bot("a"))
+    store = registry.vector_service_for_bot("a")
+    embedded, written = [], []
+    embed = store.document_embedder.embed
+
+    def recording_embed(texts):
+        embedded.append(embed(texts))
+        return embedded[-1]
+
+    write = store._write
+
+    def recording_write(ids, documents, embeddings, metadatas):
+        written.append(embeddings)
+        return write(ids, documents, embeddings, metadatas)
+
+    monkeypatch.setattr(store.document_embedder, "embed", recording_embed)
+    monkeypatch.setattr(store, "_write", recording_write)
+    store.add_document_chunks("d1", ["manzana pera", "uva"], {"bot_id": "a"})
+
+    assert written[0] is embedded[0]
+    assert written[0].dtype == np.float32
+    stored = store.get_chunks(["d1_0", "d1_1"], include_embeddings=True)["embeddings"]
+    np.testing.assert_allclose(np.asarray(stored, dtype=np.float32), embedded[0], rtol=1e-6)
+
+
+class Recorder:
+    def __init__(self, *args, **kwargs):
+        self.args, self.kwargs = args, kwargs
+
+
+def test_backend_selection(monkeypatch, tmp_path):
+    from app.core.config import settings
+    from app.services import embedding_service
+
+    monkeypatch.setattr(embedding_service, "EmbeddingService", Recorder)
+    monkeypatch.setattr(embedding_service, "OnnxEmbeddingService", Recorder)
+    monkeypatch.setattr(settings, "ONNX_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ONNX_QUANTIZED", True)
+
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "torch")
+    torch_service = embedding_service.get_embedding_service("org/modelo", threads=2)
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "ONNX")
+    onnx_service = embedding_service.get_embedding_service("org/modelo", threads=2)
+
+    assert torch_service.args == ("org/modelo",) and torch_service.kwargs == {"threads": 2}
+    assert onnx_service.kwargs == {
+        "model_dir": str(tmp_path / "org__modelo"), "model_name": "org/modelo", "quantized": True, "threads": 2
+    }
+
+
+def test_onnx_backend_without_export_explains_how_to_create_it(monkeypatch, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("transformers")
+    from app.core.config import settings
+    from app.services.embedding_service import get_embedding_service
+
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setattr(settings, "ONNX_MODEL_DIR", str(tmp_path))
+
+    with pytest.raises(FileNotFoundError, match="export_onnx_model.py"):
+        get_embedding_service("fake-model")
@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+
+from app.services.exact_index import ExactIndex, ExactIndexStore
+
+
+def make_store(tmp_path, vectors):
+    ids = [f"doc_{i}" for i in range(len(vectors))]
+
+    def load_chunks(bot_id):
+        yield {
+            "ids": ids,
+            "documents": [f"texto {i}" for i in range(len(ids))],
+            "metadatas": [{"doc_id": "doc", "bot_id": bot_id, "n": i} for i in range(len(ids))],
+            "embeddings": vectors
+        }
+
+    return ExactIndexStore(str(tmp_path / "exact"), 100, lambda bot_id: ids, load_chunks)
+
+
+def test_query_ranks_by_dot_product_and_filters(tmp_path):
+    store = make_store(tmp_path, np.eye(3, dtype=np.float32))
+
+    result = store.query("a", np.array([0.1, 0.9, 0.2], dtype=np.float32), k=2)
+    filtered = store.query("a", np.array([0.1, 0.9, 0.2], dtype=np.float32), k=2, where={"n": {"$in": [0, 2]}})
+
+    assert result["ids"] == ["doc_1", "doc_2"]
+    assert filtered["ids"] == ["doc_2", "doc_0"]
+
+
+def test_search_runs_outside_the_store_lock(tmp_path, monkeypatch):
+    store = make_store(tmp_path, np.eye(3, dtype=np.float32))
+    search_many = ExactIndex.search_many
+    lock_free = []
+
+    def checked_search_many(self, *args, **kwargs):
+        # otro hilo debe poder tomar el lock mientras se calcula el producto matricial
+        def try_lock():
+            acquired = store._lock.acquire(blocking=False)
+            if acquired:
+                store._lock.release()
+            lock_free.append(acquired)
+
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+        return search_many(self, *args, **kwargs)
+
+    monkeypatch.setattr(ExactIndex, "search_many", checked_search_many)
+    store.query("a", np.ones(3, dtype=np.float32), k=1)
+
+    assert lock_free == [True]
+
+
+def test_append_writes_a_new_matrix_file_and_keeps_open_indexes_readable(tmp_path):
+    store = make_store(tmp_path, np.eye(3, dtype=np.float32))
+    store.query("a", np.ones(3, dtype=np.float32), k=1)
+    before = store._indexes["a"]
+
+    store.append("a", ["doc_3"], ["texto 3"], [{"doc_id": "otro", "bot_id": "a"}], np.ones((1, 3), dtype=np.float32))
+
+    # la consulta en curso sigue leyendo su mmap; en disco solo queda el .npy vigente
+    assert before.matrix.shape == (3, 3)
+    assert len(list((tmp_path / "exact").glob("*.npy"))) == 1
+    assert store.query("a", np.ones(3, dtype=np.float32), k=1)["ids"] == ["doc_3"]
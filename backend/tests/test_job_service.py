@@ -0,0 +1,85 @@
+import threading
+import time
+
+from app.services.job_service import JobManager
+
+
+def wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None:
+        assert time.monotonic() < deadline, f"el trabajo {job.job_id} no terminó"
+        time.sleep(0.01)
+
+
+def test_job_completes_with_result_and_progress():
+    manager = JobManager()
+
+    def work(job):
+        job.update(done=3)
+        return {"moved": 3}
+
+    job = manager.submit("bulk_move", work, new_bot_id="b")
+    wait(job)
+
+    status = job.to_dict()
+    assert status["status"] == "completed"
+    assert status["result"] == {"moved": 3}
+    assert status["progress"] == {"done": 3}
+    assert status["params"] == {"new_bot_id": "b"}
+    assert manager.stats() == {"completed": 1}
+    manager.shutdown()
+
+
+def test_failed_job_keeps_the_error():
+    manager = JobManager()
+
+    def work(job):
+        raise ValueError("bot inexistente")
+
+    job = manager.submit("bulk_move", work)
+    wait(job)
+
+    assert (job.status, job.error) == ("failed", "bot inexistente")
+    manager.shutdown()
+
+
+def test_cancel_stops_running_job_and_skips_queued_one():
+    manager = JobManager(workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def work(job):
+        started.set()
+        release.wait(5)
+        return None if job.cancelled else "terminado"
+
+    running = manager.submit("bulk_move", work)
+    queued = manager.submit("bulk_move", work)
+    assert started.wait(5)
+
+    assert manager.cancel(running.job_id) and manager.cancel(queued.job_id)
+    release.set()
+    wait(queued)
+
+    assert running.status == "cancelled"
+    assert queued.status == "cancelled" and queued.started_at is None
+    assert not manager.cancel(running.job_id)
+    manager.shutdown()
+
+
+def test_shutdown_marks_queued_jobs_cancelled():
+    manager = JobManager(workers=1)
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while not job.cancelled:
+            job._cancelled.wait(0.01)
+
+    running = manager.submit("bulk_move", work)
+    queued = manager.submit("bulk_move", work)
+    assert started.wait(5)
+
+    manager.shutdown()
+
+    assert running.status == "cancelled"
+    assert queued.status == "cancelled" and queued.finished_at is not None
@@ -0,0 +1,127 @@
+import pytest
+
+from app.core.config import settings
+from app.models.document import DocumentFilter
+from app.services.document_service import DocumentService
+from app.services.lexical_index import BM25Index, tokenize
+from app.services.retriever_service import RetrieverService
+from tests.conftest import bot
+
+DOCUMENTS = {
+    "siga": ["Para el enlace de la plataforma SIGA ingrese con su usuario institucional"],
+    "campus": ["El campus virtual usa la misma plataforma de ingreso para todos los cursos"],
+    "horario": ["La oficina de soporte atiende de lunes a viernes en horario de oficina"],
+}
+
+
+def add_documents(registry, bot_id, documents=DOCUMENTS):
+    store = registry.vector_service_for_bot(bot_id)
+    for doc_id, chunks in documents.items():
+        store.add_document_chunks(doc_id=doc_id, chunks=chunks, metadata={"bot_id": bot_id, "filename": f"{doc_id}.txt"})
+
+
+def test_tokenize_ignores_case_accents_and_stopwords():
+    assert tokenize("La Página de la PLATAFORMA") == ["pagina", "plataforma"]
+
+
+def test_exact_term_ranks_first():
+    index = BM25Index()
+    for doc_id, chunks in DOCUMENTS.items():
+        index.add_document(doc_id, [f"{doc_id}_0"], chunks)
+
+    ranking = index.search("enlace plataforma SIGA")
+
+    assert ranking[0][0] == "siga_0"
+    assert [chunk_id for chunk_id, _ in ranking] == ["siga_0", "campus_0"]
+    assert ranking[0][1] > ranking[1][1] > 0
+
+
+def test_remove_document_and_compaction():
+    index = BM25Index()
+    for doc_id, chunks in DOCUMENTS.items():
+        index.add_document(doc_id, [f"{doc_id}_0"], chunks)
+
+    assert index.remove_document("siga")
+    assert [chunk_id for chunk_id, _ in index.search("plataforma siga")] == ["campus_0"]
+    # más de un cuarto borrado: compacta y sigue respondiendo igual
+    index.remove_document("horario")
+    assert index.stats()["deleted_chunks"] == 0
+    assert [chunk_id for chunk_id, _ in index.search("plataforma oficina")] == ["campus_0"]
+
+
+def test_search_within_documents():
+    index = BM25Index()
+    for doc_id, chunks in DOCUMENTS.items():
+        index.add_document(doc_id, [f"{doc_id}_0"], chunks)
+
+    assert [chunk_id for chunk_id, _ in index.search("plataforma", doc_ids=["campus", "horario"])] == ["campus_0"]
+    assert index.search("plataforma", doc_ids=[]) == []
+
+
+def test_filtered_hybrid_search_keeps_lexical_matches_in_scope(registry, bots, monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_CANDIDATES", 2)
+    bots(bot("a", retrieval_mode="hybrid"))
+    # fuera del alcance hay más chunks que el top-k de BM25, todos con mejor score léxico
+    add_documents(registry, "a", {f"siga{i}": [f"plataforma SIGA {i} plataforma SIGA"] for i in range(4)})
+    add_documents(registry, "a", {"campus": DOCUMENTS["campus"]})
+
+    chunks = RetrieverService().search(
+        "plataforma SIGA", "a", k=1, filters=DocumentFilter(doc_ids=["campus"])
+    )
+
+    assert [c["id"] for c in chunks] == ["campus_0"]
+    assert chunks[0]["lexical_score"] > 0
+
+
+def test_index_follows_delete_document(registry, bots):
+    bots(bot("a", retrieval_mode="hybrid"))
+    add_documents(registry, "a")
+    index = registry.lexical_indexes.get("a")
+    assert index.search("siga")[0][0] == "siga_0"
+
+    DocumentService().delete_document("siga")
+
+    assert "siga" not in index
+    assert index.search("siga") == []
+
+
+def test_index_follows_move(registry, bots):
+    bots(bot("a", retrieval_mode="hybrid"), bot("b", retrieval_mode="hybrid"))
+    add_documents(registry, "a")
+    add_documents(registry, "b", {"otro": ["documento del bot b sobre matrícula"]})
+    source = registry.lexical_indexes.get("a")
+    target = registry.lexical_indexes.get("b")
+
+    DocumentService().move_document_to_bot("siga", "b")
+
+    assert source.search("siga") == []
+    assert target.search("siga")[0][0] == "siga_0"
+    chunks = RetrieverService().search("enlace plataforma SIGA", "b", k=3)
+    assert chunks[0]["metadata"]["doc_id"] == "siga"
+
+
+def test_rrf_fusion(registry, bots):
+    bots(bot("a", retrieval_mode="hybrid", fusion_method="rrf", max_sources=3))
+    add_documents(registry, "a")
+
+    chunks = RetrieverService().search("enlace plataforma SIGA", "a", k=3)
+
+    assert chunks[0]["id"] == "siga_0"
+    # primero en las dos etapas: 1/(k+1) por cada una
+    assert chunks[0]["fusion_score"] == pytest.approx(2 / (settings.HYBRID_RRF_K + 1), abs=1e-4)
+    assert chunks[0]["lexical_score"] > 0
+    assert [c["fusion_score"] for c in chunks] == sorted((c["fusion_score"] for c in chunks), reverse=True)
+
+
+@pytest.mark.parametrize("weight", [0.0, 0.5, 1.0])
+def test_weighted_fusion(registry, bots, weight):
+    bots(bot("a", retrieval_mode="hybrid", fusion_method="weighted", hybrid_vector_weight=weight, max_sources=3))
+    add_documents(registry, "a")
+
+    chunks = RetrieverService().search("enlace plataforma SIGA", "a", k=3)
+
+    max_lexical = max(c["lexical_score"] for c in chunks)
+    for chunk in chunks:
+        expected = weight * chunk["similarity"] + (1 - weight) * chunk["lexical_score"] / max_lexical
+        assert chunk["fusion_score"] == pytest.approx(expected, abs=2e-3)
+    assert chunks[0]["id"] == "siga_0"
@@ -0,0 +1,17 @@
+from app.services.mmr import MMRStats
+
+
+def test_stats_report_net_savings():
+    stats = MMRStats()
+    stats.record(candidates=10, selected=3, chars_baseline=900, chars_selected=600)
+    # MMR eligió chunks más largos que los primeros candidatos
+    stats.record(candidates=10, selected=3, chars_baseline=500, chars_selected=800)
+
+    result = stats.stats()
+
+    assert result["chars_baseline"] == 1400
+    assert result["chars_selected"] == 1400
+    # lo que ahorró la primera búsqueda lo gastó la segunda
+    assert result["chars_saved"] == 0
+    assert result["chars_saved_pct"] == 0
+    assert result["avg_chars_saved"] == 0
@@ -0,0 +1,67 @@
+"""
+Paridad del backend ONNX Runtime (EMBEDDING_BACKEND=onnx) con sentence-transformers (torch).
+Se salta si no están los dos runtimes o si el modelo no se exportó (python export_onnx_model.py).
+"""
+import os
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from app.services.embedding_service import get_embedding_service, onnx_model_dir  # noqa: E402
+
+SAMPLES = [
+    "enlace plataforma SIGA",
+    "¿Cómo recupero mi contraseña del campus virtual?",
+    "Horario de atención de la oficina de soporte técnico",
+    "La matrícula se realiza en línea durante las dos primeras semanas del semestre.",
+    "Para ingresar use su usuario institucional y la contraseña enviada a su correo.",
+]
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    model_file = "model.int8.onnx" if settings.ONNX_QUANTIZED else "model.onnx"
+    if not os.path.exists(os.path.join(onnx_model_dir(settings.EMBEDDING_MODEL), model_file)):
+        pytest.skip(f"Sin exportación ONNX de {settings.EMBEDDING_MODEL} (python export_onnx_model.py)")
+
+    backend = settings.EMBEDDING_BACKEND
+    vectors = {}
+    try:
+        for name in ("torch", "onnx"):
+            settings.EMBEDDING_BACKEND = name
+            service = get_embedding_service(settings.EMBEDDING_MODEL)
+            vectors[name] = (service, service.embed(SAMPLES), service.embed_query(SAMPLES[0]))
+    finally:
+        settings.EMBEDDING_BACKEND = backend
+    return vectors
+
+
+def test_same_dimension(embeddings):
+    torch_service, torch_vectors, _ = embeddings["torch"]
+    onnx_service, onnx_vectors, _ = embeddings["onnx"]
+
+    assert onnx_service.dimension == torch_service.dimension
+    assert onnx_vectors.shape == torch_vectors.shape == (len(SAMPLES), torch_service.dimension)
+
+
+def test_both_normalized(embeddings):
+    for _, vectors, query in embeddings.values():
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-3)
+        np.testing.assert_allclose(np.linalg.norm(query), 1.0, atol=1e-3)
+
+
+def test_per_vector_cosine(embeddings):
+    _, torch_vectors, torch_query = embeddings["torch"]
+    _, onnx_vectors, onnx_query = embeddings["onnx"]
+
+    cosines = np.sum(torch_vectors * onnx_vectors, axis=1) / (
+        np.linalg.norm(torch_vectors, axis=1) * np.linalg.norm(onnx_vectors, axis=1)
+    )
+
+    assert cosines.min() >= 0.99, dict(zip(SAMPLES, cosines.round(4)))
+    assert float(np.dot(torch_query, onnx_query)) >= 0.99
@@ -0,0 +1,53 @@
+from app.services.query_embedding_cache import QueryEmbeddingCache, normalize_query
+from tests.conftest import FakeEmbedding
+
+
+class CountingEmbedding(FakeEmbedding):
+    """FakeEmbedding que guarda los textos que llegan al modelo"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.extend(texts)
+        return super().embed(texts)
+
+
+def test_normalize_query_only_collapses_whitespace():
+    assert normalize_query("  ¿Cuándo   vence\tel contrato? ") == "¿Cuándo vence el contrato?"
+
+
+def test_embed_query_hits_on_repeated_question():
+    embedder = CountingEmbedding()
+    cache = QueryEmbeddingCache(embedder)
+
+    first = cache.embed_query("cuándo vence el contrato")
+    second = cache.embed_query("cuándo  vence el contrato ")
+
+    assert (first == second).all()
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert embedder.calls == ["cuándo vence el contrato"]
+
+
+def test_case_changes_are_separate_entries():
+    cache = QueryEmbeddingCache(CountingEmbedding())
+
+    cache.embed_query("Contrato")
+    cache.embed_query("contrato")
+
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_embed_queries_embeds_each_missing_question_once():
+    embedder = CountingEmbedding()
+    cache = QueryEmbeddingCache(embedder, max_size=2)
+    cache.embed_query("beca")
+
+    vectors = cache.embed_queries(["beca", "biblioteca", "biblioteca", "horario"])
+
+    assert vectors.shape == (4, embedder.dimension)
+    assert embedder.calls == ["beca", "biblioteca", "horario"]
+    assert (cache.hits, cache.misses) == (2, 3)
+    # LRU: solo quedan las dos más recientes
+    assert len(cache._entries) == 2
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.retriever_service import RetrieverService
+from tests.conftest import bot
+
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from app.services.rerank_service import CrossEncoderReranker  # noqa: E402
+
+
+class FakeCrossEncoder:
+    """Score = palabras de la pregunta presentes en el chunk; cada batch tarda `delay` segundos"""
+
+    delay = 0.0
+
+    def __init__(self, model_name, max_length=512, device="cpu"):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False, convert_to_numpy=True):
+        self.batches.append(len(pairs))
+        time.sleep(self.delay)
+        return [float(len(set(query.split()) & set(text.split()))) for query, text in pairs]
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    monkeypatch.setattr(sentence_transformers, "CrossEncoder", FakeCrossEncoder)
+    monkeypatch.setattr(FakeCrossEncoder, "delay", 0.0)
+    return CrossEncoderReranker("fake-cross-encoder", batch_size=2)
+
+
+CANDIDATES = [{"id": f"c{i}", "text": text} for i, text in enumerate([
+    "horario de atención", "biblioteca central", "horario de la biblioteca central", "becas", "matrícula"
+])]
+
+
+def test_rerank_orders_by_cross_encoder_score(reranker):
+    reranked = reranker.rerank("horario biblioteca central", CANDIDATES, top_n=3)
+
+    assert [c["id"] for c in reranked] == ["c2", "c1", "c0"]
+    assert reranked[0]["rerank_score"] == 3.0
+    # sin presupuesto: un solo batch con todos los candidatos
+    assert reranker.model.batches == [5]
+
+
+def test_budget_stops_scoring_and_keeps_the_rest_in_ann_order(reranker, monkeypatch):
+    monkeypatch.setattr(FakeCrossEncoder, "delay", 0.05)
+
+    reranked = reranker.rerank("horario biblioteca central", CANDIDATES, top_n=5, budget_ms=60)
+
+    # el primer batch siempre se puntúa; el segundo ya no entra en el presupuesto
+    assert reranker.model.batches == [2]
+    assert [c["id"] for c in reranked] == ["c1", "c0", "c2", "c3", "c4"]
+    assert [c["rerank_score"] for c in reranked[2:]] == [None, None, None]
+    assert reranker.stats()["budget_exhausted"] == 1
+
+
+def test_search_with_rerank_returns_max_sources(registry, bots, reranker, monkeypatch):
+    monkeypatch.setattr(registry, "_reranker", reranker)
+    monkeypatch.setattr(settings, "RERANK_BUDGET_MS", 0)
+    bots(bot("a", rerank=True, max_sources=2))
+    store = registry.vector_service_for_bot("a")
+    for candidate in CANDIDATES:
+        store.add_document_chunks(candidate["id"], [candidate["text"]], {"bot_id": "a"})
+
+    chunks = RetrieverService().search("horario biblioteca central", "a", k=5)
+
+    assert [c["metadata"]["doc_id"] for c in chunks] == ["c2", "c1"]
+    assert all(c["rerank_score"] is not None for c in chunks)
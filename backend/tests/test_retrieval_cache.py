@@ -0,0 +1,74 @@
+from app.core.config import settings
+from app.services.document_service import DocumentService
+from app.services.retrieval_cache import RetrievalCache
+from app.services.retriever_service import RetrieverService
+from tests.conftest import bot
+
+CHUNKS = [{"id": "d_0", "text": "horario de la biblioteca", "metadata": {"doc_id": "d"}, "similarity": 0.9}]
+
+
+def test_entries_are_scoped_by_version_and_filter():
+    cache = RetrievalCache()
+    version = cache.version("a")
+    cache.put("a", "horario", 5, None, version, CHUNKS)
+
+    assert cache.get("a", "horario ", 5, None, version) == CHUNKS
+    assert cache.get("a", "horario", 5, None, version, where={"doc_id": "d"}) is None
+    assert cache.get("b", "horario", 5, None, cache.version("b")) is None
+
+    cache.bump("a")
+
+    assert cache.get("a", "horario", 5, None, cache.version("a")) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_put_with_stale_version_is_ignored():
+    cache = RetrievalCache()
+    version = cache.version("a")
+    # la subida terminó mientras se buscaba
+    cache.bump("a")
+    cache.put("a", "horario", 5, None, version, CHUNKS)
+
+    assert cache.stats()["size"] == 0
+
+
+def test_returned_chunks_are_copies():
+    cache = RetrievalCache()
+    version = cache.version("a")
+    cache.put("a", "horario", 5, None, version, CHUNKS)
+
+    cache.get("a", "horario", 5, None, version)[0]["metadata"]["doc_id"] = "otro"
+
+    assert cache.get("a", "horario", 5, None, version)[0]["metadata"]["doc_id"] == "d"
+
+
+def test_expired_and_oversized_entries():
+    cache = RetrievalCache(max_entries=1, ttl_s=-1)
+    version = cache.version("a")
+    cache.put("a", "horario", 5, None, version, CHUNKS)
+    assert cache.get("a", "horario", 5, None, version) is None
+    assert cache.stats()["expired"] == 1
+
+    cache = RetrievalCache(max_entries=1)
+    cache.put("a", "horario", 5, None, version, CHUNKS)
+    cache.put("a", "becas", 5, None, version, CHUNKS)
+    assert cache.get("a", "horario", 5, None, version) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_document_changes_invalidate_the_bot_results(registry, bots, monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_CACHE_SIZE", 16)
+    bots(bot("a"), bot("b"))
+    store = registry.vector_service_for_bot("a")
+    store.add_document_chunks("d1", ["horario de la biblioteca"], {"bot_id": "a"})
+    store.add_document_chunks("d2", ["préstamos de la biblioteca"], {"bot_id": "a"})
+    retriever = RetrieverService()
+
+    assert sorted(c["metadata"]["doc_id"] for c in retriever.search("biblioteca", "a", k=5)) == ["d1", "d2"]
+    retriever.search("biblioteca", "a", k=5)
+    assert registry.retrieval_cache.hits == 1
+
+    DocumentService().delete_document("d2")
+
+    assert [c["metadata"]["doc_id"] for c in retriever.search("biblioteca", "a", k=5)] == ["d1"]
+    assert registry.retrieval_cache.hits == 1
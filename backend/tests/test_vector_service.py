@@ -0,0 +1,80 @@
+import pytest
+
+from app.core.config import settings
+from app.services.vector_service import VectorService
+from tests.conftest import bot
+
+
+def doc_ids(results) -> list[str]:
+    return sorted(metadata["doc_id"] for metadata in results["metadatas"][0])
+
+
+def test_sync_invalidates_after_write_from_another_process(registry, bots, monkeypatch):
+    monkeypatch.setattr(settings, "EXACT_INDEX_MAX_CHUNKS", 100)
+    monkeypatch.setattr(settings, "CHROMA_SYNC_INTERVAL_S", 0)
+    bots(bot("a"))
+    store = registry.vector_service_for_bot("a")
+    store.add_document_chunks("d1", ["manzana pera"], {"bot_id": "a"})
+    assert doc_ids(store.query("manzana", 5, bot_id="a")) == ["d1"]
+    registry.lexical_indexes.get("a")
+
+    # las escrituras propias mantienen los índices en memoria al día, sin descartarlos
+    store.add_document_chunks("d2", ["manzana uva"], {"bot_id": "a"})
+    assert doc_ids(store.query("manzana", 5, bot_id="a")) == ["d1", "d2"]
+    assert registry.lexical_indexes.loaded("a") is not None
+
+    # otro proceso: su propia instancia sobre la misma colección
+    other = VectorService(collection_name=store.name, client=registry.chroma_client, model_name=store.model_name)
+    other.add_document_chunks("d3", ["manzana naranja"], {"bot_id": "a"})
+    other.delete_by_doc_id("d1")
+
+    assert doc_ids(store.query("manzana", 5, bot_id="a")) == ["d2", "d3"]
+    assert registry.lexical_indexes.loaded("a") is None
+
+
+def test_sync_is_throttled(registry, bots, monkeypatch):
+    monkeypatch.setattr(settings, "EXACT_INDEX_MAX_CHUNKS", 100)
+    monkeypatch.setattr(settings, "CHROMA_SYNC_INTERVAL_S", 3600)
+    bots(bot("a"))
+    store = registry.vector_service_for_bot("a")
+    store.add_document_chunks("d1", ["manzana pera"], {"bot_id": "a"})
+    store.query("manzana", 5, bot_id="a")
+
+    other = VectorService(collection_name=store.name, client=registry.chroma_client, model_name=store.model_name)
+    other.add_document_chunks("d2", ["manzana uva"], {"bot_id": "a"})
+
+    # dentro del intervalo se responde con el índice exacto cargado
+    assert doc_ids(store.query("manzana", 5, bot_id="a")) == ["d1"]
+
+
+def test_distance_to_similarity_matches_across_spaces():
+    from app.services.vector_store import distance_to_similarity
+
+    # cos = 0.8 con vectores normalizados
+    assert distance_to_similarity(0.4, "l2") == pytest.approx(0.8)
+    assert distance_to_similarity(0.2, "cosine") == pytest.approx(0.8)
+    assert distance_to_similarity(0.2, "ip") == pytest.approx(0.8)
+    assert distance_to_similarity(3.0, "l2") == 0.0
+
+
+def test_rebuild_changes_space_and_leaves_no_temporary_state(registry, bots, monkeypatch):
+    import rebuild_chroma_index
+
+    monkeypatch.setattr(settings, "EXACT_INDEX_MAX_CHUNKS", 100)
+    bots(bot("a"))
+    store = registry.vector_service_for_bot("a")
+    store.add_document_chunks("d1", ["manzana pera"], {"bot_id": "a"})
+    store.query("manzana", 5, bot_id="a")
+    name, tmp_name = store.name, rebuild_chroma_index.temporary_name(store.name)
+    # respaldo de una ejecución interrumpida después de renombrar la original
+    registry.chroma_client.create_collection(rebuild_chroma_index.backup_name(name))
+
+    copied = rebuild_chroma_index.rebuild_collection(store, "ip", batch_size=10)
+
+    rebuilt = VectorService(collection_name=name, client=registry.chroma_client, model_name=store.model_name)
+    assert copied == 1
+    assert rebuilt.space == "ip"
+    assert doc_ids(rebuilt.query("manzana", 5, bot_id="a")) == ["d1"]
+    assert {c.name for c in registry.chroma_client.list_collections()} == {name}
+    assert registry.document_registry.list_documents([tmp_name])["total"] == 0
+    assert [d["doc_id"] for d in registry.document_registry.list_documents([name])["documents"]] == ["d1"]